@@ -0,0 +1,120 @@
+"""
+Simulator launch as a follow-up stage of a successful build.
+
+Booting the simulator and installing the app take seconds and have nothing to
+do with whether the build worked, so build_project returns as soon as the .app
+exists and the launch runs as a background task. Progress goes to the project's
+WebSocket clients through the notify callback, and the latest launch of each
+project can be queried until the next one replaces it.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+import tracing
+
+# Launch states; the last three are final
+PENDING, BOOTING, INSTALLING = "pending", "booting", "installing"
+LAUNCHED, FAILED, CANCELLED = "launched", "failed", "cancelled"
+
+
+class AppLauncher:
+    """Boots the simulator and installs and launches built apps in the background, one launch per project"""
+
+    def __init__(self, simulator_service):
+        self.simulator_service = simulator_service
+        self.launches: Dict[str, Dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Called with (project_id, event) for every state change
+        self.notify: Optional[Callable[[str, Dict], Awaitable[None]]] = None
+
+    def set_notify(self, callback: Callable[[str, Dict], Awaitable[None]]):
+        self.notify = callback
+
+    def start(self, project_id: str, app_path: str, bundle_id: str) -> Dict:
+        """Start launching an app; a launch still running for the same project is superseded"""
+        previous = self._tasks.get(project_id)
+        if previous and not previous.done():
+            previous.cancel()
+
+        launch = {
+            "project_id": project_id,
+            "status": PENDING,
+            "message": "Waiting to launch in the simulator",
+            "app_path": app_path,
+            "bundle_id": bundle_id,
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "seconds": None
+        }
+        self.launches[project_id] = launch
+        self._tasks[project_id] = asyncio.create_task(self._launch(launch))
+        return dict(launch)
+
+    def get(self, project_id: str) -> Optional[Dict]:
+        launch = self.launches.get(project_id)
+        return dict(launch) if launch else None
+
+    async def wait(self, project_id: str) -> Optional[Dict]:
+        """The project's latest launch once it has finished"""
+        task = self._tasks.get(project_id)
+        if task:
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                # Superseded by a newer launch - wait for that one instead
+                if self._tasks.get(project_id) is not task:
+                    return await self.wait(project_id)
+        return self.get(project_id)
+
+    async def _launch(self, launch: Dict):
+        project_id = launch["project_id"]
+        start = datetime.now()
+
+        async def progress(message: str):
+            await self._update(launch, launch["status"], message)
+
+        try:
+            with tracing.span("simulator.launch", project_id=project_id, bundle_id=launch["bundle_id"]) as span:
+                await self._update(launch, BOOTING, "Booting simulator...")
+                with tracing.span("simulator.boot", project_id=project_id):
+                    ready, _, boot_message = await self.simulator_service.ensure_simulator_booted()
+                if not ready:
+                    await self._update(launch, FAILED, f"Failed to boot simulator: {boot_message}", start)
+                    span.set_attribute("status", FAILED)
+                    return
+
+                await self._update(launch, INSTALLING, "Installing and launching app...")
+                with tracing.span("simulator.install_and_launch", project_id=project_id,
+                                  bundle_id=launch["bundle_id"]):
+                    success, message = await self.simulator_service.install_and_launch_app(
+                        launch["app_path"], launch["bundle_id"], progress
+                    )
+                if success:
+                    await self._update(launch, LAUNCHED, "✅ App launched successfully in simulator!", start)
+                else:
+                    await self._update(launch, FAILED, f"Failed to launch app: {message}", start)
+                span.set_attribute("status", launch["status"])
+        except asyncio.CancelledError:
+            await self._update(launch, CANCELLED, "Superseded by a newer build", start)
+            raise
+        except Exception as e:
+            print(f"[LAUNCH] {project_id}: {e}")
+            await self._update(launch, FAILED, f"Failed to launch app: {e}", start)
+
+    async def _update(self, launch: Dict, status: str, message: str, start: Optional[datetime] = None):
+        launch["status"] = status
+        launch["message"] = message
+        if start is not None:
+            launch["finished_at"] = datetime.now().isoformat()
+            launch["seconds"] = round((datetime.now() - start).total_seconds(), 3)
+        print(f"[LAUNCH] {launch['project_id']}: {message}")
+
+        if self.notify:
+            try:
+                await self.notify(launch["project_id"], dict(launch))
+            except Exception as e:
+                print(f"[LAUNCH] Could not notify clients: {e}")
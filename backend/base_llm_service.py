@@ -5,6 +5,7 @@ from typing import Dict, List, Optional, Tuple
 import hashlib
 from datetime import datetime
 import random
+import metrics
 
 class BaseLLMService:
     """Base class for all LLM services with common functionality"""
@@ -379,7 +380,10 @@ struct ContentView: View {
         print(f"BaseLLMService parsing response with bundle ID: {safe_bundle_id}")
 
         # Try to extract JSON
-        parsed = self._extract_json_from_response(content)
+        with metrics.JSON_EXTRACTION_SECONDS.time(parser="base_llm_service", outcome="success") as timer:
+            parsed = self._extract_json_from_response(content)
+            if not parsed:
+                timer.labels["outcome"] = "failed"
 
         if parsed:
             # Normalize the structure
@@ -0,0 +1,350 @@
+"""
+Bulk app generation from a JSON-lines file.
+
+Each input line is {"description": "...", "app_name": "...", "id": "..."}; app_name
+and id are optional (id defaults to the line number). Generation and builds run
+with separate concurrency limits, so slow LLM calls and Xcode builds overlap
+without oversubscribing either.
+
+One line per finished item is appended to the results file, with stage timings
+and the outcome. Items already in the results file are skipped on the next run,
+and items whose code was generated but not yet built are recorded in
+<results>.checkpoint.json, so a resumed run builds them without calling the LLM again.
+
+    python batch_runner.py apps.jsonl --results apps.results.jsonl --llm-concurrency 4 --build-concurrency 2
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tracing
+import settings
+import llm_router
+import build_profiles
+
+GenerateFn = Callable[[str, Optional[str]], Awaitable[Dict]]
+
+
+def default_results_path(input_path: str) -> str:
+    root, _ = os.path.splitext(input_path)
+    return f"{root}.results.jsonl"
+
+
+def batch_dir() -> str:
+    """Where batches started over HTTP read their input and write their results"""
+    return settings.workspaces_path("batches")
+
+
+def resolve_batch_path(relative_path: str) -> str:
+    """A path inside the batch directory; raises ValueError for absolute paths and escapes"""
+    if os.path.isabs(relative_path):
+        raise ValueError(f"Batch paths must be relative to the batch directory: {relative_path}")
+    root = os.path.realpath(batch_dir())
+    path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"Batch path is outside the batch directory: {relative_path}")
+    return path
+
+
+class BatchRunner:
+    def __init__(self, generate: GenerateFn, project_manager, build_service,
+                 llm_concurrency: int = 2, build_concurrency: int = 1, build_profile: Optional[str] = None):
+        self.generate = generate
+        self.project_manager = project_manager
+        self.build_service = build_service
+        self.llm_concurrency = llm_concurrency
+        self.build_concurrency = build_concurrency
+        self.build_profile = build_profile
+        self.batch_id = f"batch_{uuid.uuid4().hex[:8]}"
+
+        self.input_path: Optional[str] = None
+        self.results_path: Optional[str] = None
+        self.checkpoint_path: Optional[str] = None
+        self._checkpoint: Dict[str, Dict] = {}
+
+        self.state = "pending"
+        self.total = 0
+        self.skipped = 0
+        self.completed = 0
+        self.outcomes: Dict[str, int] = {}
+        self.generating = 0
+        self.building = 0
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.error: Optional[str] = None
+
+    async def run(self, input_path: str, results_path: Optional[str] = None, resume: bool = True) -> Dict:
+        """Process every input line not already in the results file; returns the final status"""
+        self.input_path = input_path
+        self.results_path = results_path or default_results_path(input_path)
+        self.checkpoint_path = f"{self.results_path}.checkpoint.json"
+        self.started_at = datetime.now().isoformat()
+        self.state = "running"
+
+        try:
+            items = self._read_items(input_path)
+            done = self._finished_ids() if resume else set()
+            self._checkpoint = self._load_checkpoint() if resume else {}
+            if not resume and os.path.exists(self.results_path):
+                os.remove(self.results_path)
+
+            pending = [item for item in items if item["id"] not in done]
+            self.total = len(items)
+            self.skipped = len(items) - len(pending)
+            print(f"[BATCH] {self.batch_id}: {len(pending)} of {len(items)} items to process "
+                  f"({len(self._checkpoint)} already generated), results in {self.results_path}")
+
+            llm_slots = asyncio.Semaphore(self.llm_concurrency)
+            build_slots = asyncio.Semaphore(self.build_concurrency)
+            await asyncio.gather(*(self._process(item, llm_slots, build_slots) for item in pending))
+            self.state = "completed"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"[BATCH] {self.batch_id} failed: {e}")
+            raise
+        finally:
+            self.finished_at = datetime.now().isoformat()
+        return self.get_status()
+
+    def get_status(self) -> Dict:
+        return {
+            "batch_id": self.batch_id,
+            "state": self.state,
+            "input_path": self.input_path,
+            "results_path": self.results_path,
+            "total": self.total,
+            "skipped": self.skipped,
+            "completed": self.completed,
+            "remaining": max(0, self.total - self.skipped - self.completed),
+            "outcomes": dict(self.outcomes),
+            "generating": self.generating,
+            "building": self.building,
+            "llm_concurrency": self.llm_concurrency,
+            "build_concurrency": self.build_concurrency,
+            "build_profile": self.build_profile,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+    async def _process(self, item: Dict, llm_slots: asyncio.Semaphore, build_slots: asyncio.Semaphore):
+        if "error" in item:
+            self._finish(item, {"status": "invalid", "error": item["error"], "timings": {}})
+            return
+
+        start = time.monotonic()
+        timings: Dict[str, float] = {}
+        with tracing.root_span("batch.item", batch_id=self.batch_id, item_id=item["id"]) as item_span:
+            record = {"trace_id": item_span.trace_id}
+            generated = self._checkpoint.get(item["id"])
+            if generated and os.path.isdir(generated["project_path"]):
+                print(f"[BATCH] {item['id']}: resuming from generated project {generated['project_id']}")
+                record.update(generated)
+            else:
+                try:
+                    record.update(await self._generate(item, llm_slots, timings))
+                except Exception as e:
+                    timings["total"] = round(time.monotonic() - start, 3)
+                    item_span.set_attribute("status", "generation_failed")
+                    self._finish(item, {**record, "status": "generation_failed", "error": str(e), "timings": timings})
+                    return
+
+            queued = time.monotonic()
+            async with build_slots:
+                timings["build_queue"] = round(time.monotonic() - queued, 3)
+                self.building += 1
+                build_start = time.monotonic()
+                try:
+                    build_result = await self.build_service.build_project(
+                        record["project_path"], record["project_id"], record["bundle_id"], self.build_profile
+                    )
+                except Exception as e:
+                    build_result = None
+                    record["error"] = str(e)
+                finally:
+                    self.building -= 1
+                timings["build"] = round(time.monotonic() - build_start, 3)
+
+            # The launch runs after the build slot is released; the batch still records its outcome
+            if build_result is not None and build_result.launch_status == "pending":
+                launch_start = time.monotonic()
+                launch = await self.build_service.launcher.wait(record["project_id"])
+                timings["launch"] = round(time.monotonic() - launch_start, 3)
+                build_result.launch_status = launch["status"]
+                build_result.simulator_launched = launch["status"] == "launched"
+
+            if build_result is None:
+                status = "build_failed"
+            else:
+                if build_result.attempts and record.get("generated_by_llm"):
+                    llm_router.router.record_build(record["generated_by_llm"], "generate",
+                                                   build_result.success and build_result.attempts == 1)
+                record["build"] = {
+                    "success": build_result.success,
+                    "attempts": build_result.attempts,
+                    "build_profile": build_result.build_profile,
+                    "xcodebuild_time": round(build_result.xcodebuild_time, 3),
+                    "cache_hit": build_result.cache_hit,
+                    "simulator_launched": build_result.simulator_launched,
+                    "launch_status": build_result.launch_status,
+                    "errors": build_result.errors[:5]
+                }
+                if not build_result.success:
+                    status = "build_failed"
+                else:
+                    status = "success" if build_result.simulator_launched else "warning"
+
+            timings["total"] = round(time.monotonic() - start, 3)
+            item_span.set_attribute("status", status)
+            self._finish(item, {**record, "status": status, "timings": {**record.get("timings", {}), **timings}})
+
+    async def _generate(self, item: Dict, llm_slots: asyncio.Semaphore, timings: Dict[str, float]) -> Dict:
+        """Generate code and create the project; the result is checkpointed before building"""
+        queued = time.monotonic()
+        async with llm_slots:
+            timings["llm_queue"] = round(time.monotonic() - queued, 3)
+            self.generating += 1
+            generate_start = time.monotonic()
+            try:
+                with tracing.span("generate_code", item_id=item["id"]):
+                    generated_code = await self.generate(item["description"], item.get("app_name"))
+            finally:
+                self.generating -= 1
+            timings["generate"] = round(time.monotonic() - generate_start, 3)
+
+        project_id = f"proj_{uuid.uuid4().hex[:8]}"
+        tracing.set_attributes(project_id=project_id)
+        app_name = generated_code.get("app_name", item.get("app_name") or "MyApp")
+        create_start = time.monotonic()
+        project_path = await self.project_manager.create_project(project_id, generated_code, app_name,
+                                                                 self.build_profile)
+        timings["create"] = round(time.monotonic() - create_start, 3)
+
+        # The project manager derives the bundle ID from the app name; use what it wrote
+        with open(os.path.join(project_path, "project.json"), 'r') as f:
+            metadata = json.load(f)
+
+        record = {
+            "project_id": project_id,
+            "project_path": project_path,
+            "app_name": app_name,
+            "bundle_id": metadata["bundle_id"],
+            "generated_by_llm": generated_code.get("generated_by_llm"),
+            "file_count": len(generated_code.get("files", [])),
+            "timings": dict(timings)
+        }
+        self._checkpoint[item["id"]] = record
+        self._save_checkpoint()
+        return record
+
+    def _finish(self, item: Dict, record: Dict):
+        line = {
+            "id": item["id"],
+            "description": item.get("description"),
+            **record,
+            "finished_at": datetime.now().isoformat()
+        }
+        with open(self.results_path, 'a') as f:
+            f.write(json.dumps(line) + "\n")
+
+        if self._checkpoint.pop(item["id"], None) is not None:
+            self._save_checkpoint()
+        self.completed += 1
+        self.outcomes[record["status"]] = self.outcomes.get(record["status"], 0) + 1
+        print(f"[BATCH] {item['id']}: {record['status']} "
+              f"({self.completed + self.skipped}/{self.total}, {record['timings'].get('total', 0):.1f}s)")
+
+    def _read_items(self, input_path: str) -> List[Dict]:
+        items = []
+        seen = set()
+        with open(input_path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                    if not isinstance(item, dict) or not item.get("description"):
+                        raise ValueError("missing description")
+                except ValueError as e:
+                    item = {"error": f"line {line_number}: {e}"}
+                item["id"] = str(item.get("id") or f"line-{line_number}")
+                if item["id"] in seen:
+                    item = {"id": f"line-{line_number}", "error": f"duplicate id {item['id']}"}
+                seen.add(item["id"])
+                items.append(item)
+        return items
+
+    def _finished_ids(self) -> set:
+        finished = set()
+        if not os.path.exists(self.results_path):
+            return finished
+        with open(self.results_path, 'r') as f:
+            for line in f:
+                try:
+                    finished.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    continue  # A line cut short by an interruption; that item runs again
+        return finished
+
+    def _load_checkpoint(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                return json.load(f).get("generated", {})
+        except (OSError, ValueError) as e:
+            print(f"[BATCH] Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return {}
+
+    def _save_checkpoint(self):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"input_path": self.input_path, "generated": self._checkpoint}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+def _default_generate() -> GenerateFn:
+    """The multi-LLM service when it has keys configured, otherwise the Claude service"""
+    try:
+        from enhanced_claude_service import EnhancedClaudeService
+        service = EnhancedClaudeService()
+        if service.available_llms:
+            return service.generate_ios_app_multi_llm
+    except Exception as e:
+        print(f"Enhanced service not available: {e}")
+    from claude_service import ClaudeService
+    return ClaudeService().generate_ios_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and build apps from a JSON-lines file")
+    parser.add_argument("input", help="JSONL file with one {\"description\", \"app_name\", \"id\"} object per line")
+    parser.add_argument("--results", help="results JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("--llm-concurrency", type=int, default=2, help="generations in flight at once")
+    parser.add_argument("--build-concurrency", type=int, default=1, help="builds in flight at once")
+    parser.add_argument("--build-profile", choices=sorted(build_profiles.PROFILES),
+                        help="default: SWIFTGEN_BUILD_PROFILE, else fast-dev")
+    parser.add_argument("--no-resume", action="store_true", help="start over instead of skipping finished items")
+    args = parser.parse_args()
+
+    from project_manager import ProjectManager
+    from build_service import BuildService
+
+    runner = BatchRunner(_default_generate(), ProjectManager(), BuildService(),
+                         args.llm_concurrency, args.build_concurrency, args.build_profile)
+    status = asyncio.run(runner.run(args.input, args.results, resume=not args.no_resume))
+    print(json.dumps(status, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import json
+import shutil
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class BuildCache:
+    """Cache of built .app bundles keyed by a fingerprint of everything that feeds the build.
+
+    The fingerprint covers the Sources tree, project.yml, Info.plist, the toolchain
+    version and any extra build settings, so a reverted modification or a rebuild
+    with no changes is served by copying the bundle back instead of running xcodebuild.
+    """
+
+    FINGERPRINT_INPUTS = ["project.yml", "Info.plist"]
+
+    def __init__(self, cache_dir: str, max_entries: int = 50, max_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, project_path: str, toolchain_version: str, extra: Optional[Dict] = None) -> Optional[str]:
+        """Hash of build inputs, or None if a required input is missing"""
+        digest = hashlib.sha256()
+        digest.update(f"toolchain:{toolchain_version}\n".encode())
+        if extra:
+            digest.update(f"extra:{json.dumps(extra, sort_keys=True)}\n".encode())
+
+        for name in self.FINGERPRINT_INPUTS:
+            path = os.path.join(project_path, name)
+            if not os.path.exists(path):
+                return None
+            digest.update(f"file:{name}\n".encode())
+            digest.update(self._hash_file(path).encode())
+
+        sources_dir = os.path.join(project_path, "Sources")
+        if not os.path.isdir(sources_dir):
+            return None
+        for root, dirs, filenames in os.walk(sources_dir):
+            dirs.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(root, filename)
+                relative_path = os.path.relpath(path, project_path).replace(os.sep, '/')
+                digest.update(f"file:{relative_path}\n".encode())
+                digest.update(self._hash_file(path).encode())
+
+        return digest.hexdigest()
+
+    def restore(self, fingerprint: str, products_dir: str) -> Optional[str]:
+        """Copy a cached bundle into products_dir; returns the restored .app path on a hit"""
+        entry_dir = os.path.join(self.cache_dir, fingerprint)
+        meta = self._load_meta(entry_dir)
+        if not meta:
+            self.misses += 1
+            return None
+
+        cached_app = os.path.join(entry_dir, meta["app_name"])
+        if not os.path.isdir(cached_app):
+            self.misses += 1
+            return None
+
+        app_path = os.path.join(products_dir, meta["app_name"])
+        os.makedirs(products_dir, exist_ok=True)
+        if os.path.exists(app_path):
+            shutil.rmtree(app_path)
+        shutil.copytree(cached_app, app_path, symlinks=True)
+
+        # Touch the entry so eviction treats it as recently used
+        os.utime(os.path.join(entry_dir, "meta.json"))
+        self.hits += 1
+        return app_path
+
+    def store(self, fingerprint: str, app_path: str):
+        """Save a freshly built bundle under its fingerprint"""
+        entry_dir = os.path.join(self.cache_dir, fingerprint)
+        if self._load_meta(entry_dir):
+            return
+
+        # Build the entry in a scratch dir and rename it into place so readers never see half a bundle
+        tmp_dir = os.path.join(self.cache_dir, f".tmp_{uuid.uuid4().hex}")
+        try:
+            app_name = os.path.basename(app_path)
+            shutil.copytree(app_path, os.path.join(tmp_dir, app_name), symlinks=True)
+            meta = {
+                "fingerprint": fingerprint,
+                "app_name": app_name,
+                "created_at": datetime.now().isoformat(),
+                "size": self._dir_size(tmp_dir)
+            }
+            with open(os.path.join(tmp_dir, "meta.json"), 'w') as f:
+                json.dump(meta, f, indent=2)
+            os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            print(f"[BUILD CACHE] Could not store {fingerprint[:12]}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries beyond the count or size limits"""
+        entries = self._entries()
+        entries.sort(key=lambda entry: entry["last_used"], reverse=True)
+
+        total_bytes = 0
+        for position, entry in enumerate(entries):
+            total_bytes += entry["size"]
+            if position >= self.max_entries or total_bytes > self.max_bytes:
+                shutil.rmtree(entry["path"], ignore_errors=True)
+
+    def get_stats(self) -> Dict:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry["size"] for entry in entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def _entries(self) -> List[Dict]:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta = self._load_meta(entry_dir)
+            if meta:
+                entries.append({
+                    "path": entry_dir,
+                    "size": meta.get("size", 0),
+                    "last_used": os.path.getmtime(os.path.join(entry_dir, "meta.json"))
+                })
+        return entries
+
+    def _load_meta(self, entry_dir: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _hash_file(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _dir_size(self, path: str) -> int:
+        total = 0
+        for root, _, filenames in os.walk(path):
+            for filename in filenames:
+                file_path = os.path.join(root, filename)
+                if not os.path.islink(file_path):
+                    total += os.path.getsize(file_path)
+        return total
@@ -0,0 +1,152 @@
+"""
+The xcodebuild -destination for this host, resolved once and cached.
+
+Looking up simulators for every build, and then trying one full build per
+candidate destination, meant a host with a stale or missing simulator paid for
+two or three builds before one ran against a destination that worked. The
+resolver picks the destination once per host and toolchain: the newest runtime
+of the preferred iPhone simulators by UDID, or the generic simulator destination
+when none is installed. The choice is kept in workspaces/build_destination.json.
+It is only looked up again when a build fails because of its destination.
+"""
+
+import os
+import re
+import json
+import asyncio
+import platform
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import cassette
+
+PREFERRED_DEVICES = ["iPhone 16 Pro", "iPhone 16", "iPhone 15", "iPhone 14"]
+GENERIC_DESTINATION = "generic/platform=iOS Simulator"
+# com.apple.CoreSimulator.SimRuntime.iOS-18-0 -> (18, 0)
+RUNTIME_VERSION = re.compile(r'iOS[- ](\d+)[-.](\d+)')
+
+
+def _runtime_version(runtime: str) -> Tuple[int, ...]:
+    match = RUNTIME_VERSION.search(runtime)
+    return tuple(int(part) for part in match.groups()) if match else (0, 0)
+
+
+class DestinationResolver:
+    """Resolves, caches and persists the simulator destination builds run against"""
+
+    def __init__(self, state_path: str):
+        self.state_path = state_path
+        self.host = platform.node()
+        self._state: Optional[Dict] = None
+        self._lock = asyncio.Lock()
+        self.resolutions = 0
+        self.refreshes = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r') as f:
+                self._state = json.load(f)
+        except (OSError, ValueError):
+            self._state = None
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, 'w') as f:
+                json.dump(self._state, f, indent=2)
+        except OSError as e:
+            print(f"[DESTINATION] Could not save state: {e}")
+
+    def _cached(self, toolchain: str) -> Optional[str]:
+        state = self._state
+        if state and state.get("host") == self.host and state.get("toolchain") == toolchain:
+            return state["destination"]
+        return None
+
+    async def resolve(self, toolchain: str, failed: Optional[str] = None) -> str:
+        """Destination to build against; pass the destination a build just failed on to pick another"""
+        async with self._lock:
+            cached = self._cached(toolchain)
+            if cached and (failed is None or cached != failed):
+                # Another build already replaced the failed destination
+                return cached
+
+            # Destinations that already failed with this toolchain are skipped until it changes
+            failed_before = self._state.get("failed", []) if cached else []
+            failed_all = failed_before + [failed] if failed else failed_before
+            if failed:
+                self.refreshes += 1
+
+            candidates = self._candidates(await self._available_devices())
+            # The generic destination is the last resort and is kept even if it failed
+            choice = next((c for c in candidates if c["destination"] not in failed_all), candidates[-1])
+
+            self._state = {
+                "host": self.host,
+                "toolchain": toolchain,
+                "destination": choice["destination"],
+                "device": choice.get("name"),
+                "runtime": choice.get("runtime"),
+                "verified": False,
+                "resolved_at": datetime.now().isoformat(),
+                "failed": failed_all
+            }
+            self.resolutions += 1
+            self._save()
+            print(f"[DESTINATION] Using {choice['destination']}"
+                  + (f" ({choice['name']}, {choice['runtime']})" if choice.get("name") else "")
+                  + (f" instead of {failed}" if failed else ""))
+            return choice["destination"]
+
+    def mark_verified(self, destination: str):
+        """Record that a build succeeded against the destination"""
+        if self._state and self._state.get("destination") == destination and not self._state.get("verified"):
+            self._state["verified"] = True
+            self._save()
+
+    def _candidates(self, devices: List[Dict]) -> List[Dict]:
+        """Preferred simulators by name, newest runtime first, then the generic destination"""
+        candidates = []
+        for name in PREFERRED_DEVICES:
+            matching = sorted((d for d in devices if d["name"] == name),
+                              key=lambda d: _runtime_version(d["runtime"]), reverse=True)
+            for device in matching:
+                candidates.append({
+                    "destination": f"platform=iOS Simulator,id={device['udid']}",
+                    "name": device["name"],
+                    "runtime": device["runtime"]
+                })
+        candidates.append({"destination": GENERIC_DESTINATION})
+        return candidates
+
+    async def _available_devices(self) -> List[Dict]:
+        """Available iOS simulators with name, UDID and runtime"""
+        try:
+            process = await cassette.create_subprocess_exec(
+                'xcrun', 'simctl', 'list', 'devices', 'available', '-j',
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, _ = await process.communicate()
+            if process.returncode != 0:
+                return []
+            devices_data = json.loads(stdout.decode())
+        except (OSError, ValueError):
+            return []
+
+        devices = []
+        for runtime, runtime_devices in devices_data.get('devices', {}).items():
+            if 'iOS' not in runtime:
+                continue
+            for device in runtime_devices:
+                if device.get('isAvailable', False):
+                    devices.append({"name": device['name'], "udid": device['udid'], "runtime": runtime})
+        return devices
+
+    def get_info(self) -> Dict:
+        return {
+            **(self._state or {"destination": None}),
+            "resolutions": self.resolutions,
+            "refreshes": self.refreshes
+        }
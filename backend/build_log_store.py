@@ -0,0 +1,235 @@
+import os
+import re
+import gzip
+import json
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class BuildLogStore:
+    """Per-attempt build logs, compressed on write, with a small offset index.
+
+    Layout: {logs_dir}/{project_id}/{build_id}_attempt{n}.log.{zst|gz} plus a
+    sibling .index.json holding sizes, error/warning line offsets and sparse
+    line checkpoints, so tail and range reads never load a whole log into memory.
+    """
+
+    LOG_ID_PATTERN = re.compile(r'^[A-Za-z0-9_\-]+$')
+    CHECKPOINT_EVERY = 1000
+    MAX_INDEXED_DIAGNOSTICS = 500
+    READ_CHUNK = 64 * 1024
+
+    def __init__(self, logs_dir: str, max_logs_per_project: int = 20, max_age_days: float = 14,
+                 compression: Optional[str] = None):
+        self.logs_dir = logs_dir
+        self.max_logs_per_project = max_logs_per_project
+        self.max_age_seconds = max_age_days * 86400
+        self.compression = compression or ("zst" if zstandard else "gz")
+        if self.compression == "zst" and not zstandard:
+            print("Warning: zstandard not installed, falling back to gzip for build logs")
+            self.compression = "gz"
+        os.makedirs(self.logs_dir, exist_ok=True)
+
+    def project_dir(self, project_id: str) -> str:
+        """Directory holding all build logs of a project"""
+        self._validate_id(project_id)
+        return os.path.join(self.logs_dir, project_id)
+
+    def write_attempt(self, project_id: str, build_id: str, attempt: int, output: str,
+                      errors: Optional[List[str]] = None, success: bool = False) -> str:
+        """Write one build attempt's output compressed and indexed; returns the log path"""
+        project_dir = self.project_dir(project_id)
+        os.makedirs(project_dir, exist_ok=True)
+
+        log_id = f"{build_id}_attempt{attempt}"
+        self._validate_id(log_id)
+        log_path = os.path.join(project_dir, f"{log_id}.log.{self.compression}")
+
+        text = output
+        if errors:
+            text += "\n\nERRORS:\n" + "\n".join(errors) + "\n"
+
+        diagnostics = []
+        checkpoints = [[0, 0]]
+        offset = 0
+        line_count = 0
+
+        with self._open_writer(log_path) as f:
+            for line in text.splitlines(keepends=True):
+                data = line.encode('utf-8', errors='replace')
+
+                lowered = line.lower()
+                severity = None
+                if 'error:' in lowered or '** build failed **' in lowered:
+                    severity = "error"
+                elif 'warning:' in lowered:
+                    severity = "warning"
+                if severity and len(diagnostics) < self.MAX_INDEXED_DIAGNOSTICS:
+                    diagnostics.append({"line": line_count, "offset": offset, "severity": severity})
+
+                f.write(data)
+                offset += len(data)
+                line_count += 1
+                if line_count % self.CHECKPOINT_EVERY == 0:
+                    checkpoints.append([line_count, offset])
+
+        index = {
+            "log_id": log_id,
+            "project_id": project_id,
+            "build_id": build_id,
+            "attempt": attempt,
+            "success": success,
+            "created_at": datetime.now().isoformat(),
+            "compression": self.compression,
+            "size": offset,
+            "compressed_size": os.path.getsize(log_path),
+            "lines": line_count,
+            "error_count": sum(1 for d in diagnostics if d["severity"] == "error"),
+            "warning_count": sum(1 for d in diagnostics if d["severity"] == "warning"),
+            "diagnostics": diagnostics,
+            "checkpoints": checkpoints
+        }
+        with open(self._index_path(project_id, log_id), 'w') as f:
+            json.dump(index, f)
+
+        self.enforce_retention(project_id)
+        return log_path
+
+    def list_logs(self, project_id: str) -> List[Dict]:
+        """Summaries of a project's logs, newest first"""
+        project_dir = self.project_dir(project_id)
+        if not os.path.isdir(project_dir):
+            return []
+
+        logs = []
+        for name in os.listdir(project_dir):
+            if name.endswith(".index.json"):
+                index = self._load_index_file(os.path.join(project_dir, name))
+                if index:
+                    summary = {k: v for k, v in index.items() if k not in ("diagnostics", "checkpoints")}
+                    logs.append(summary)
+
+        logs.sort(key=lambda log: (log.get("build_id", ""), log.get("attempt", 0)), reverse=True)
+        return logs
+
+    def get_index(self, project_id: str, log_id: str) -> Optional[Dict]:
+        """Full index (diagnostic offsets included) for a log"""
+        self._validate_id(log_id)
+        return self._load_index_file(self._index_path(project_id, log_id))
+
+    def iter_range(self, project_id: str, log_id: str, start: int = 0,
+                   end: Optional[int] = None) -> Iterator[bytes]:
+        """Stream uncompressed bytes [start, end) of a log in bounded chunks"""
+        index = self.get_index(project_id, log_id)
+        if index is None:
+            return
+
+        end = index["size"] if end is None else min(end, index["size"])
+        if start >= end:
+            return
+
+        with self._open_reader(self._log_path(project_id, log_id, index["compression"])) as f:
+            # Compressed streams only seek forward by decompressing, so skip in chunks
+            remaining_skip = start
+            while remaining_skip > 0:
+                skipped = f.read(min(self.READ_CHUNK, remaining_skip))
+                if not skipped:
+                    return
+                remaining_skip -= len(skipped)
+
+            remaining = end - start
+            while remaining > 0:
+                chunk = f.read(min(self.READ_CHUNK, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def iter_tail(self, project_id: str, log_id: str, lines: int = 200) -> Iterator[bytes]:
+        """Stream the last N lines, starting from the nearest checkpoint"""
+        index = self.get_index(project_id, log_id)
+        if index is None:
+            return
+
+        first_line = max(0, index["lines"] - lines)
+        start_offset = 0
+        for checkpoint_line, checkpoint_offset in index["checkpoints"]:
+            if checkpoint_line > first_line:
+                break
+            start_offset = checkpoint_offset
+
+        # Reading starts at most CHECKPOINT_EVERY lines early and only N lines are held
+        tail = deque(maxlen=lines)
+        pending = b""
+        for chunk in self.iter_range(project_id, log_id, start_offset):
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                tail.append(line + b"\n")
+        if pending:
+            tail.append(pending)
+
+        yield from tail
+
+    def enforce_retention(self, project_id: Optional[str] = None):
+        """Delete logs beyond the per-project count limit or older than the age limit"""
+        if project_id:
+            project_ids = [project_id]
+        elif os.path.isdir(self.logs_dir):
+            project_ids = [p for p in os.listdir(self.logs_dir)
+                           if os.path.isdir(os.path.join(self.logs_dir, p)) and self.LOG_ID_PATTERN.match(p)]
+        else:
+            project_ids = []
+
+        now = time.time()
+        for pid in project_ids:
+            logs = self.list_logs(pid)
+            for position, log in enumerate(logs):
+                index_path = self._index_path(pid, log["log_id"])
+                too_many = position >= self.max_logs_per_project
+                too_old = now - os.path.getmtime(index_path) > self.max_age_seconds
+                if too_many or too_old:
+                    self._delete_log(pid, log["log_id"], log.get("compression", self.compression))
+
+    def _delete_log(self, project_id: str, log_id: str, compression: str):
+        for path in (self._log_path(project_id, log_id, compression), self._index_path(project_id, log_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _validate_id(self, value: str):
+        if not value or not self.LOG_ID_PATTERN.match(value):
+            raise ValueError(f"Invalid log identifier: {value!r}")
+
+    def _log_path(self, project_id: str, log_id: str, compression: str) -> str:
+        return os.path.join(self.project_dir(project_id), f"{log_id}.log.{compression}")
+
+    def _index_path(self, project_id: str, log_id: str) -> str:
+        return os.path.join(self.project_dir(project_id), f"{log_id}.index.json")
+
+    def _load_index_file(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _open_writer(self, path: str):
+        if self.compression == "zst":
+            return zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'), closefd=True)
+        return gzip.open(path, 'wb', compresslevel=6)
+
+    def _open_reader(self, path: str):
+        if path.endswith(".zst"):
+            if not zstandard:
+                raise RuntimeError("zstandard is required to read .zst build logs")
+            return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return gzip.open(path, 'rb')
@@ -0,0 +1,76 @@
+"""
+Named build profiles.
+
+fast-dev builds only for the host architecture, which is what the simulator we
+launch runs, with index-while-building and testability off and compilation
+caching on where Xcode supports it. full keeps the old settings: both simulator
+architectures, index store and testability. A profile's settings go into the
+generated project.yml and are also passed on the xcodebuild command line, so a
+project can be rebuilt with a different profile without regenerating it.
+
+The default is SWIFTGEN_BUILD_PROFILE (fast-dev); requests can pick another one.
+"""
+
+import os
+import platform
+from typing import Dict, List, Optional
+
+# Simulator architecture of this Mac; Rosetta reports x86_64, which is also what its simulators run
+HOST_ARCH = "arm64" if platform.machine() in ("arm64", "aarch64") else "x86_64"
+
+PROFILES: Dict[str, Dict] = {
+    "fast-dev": {
+        "description": "Host architecture only, no indexing or testability, compilation caching",
+        "settings": {
+            "ONLY_ACTIVE_ARCH": "YES",
+            "ARCHS": HOST_ARCH,
+            "COMPILER_INDEX_STORE_ENABLE": "NO",
+            "ENABLE_TESTABILITY": "NO",
+            "DEBUG_INFORMATION_FORMAT": "dwarf",
+            # Ignored by Xcode versions without compilation caching
+            "COMPILATION_CACHE_ENABLE_CACHING": "YES"
+        }
+    },
+    "full": {
+        "description": "Both simulator architectures, index store and testability",
+        # Every key fast-dev sets is set here too, so a fast-dev project.yml is overridden on rebuild
+        "settings": {
+            "ONLY_ACTIVE_ARCH": "NO",
+            "ARCHS": "x86_64 arm64",
+            "VALID_ARCHS": "x86_64 arm64",
+            "EXCLUDED_ARCHS": "",
+            "COMPILER_INDEX_STORE_ENABLE": "YES",
+            "ENABLE_TESTABILITY": "YES",
+            "DEBUG_INFORMATION_FORMAT": "dwarf-with-dsym",
+            "COMPILATION_CACHE_ENABLE_CACHING": "NO"
+        }
+    }
+}
+
+DEFAULT_PROFILE = os.getenv("SWIFTGEN_BUILD_PROFILE", "fast-dev")
+
+
+def resolve(name: Optional[str] = None) -> str:
+    """The profile name to use; raises ValueError for unknown names"""
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown build profile '{name}' (available: {', '.join(PROFILES)})")
+    return name
+
+
+def project_settings(name: str) -> Dict[str, str]:
+    """Build settings for the target in project.yml"""
+    return dict(PROFILES[resolve(name)]["settings"])
+
+
+def xcodebuild_args(name: str) -> List[str]:
+    """SETTING=value overrides for the xcodebuild command line"""
+    return [f"{key}={value}" for key, value in PROFILES[resolve(name)]["settings"].items()]
+
+
+def describe() -> Dict:
+    return {
+        "default": resolve(),
+        "profiles": {name: {"description": profile["description"], "settings": profile["settings"]}
+                     for name, profile in PROFILES.items()}
+    }
@@ -1,18 +1,49 @@
 import os
+import shutil
 import subprocess
 import asyncio
 import json
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 from models import BuildStatus, BuildResult
+from build_log_store import BuildLogStore
+from build_cache import BuildCache
+from build_destination import DestinationResolver
+from app_launcher import AppLauncher
+from shared_build_cache import SharedBuildCaches
+from diagnostics import Diagnostic
+import diagnostics
+import result_bundle
+import build_profiles
+import template_warmer
+import metrics
+import cassette
+import tracing
+import settings
 
 class BuildService:
     def __init__(self):
         # Use absolute path for build logs
         self.backend_dir = os.path.dirname(os.path.abspath(__file__))
-        self.workspaces_dir = os.path.abspath(os.path.join(self.backend_dir, "..", "workspaces"))
+        self.workspaces_dir = settings.workspaces_dir()
         self.build_logs_dir = os.path.join(self.workspaces_dir, "build_logs")
         os.makedirs(self.build_logs_dir, exist_ok=True)
+        self.log_store = BuildLogStore(self.build_logs_dir)
+        self.log_store.enforce_retention()
+        self.build_cache = BuildCache(os.path.join(self.workspaces_dir, "build_cache"))
+
+        # Module and package caches shared across projects, so cold builds reuse compiled system modules
+        self.shared_caches = None
+        if settings.env_flag("SWIFTGEN_SHARED_BUILD_CACHE"):
+            self.shared_caches = SharedBuildCaches(
+                os.path.join(self.workspaces_dir, "shared_build_cache"),
+                module_cache_max_bytes=int(float(os.getenv("SWIFTGEN_MODULE_CACHE_MAX_GB", 4)) * 1024 ** 3),
+                package_cache_max_bytes=int(float(os.getenv("SWIFTGEN_PACKAGE_CACHE_MAX_GB", 2)) * 1024 ** 3)
+            )
+        self._toolchain_version = None
+
+        # Simulator destination resolved once per host and toolchain, refreshed when a build fails on it
+        self.destination_resolver = DestinationResolver(os.path.join(self.workspaces_dir, "build_destination.json"))
 
         # Try to import SimulatorService
         try:
@@ -22,6 +53,10 @@ class BuildService:
             print("Warning: simulator_service not available. Simulator launch disabled.")
             self.simulator_service = None
 
+        # Launch in the simulator after build_project returns, instead of before
+        self.launcher = AppLauncher(self.simulator_service) if self.simulator_service else None
+        self.background_launch = settings.env_flag("SWIFTGEN_BACKGROUND_LAUNCH")
+
         # Import ClaudeService for intelligent error recovery
         try:
             from claude_service import ClaudeService
@@ -38,6 +73,9 @@ class BuildService:
         self.status_callback = None
         self.max_retry_attempts = 3
 
+        # Read diagnostics from a result bundle instead of scraping -verbose output
+        self.use_result_bundle = settings.env_flag("SWIFTGEN_RESULT_BUNDLE")
+
     def _init_error_recovery(self):
         """Initialize the robust multi-model error recovery system with all available LLMs"""
         try:
@@ -86,13 +124,38 @@ class BuildService:
             await self.status_callback(message)
         print(f"[BUILD STATUS] {message}")
 
-    async def build_project(self, project_path: str, project_id: str, bundle_id: Optional[str] = None) -> BuildResult:
-        """Build iOS project with intelligent error recovery"""
+    async def build_project(self, project_path: str, project_id: str, bundle_id: Optional[str] = None,
+                            profile: Optional[str] = None) -> BuildResult:
+        """Build iOS project with intelligent error recovery.
 
+        profile defaults to the one the project was created with; raises ValueError for unknown names.
+        """
         if not os.path.isabs(project_path):
             project_path = os.path.abspath(os.path.join(self.backend_dir, project_path))
+        profile = build_profiles.resolve(profile or self._project_profile(project_path))
+
+        with tracing.span("build", project_id=project_id, build_profile=profile) as build_span:
+            result = await self._build_project(project_path, project_id, bundle_id, profile)
+            result.build_profile = profile
+            result.destination = self.destination_resolver.get_info()["destination"]
+            build_span.set_attributes(success=result.success, cache_hit=result.cache_hit,
+                                      simulator_launched=result.simulator_launched,
+                                      xcodebuild_time=round(result.xcodebuild_time, 3))
+            return result
+
+    def _project_profile(self, project_path: str) -> Optional[str]:
+        """Build profile recorded in project.json when the project was created"""
+        try:
+            with open(os.path.join(project_path, "project.json"), 'r') as f:
+                return json.load(f).get("build_profile")
+        except (OSError, ValueError):
+            return None
 
-        build_log_path = os.path.join(self.build_logs_dir, f"{project_id}_build.log")
+    async def _build_project(self, project_path: str, project_id: str, bundle_id: Optional[str],
+                             profile: str) -> BuildResult:
+        # One compressed log per attempt, grouped under this build's ID
+        build_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        build_log_path = self.log_store.project_dir(project_id)
 
         # CRITICAL: Verify source files exist before building
         sources_dir = os.path.join(project_path, "Sources")
@@ -117,9 +180,32 @@ class BuildService:
                 log_path=build_log_path
             )
 
+        # Identical inputs were built before - reuse the bundle instead of rebuilding
+        lookup_start = datetime.now()
+        fingerprint = await self._fingerprint(project_path, profile)
+        if fingerprint:
+            products_dir = os.path.join(project_path, "DerivedData", "Build", "Products", "Debug-iphonesimulator")
+            cached_app = await asyncio.get_event_loop().run_in_executor(
+                None, self.build_cache.restore, fingerprint, products_dir
+            )
+            metrics.BUILD_CACHE_TOTAL.inc(result="hit" if cached_app else "miss")
+            if cached_app:
+                await self._update_status("No changes since a previous build - reusing cached app")
+                build_time = (datetime.now() - lookup_start).total_seconds()
+                result = await self._handle_successful_build(
+                    project_path, project_id, bundle_id, build_log_path, build_time, []
+                )
+                result.cache_hit = True
+                result.fingerprint = fingerprint
+                return result
+
         # Generate Xcode project first
         await self._update_status("Generating Xcode project...")
-        gen_result = await self._run_xcodegen(project_path)
+        with tracing.span("xcodegen", project_id=project_id), \
+                metrics.XCODEGEN_SECONDS.time(outcome="success") as timer:
+            gen_result = await self._run_xcodegen(project_path)
+            if not gen_result[0]:
+                timer.labels["outcome"] = "failed"
         if not gen_result[0]:
             return BuildResult(
                 success=False,
@@ -131,39 +217,53 @@ class BuildService:
 
         # Clean build folder
         await self._update_status("Cleaning build folder...")
-        await self._clean_build(project_path)
+        await self._clean_build(project_path, profile)
 
         # Build with intelligent retry
         start_time = datetime.now()
+        xcodebuild_time = 0.0
 
         for attempt in range(self.max_retry_attempts):
             await self._update_status(f"Building app (attempt {attempt + 1}/{self.max_retry_attempts})...")
 
-            success, output, errors = await self._run_xcodebuild(project_path)
-
-            # Save build log
-            with open(build_log_path, 'a') as f:
-                f.write(f"\n\n=== BUILD ATTEMPT {attempt + 1} ===\n")
-                f.write(output)
-                if errors:
-                    f.write("\n\nERRORS:\n")
-                    f.write("\n".join(errors))
+            attempt_start = datetime.now()
+            with tracing.span("xcodebuild", project_id=project_id, attempt=attempt + 1) as attempt_span, \
+                    metrics.XCODEBUILD_ATTEMPT_SECONDS.time(attempt=attempt + 1, profile=profile, outcome="success") as timer:
+                success, output, errors, warnings = await self._run_xcodebuild(project_path, profile)
+                attempt_span.set_attributes(success=success, error_count=len(errors), build_profile=profile)
+                if not success:
+                    timer.labels["outcome"] = "failed"
+            xcodebuild_time += (datetime.now() - attempt_start).total_seconds()
+            if attempt > 0 and self.error_recovery_system:
+                self.error_recovery_system.record_build_result(project_path, success)
+
+            # Save build log off the event loop - compression of large logs is not free
+            build_log_path = await asyncio.get_event_loop().run_in_executor(
+                None, self.log_store.write_attempt,
+                project_id, build_id, attempt + 1, output, [e.format() for e in errors], success
+            )
 
             if success:
                 # Build succeeded!
                 build_time = (datetime.now() - start_time).total_seconds()
-                return await self._handle_successful_build(
+                await self._store_in_build_cache(project_path, profile)
+                result = await self._handle_successful_build(
                     project_path, project_id, bundle_id, build_log_path,
-                    build_time, output
+                    build_time, [str(w) for w in warnings]
                 )
+                result.attempts = attempt + 1
+                result.xcodebuild_time = xcodebuild_time
+                return result
             else:
                 # Build failed - attempt intelligent recovery
                 if attempt < self.max_retry_attempts - 1:
                     await self._update_status("Build failed. Analyzing errors and applying AI fixes...")
 
-                    fixed = await self._intelligent_error_recovery(
-                        project_path, project_id, errors, output
-                    )
+                    with tracing.span("recovery", project_id=project_id, attempt=attempt + 1) as recovery_span:
+                        fixed = await self._intelligent_error_recovery(
+                            project_path, project_id, errors, output
+                        )
+                        recovery_span.set_attribute("fixed", bool(fixed))
 
                     if fixed:
                         await self._update_status("Applied AI-generated fixes. Rebuilding...")
@@ -175,10 +275,12 @@ class BuildService:
                     build_time = (datetime.now() - start_time).total_seconds()
                     return BuildResult(
                         success=False,
-                        errors=errors[:5],  # Limit errors shown
-                        warnings=self._parse_warnings(output),
+                        errors=[str(e) for e in errors[:5]],  # Limit errors shown
+                        warnings=[str(w) for w in warnings],
                         build_time=build_time,
-                        log_path=build_log_path
+                        log_path=build_log_path,
+                        attempts=attempt + 1,
+                        xcodebuild_time=xcodebuild_time
                     )
 
         # Should never reach here
@@ -190,8 +292,43 @@ class BuildService:
             log_path=build_log_path
         )
 
+    async def _get_toolchain_version(self) -> str:
+        """Xcode version string, looked up once per process"""
+        if self._toolchain_version is None:
+            try:
+                process = await cassette.create_subprocess_exec(
+                    'xcodebuild', '-version',
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                stdout, _ = await process.communicate()
+                self._toolchain_version = stdout.decode().strip() if process.returncode == 0 else "unknown"
+            except Exception:
+                self._toolchain_version = "unknown"
+        return self._toolchain_version
+
+    async def _fingerprint(self, project_path: str, profile: str) -> Optional[str]:
+        """Build cache fingerprint of a project; hashing the sources runs off the event loop"""
+        toolchain_version = await self._get_toolchain_version()
+        return await asyncio.get_event_loop().run_in_executor(
+            None, self.build_cache.fingerprint, project_path, toolchain_version, {"build_profile": profile}
+        )
+
+    async def _store_in_build_cache(self, project_path: str, profile: str):
+        """Cache the built bundle under the fingerprint of the sources it was built from"""
+        app_path = self._get_app_path(project_path)
+        if not app_path:
+            return
+
+        # Recovery may have rewritten sources, so fingerprint what was actually built
+        fingerprint = await self._fingerprint(project_path, profile)
+        if fingerprint:
+            await asyncio.get_event_loop().run_in_executor(
+                None, self.build_cache.store, fingerprint, app_path
+            )
+
     async def _intelligent_error_recovery(self, project_path: str, project_id: str,
-                                          errors: List[str], build_output: str) -> bool:
+                                          errors: List[Diagnostic], build_output: str) -> bool:
         """Use the robust multi-model error recovery system"""
 
         # First try the new robust system if available
@@ -250,7 +387,7 @@ class BuildService:
         return False
 
     async def _original_claude_recovery(self, project_path: str, project_id: str,
-                                        errors: List[str], build_output: str) -> bool:
+                                        errors: List[Diagnostic], build_output: str) -> bool:
         """Original Claude-based recovery as fallback"""
 
         try:
@@ -301,14 +438,14 @@ class BuildService:
             print(f"Error in Claude recovery: {str(e)}")
             return False
 
-    def _create_error_recovery_prompt(self, errors: List[str], swift_files: List[Dict],
+    def _create_error_recovery_prompt(self, errors: List[Diagnostic], swift_files: List[Dict],
                                       build_output: str) -> str:
         """Create a sophisticated prompt for error recovery"""
 
         # Extract the most relevant part of build output
         relevant_output = self._extract_relevant_build_output(build_output, errors)
 
-        errors_text = '\n'.join(errors)
+        errors_text = diagnostics.format_all(errors)
         code_sections = []
         for f in swift_files:
             code_sections.append(f"File: {f['path']}\n```swift\n{f['content']}\n```")
@@ -316,11 +453,11 @@ class BuildService:
 
         # Analyze common error patterns
         error_hints = []
-        if "cannot find type" in errors_text or "cannot find" in errors_text:
+        if any("cannot find" in e.message for e in errors):
             error_hints.append("Missing imports - ensure all necessary frameworks are imported (SwiftUI, Foundation, etc.)")
-        if "@main" in errors_text:
+        if any("@main" in e.message for e in errors):
             error_hints.append("Main app struct issues - ensure proper App protocol conformance")
-        if "error:" in errors_text and ".swift:" in errors_text:
+        if any(e.file for e in errors):
             error_hints.append("Syntax errors - check for proper Swift syntax")
 
         prompt = f"""You are an expert iOS developer. Fix these Swift compilation errors:
@@ -375,7 +512,7 @@ Return ONLY a JSON object:
 
         return prompt
 
-    def _extract_relevant_build_output(self, build_output: str, errors: List[str]) -> str:
+    def _extract_relevant_build_output(self, build_output: str, errors: List[Diagnostic]) -> str:
         """Extract relevant parts of build output around errors"""
 
         lines = build_output.split('\n')
@@ -384,7 +521,7 @@ Return ONLY a JSON object:
         for error in errors[:3]:  # Focus on first 3 errors
             # Find error in output and get context
             for i, line in enumerate(lines):
-                if error in line:
+                if str(error) in line:
                     # Get 5 lines before and after
                     start = max(0, i - 5)
                     end = min(len(lines), i + 6)
@@ -410,58 +547,43 @@ Return ONLY a JSON object:
 
     async def _handle_successful_build(self, project_path: str, project_id: str,
                                        bundle_id: Optional[str], build_log_path: str,
-                                       build_time: float, output: str) -> BuildResult:
-        """Handle successful build and launch simulator"""
+                                       build_time: float, warnings: List[str]) -> BuildResult:
+        """Handle successful build and start launching the app in the simulator"""
 
-        warnings = self._parse_warnings(output)
         app_path = self._get_app_path(project_path)
+        result = BuildResult(
+            success=True,
+            errors=[],
+            warnings=warnings,
+            build_time=build_time,
+            log_path=build_log_path,
+            app_path=app_path if app_path else None,
+            simulator_launched=False
+        )
 
-        if app_path and self.simulator_service:
-            await self._update_status("Build successful! Preparing simulator...")
-
+        if app_path and self.launcher:
             if not bundle_id:
                 bundle_id = self._get_bundle_id_from_project(project_path)
 
             if bundle_id:
-                await self._update_status("Booting simulator...")
-                simulator_ready, _, sim_message = await self.simulator_service.ensure_simulator_booted()
-
-                if simulator_ready:
-                    await self._update_status("Installing and launching app...")
-                    launch_success, launch_message = await self.simulator_service.install_and_launch_app(
-                        app_path,
-                        bundle_id,
-                        self._update_status
-                    )
-
-                    if launch_success:
-                        await self._update_status("✅ App launched successfully in simulator!")
-                        return BuildResult(
-                            success=True,
-                            errors=[],
-                            warnings=warnings,
-                            build_time=build_time,
-                            log_path=build_log_path,
-                            app_path=app_path,
-                            simulator_launched=True,
-                            simulator_message=launch_message
-                        )
-                    else:
-                        warnings.append(f"Failed to launch app: {launch_message}")
+                launch = self.launcher.start(project_id, app_path, bundle_id)
+                if self.background_launch:
+                    # The client follows the launch over the WebSocket or GET /api/project/{id}/launch
+                    await self._update_status("Build successful! Launching in the simulator...")
+                    result.launch_status = launch["status"]
+                    return result
+
+                launch = await self.launcher.wait(project_id)
+                result.launch_status = launch["status"]
+                if launch["status"] == "launched":
+                    result.simulator_launched = True
+                    result.simulator_message = launch["message"]
                 else:
-                    warnings.append(f"Failed to boot simulator: {sim_message}")
+                    warnings.append(launch["message"])
             else:
                 warnings.append("Could not determine bundle ID for app launch")
 
-        return BuildResult(
-            success=True,
-            errors=[],
-            warnings=warnings,
-            build_time=build_time,
-            log_path=build_log_path,
-            app_path=app_path if app_path else None,
-            simulator_launched=False
-        )
+        return result
 
     # Keep all the existing helper methods from the original build_service.py
     def _get_bundle_id_from_project(self, project_path: str) -> Optional[str]:
@@ -496,7 +618,7 @@ Return ONLY a JSON object:
     async def _run_xcodegen(self, project_path: str) -> Tuple[bool, str]:
         """Run xcodegen to create Xcode project"""
         try:
-            check_process = await asyncio.create_subprocess_exec(
+            check_process = await cassette.create_subprocess_exec(
                 'which', 'xcodegen',
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
@@ -506,7 +628,7 @@ Return ONLY a JSON object:
             if check_process.returncode != 0:
                 return False, "xcodegen not found. Please install it: brew install xcodegen"
 
-            process = await asyncio.create_subprocess_exec(
+            process = await cassette.create_subprocess_exec(
                 'xcodegen', 'generate',
                 cwd=project_path,
                 stdout=asyncio.subprocess.PIPE,
@@ -528,41 +650,25 @@ Return ONLY a JSON object:
         except Exception as e:
             return False, f"xcodegen error: {str(e)}"
 
-    async def _clean_build(self, project_path: str):
-        """Clean build artifacts"""
+    async def _clean_build(self, project_path: str, profile: str):
+        """Clean build artifacts, starting again from the warm template's DerivedData when there is one"""
         derived_data_path = os.path.join(project_path, "DerivedData")
+        if template_warmer.warmer.is_fresh_seed(derived_data_path):
+            return
+        # Removing a large DerivedData takes a while, so it runs in the executor along with the seeding
+        await asyncio.get_event_loop().run_in_executor(None, self._reset_derived_data, derived_data_path, profile)
+
+    def _reset_derived_data(self, derived_data_path: str, profile: str):
         if os.path.exists(derived_data_path):
             subprocess.run(['rm', '-rf', derived_data_path])
+        template_warmer.warmer.seed(derived_data_path, profile)
 
-    async def _get_available_simulators(self) -> List[str]:
-        """Get list of available iOS simulators"""
-        try:
-            cmd = ['xcrun', 'simctl', 'list', 'devices', 'available', '-j']
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-
-            if process.returncode == 0:
-                devices_data = json.loads(stdout.decode())
-                simulators = []
+    async def _run_xcodebuild(self, project_path: str,
+                              profile: str) -> Tuple[bool, str, List[Diagnostic], List[Diagnostic]]:
+        """Execute xcodebuild once against the resolved destination, reading diagnostics from a result bundle.
 
-                for runtime, devices in devices_data.get('devices', {}).items():
-                    if 'iOS' in runtime:
-                        for device in devices:
-                            if device.get('isAvailable', False):
-                                simulators.append(device['name'])
-
-                return simulators
-        except:
-            pass
-
-        return []
-
-    async def _run_xcodebuild(self, project_path: str) -> Tuple[bool, str, List[str]]:
-        """Execute xcodebuild command with VERBOSE output to diagnose issues"""
+        Returns success, the text output, errors and warnings.
+        """
 
         xcodeproj = None
         print(f"Looking for .xcodeproj in: {project_path}")
@@ -574,202 +680,179 @@ Return ONLY a JSON object:
                 break
 
         if not xcodeproj:
-            return False, "", ["No .xcodeproj file found. xcodegen may have failed."]
-
-        scheme_name = xcodeproj.replace('.xcodeproj', '')
-        xcodeproj_path = os.path.join(project_path, xcodeproj)
-        derived_data_path = os.path.join(project_path, 'DerivedData')
-
-        # Get available simulators
-        available_simulators = await self._get_available_simulators()
-        print(f"Available simulators: {available_simulators}")
-
-        # Build command with VERBOSE output
-        destinations_to_try = []
-
-        for sim_name in ["iPhone 16 Pro", "iPhone 16", "iPhone 15", "iPhone 14"]:
-            if sim_name in available_simulators:
-                destinations_to_try.append(f"platform=iOS Simulator,name={sim_name}")
-                break
-
-        destinations_to_try.append("generic/platform=iOS Simulator")
-
-        for destination in destinations_to_try:
-            # CRITICAL: Add -verbose flag and ensure we're building the right target
-            cmd = [
-                'xcodebuild',
-                '-project', xcodeproj_path,
-                '-scheme', scheme_name,
-                '-configuration', 'Debug',
-                '-derivedDataPath', derived_data_path,
-                '-destination', destination,
-                '-sdk', 'iphonesimulator',
-                'CODE_SIGN_IDENTITY=',
-                'CODE_SIGNING_REQUIRED=NO',
-                'CODE_SIGNING_ALLOWED=NO',
-                'ONLY_ACTIVE_ARCH=NO',  # Build for all architectures
-                'VALID_ARCHS=x86_64 arm64',  # Ensure we build for simulator architectures
-                '-verbose',  # Add verbose output
-                'build'
-            ]
-
-            print(f"Trying build with destination: {destination}")
-            print(f"Build command: {' '.join(cmd)}")
-
-            try:
-                env = os.environ.copy()
-                env['PLATFORM_NAME'] = 'iphonesimulator'
-
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    env=env
-                )
-
-                stdout, stderr = await process.communicate()
-
-                output = stdout.decode()
-                stderr_output = stderr.decode()
-
-                # Check if any Swift files were compiled
-                if "CompileSwift" in output:
-                    print("✓ Swift files were compiled")
-                else:
-                    print("⚠️ WARNING: No Swift compilation detected in build output")
-
-                # Check for linker output
-                if "Ld " in output or "Link " in output:
-                    print("✓ Linker was invoked")
-                else:
-                    print("⚠️ WARNING: No linking detected in build output")
-
-                if process.returncode == 0:
-                    print(f"Build succeeded with destination: {destination}")
-
-                    # Verify the app bundle was created correctly
-                    app_path = self._get_app_path(project_path)
-                    if app_path:
-                        print(f"App bundle found at: {app_path}")
-
-                        # Check contents
-                        app_contents = os.listdir(app_path)
-                        print(f"App bundle contents: {app_contents}")
+            return False, "", [diagnostics.generic("No .xcodeproj file found. xcodegen may have failed.")], []
 
-                        # Look for executable
-                        app_name = os.path.basename(app_path).replace('.app', '')
-                        exec_path = os.path.join(app_path, app_name)
-                        if os.path.exists(exec_path):
-                            print(f"✓ Executable found: {exec_path}")
-                        else:
-                            print(f"✗ CRITICAL: Executable NOT found at expected path: {exec_path}")
+        destination = await self.resolve_destination()
+        success, output, errors, warnings = await self._xcodebuild(project_path, xcodeproj, profile, destination)
 
-                            # Try to find any executable
-                            for item in app_contents:
-                                item_path = os.path.join(app_path, item)
-                                if os.path.isfile(item_path) and os.access(item_path, os.X_OK):
-                                    print(f"  Found executable: {item}")
+        if not success and self._is_destination_error(errors):
+            # The cached destination went stale (simulator deleted, runtime removed) - resolve again and retry once
+            replacement = await self.resolve_destination(failed=destination)
+            if replacement != destination:
+                print(f"Destination {destination} failed, retrying with {replacement}")
+                destination = replacement
+                success, output, errors, warnings = await self._xcodebuild(project_path, xcodeproj, profile, destination)
 
-                    return True, output, []
+        if success:
+            self.destination_resolver.mark_verified(destination)
+        tracing.set_attributes(destination=destination)
+        return success, output, errors, warnings
 
-                # Parse errors
-                errors = self._parse_errors(stderr_output + output)
+    async def resolve_destination(self, failed: Optional[str] = None) -> str:
+        """Cached -destination for this host and toolchain; pass one a build just failed on to replace it"""
+        return await self.destination_resolver.resolve(await self._get_toolchain_version(), failed=failed)
 
-                # If it's actual compilation errors (not destination issues), return them
-                if errors and not any("destination" in e.lower() for e in errors):
-                    return False, output, errors
+    def _is_destination_error(self, errors: List[Diagnostic]) -> bool:
+        return any(not e.file and "destination" in e.message.lower() for e in errors)
 
-                print(f"Destination {destination} failed, trying next...")
-
-            except Exception as e:
-                print(f"Error with destination {destination}: {str(e)}")
-                continue
-
-        # Try minimal build as last resort with more specific settings
-        print("Trying minimal build with explicit settings...")
+    async def _xcodebuild(self, project_path: str, xcodeproj: str, profile: str,
+                          destination: str) -> Tuple[bool, str, List[Diagnostic], List[Diagnostic]]:
+        scheme_name = xcodeproj.replace('.xcodeproj', '')
+        xcodeproj_path = os.path.join(project_path, xcodeproj)
+        derived_data_path = os.path.join(project_path, 'DerivedData')
 
+        output_args, bundle_path = self._diagnostics_args(derived_data_path)
         cmd = [
             'xcodebuild',
             '-project', xcodeproj_path,
             '-scheme', scheme_name,
-            '-sdk', 'iphonesimulator',
             '-configuration', 'Debug',
             '-derivedDataPath', derived_data_path,
-            'ONLY_ACTIVE_ARCH=NO',
-            'VALID_ARCHS=x86_64 arm64',
+            '-destination', destination,
+            '-sdk', 'iphonesimulator',
             'CODE_SIGN_IDENTITY=',
             'CODE_SIGNING_REQUIRED=NO',
-            'EXCLUDED_ARCHS=',  # Don't exclude any architectures
-            '-verbose',
-            'clean',  # Clean first
-            'build'   # Then build
+            'CODE_SIGNING_ALLOWED=NO',
+            *build_profiles.xcodebuild_args(profile),  # Architectures, indexing, testability
+            *self._shared_cache_args(),
+            *output_args,
+            'build'
         ]
 
+        print(f"Building with destination: {destination}")
+        print(f"Build command: {' '.join(cmd)}")
+
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            env = os.environ.copy()
+            env['PLATFORM_NAME'] = 'iphonesimulator'
 
-            stdout, stderr = await process.communicate()
+            returncode, stdout, stderr = await self._exec_xcodebuild(cmd, env=env)
+
+            output = stdout.decode()
+            stderr_output = stderr.decode()
 
-            if process.returncode == 0:
-                print("Minimal build succeeded!")
-                return True, stdout.decode(), []
+            # Check if any Swift files were compiled
+            if "CompileSwift" in output:
+                print("✓ Swift files were compiled")
             else:
-                errors = self._parse_errors(stderr.decode() + stdout.decode())
+                print("⚠️ WARNING: No Swift compilation detected in build output")
 
-                # If no specific errors found, add a generic one
-                if not errors:
-                    errors = ["Build failed but no specific errors were captured. Check build output."]
+            # Check for linker output
+            if "Ld " in output or "Link " in output:
+                print("✓ Linker was invoked")
+            else:
+                print("⚠️ WARNING: No linking detected in build output")
 
-                return False, stdout.decode(), errors
+            if returncode == 0:
+                print(f"Build succeeded with destination: {destination}")
 
-        except Exception as e:
-            return False, "", [f"Build failed: {str(e)}"]
+                # Verify the app bundle was created correctly
+                app_path = self._get_app_path(project_path)
+                if app_path:
+                    print(f"App bundle found at: {app_path}")
 
-    def _parse_errors(self, text: str) -> List[str]:
-        """Parse error messages from build output"""
-        errors = []
-        lines = text.split('\n')
+                    # Check contents
+                    app_contents = os.listdir(app_path)
+                    print(f"App bundle contents: {app_contents}")
 
-        for i, line in enumerate(lines):
-            line = line.strip()
+                    # Look for executable
+                    app_name = os.path.basename(app_path).replace('.app', '')
+                    exec_path = os.path.join(app_path, app_name)
+                    if os.path.exists(exec_path):
+                        print(f"✓ Executable found: {exec_path}")
+                    else:
+                        print(f"✗ CRITICAL: Executable NOT found at expected path: {exec_path}")
 
-            # Look for Swift compilation errors specifically
-            if ('error:' in line and '.swift' in line) or \
-                    ('** BUILD FAILED **' in line) or \
-                    ('fatal error:' in line):
+                        # Try to find any executable
+                        for item in app_contents:
+                            item_path = os.path.join(app_path, item)
+                            if os.path.isfile(item_path) and os.access(item_path, os.X_OK):
+                                print(f"  Found executable: {item}")
 
-                # Don't duplicate BUILD FAILED
-                if '** BUILD FAILED **' in line and errors:
-                    continue
+                _, warnings = await self._read_diagnostics(bundle_path, output, failed=False)
+                return True, output, [], warnings
 
-                # For Swift errors, try to get the full error message
-                if '.swift:' in line and 'error:' in line:
-                    # This is a Swift compilation error
-                    error_msg = line
+            errors, warnings = await self._read_diagnostics(bundle_path, stderr_output + output, failed=True)
 
-                    # Sometimes error details are on next lines
-                    if i + 1 < len(lines) and lines[i + 1].strip():
-                        next_line = lines[i + 1].strip()
-                        if not any(keyword in next_line for keyword in ['error:', 'warning:', '.swift:']):
-                            error_msg += f" {next_line}"
+            # If no specific errors found, add a generic one
+            if not errors:
+                errors = [diagnostics.generic("Build failed but no specific errors were captured. Check build output.")]
 
-                    errors.append(error_msg)
-                else:
-                    errors.append(line)
+            return False, output, errors, warnings
 
-        return errors[:10]
+        except Exception as e:
+            return False, "", [diagnostics.generic(f"Build failed: {str(e)}")], []
+
+    def _shared_cache_args(self) -> List[str]:
+        return self.shared_caches.xcodebuild_args() if self.shared_caches else []
 
-    def _parse_warnings(self, output: str) -> List[str]:
-        """Parse warning messages from build output"""
-        warnings = []
-        for line in output.split('\n'):
-            if 'warning:' in line.lower() and '.swift' in line:
-                warnings.append(line.strip())
-        return warnings[:10]
+    async def _exec_xcodebuild(self, cmd: List[str], env: Optional[Dict] = None) -> Tuple[int, bytes, bytes]:
+        """Run xcodebuild to completion, holding the shared caches so they are not evicted meanwhile"""
+        async def run():
+            process = await cassette.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env
+            )
+            stdout, stderr = await process.communicate()
+            return process.returncode, stdout, stderr
+
+        if self.shared_caches is None:
+            return await run()
+        async with self.shared_caches.in_use():
+            return await run()
+
+    def _diagnostics_args(self, derived_data_path: str) -> Tuple[List[str], Optional[str]]:
+        """xcodebuild arguments for diagnostics output, and the result bundle path if one is used"""
+        if not self.use_result_bundle:
+            return ['-verbose'], None
+        bundle_path = os.path.join(derived_data_path, "ResultBundles", "build.xcresult")
+        # xcodebuild refuses to overwrite an existing bundle
+        shutil.rmtree(bundle_path, ignore_errors=True)
+        os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+        return ['-resultBundlePath', bundle_path], bundle_path
+
+    async def _read_diagnostics(self, bundle_path: Optional[str], text: str,
+                                failed: bool) -> Tuple[List[Diagnostic], List[Diagnostic]]:
+        """Errors and warnings from the result bundle when it was read, otherwise scraped from the text output.
+
+        Compile timings from the bundle are attached to the current xcodebuild span.
+        """
+        scraped = self._parse_errors(text) if failed else []
+        if not bundle_path:
+            return scraped, self._parse_warnings(text)
+
+        results = await result_bundle.read(bundle_path)
+        if results is None:
+            print("[RESULT BUNDLE] Not readable, using text output")
+            return scraped, self._parse_warnings(text)
+        if results.compile_seconds:
+            tracing.set_attributes(compile_seconds=results.compile_seconds)
+            slowest = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in results.slowest_files())
+            print(f"[RESULT BUNDLE] Slowest compiles: {slowest}")
+        # Without -verbose the text output has no warnings, so the bundle's are the only ones
+        if failed and results.errors:
+            return result_bundle.with_text_details(results.errors, scraped), results.warnings
+        return scraped, results.warnings
+
+    def _parse_errors(self, text: str) -> List[Diagnostic]:
+        """Parse error diagnostics from build output"""
+        return diagnostics.parse(text)
+
+    def _parse_warnings(self, output: str) -> List[Diagnostic]:
+        """Parse warning diagnostics from build output"""
+        return diagnostics.parse(output, severity="warning")
 
     def _get_app_path(self, project_path: str) -> Optional[str]:
         """Get path to built .app bundle"""
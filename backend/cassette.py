@@ -0,0 +1,293 @@
+"""
+Record/replay cassettes for LLM HTTP calls and toolchain subprocesses.
+
+SWIFTGEN_CASSETTE_MODE     off (default), record or replay
+SWIFTGEN_CASSETTE_PATH     JSON-lines cassette file (default workspaces/cassettes/session.jsonl)
+SWIFTGEN_CASSETTE_LATENCY  original (sleep as long as the recorded call took) or zero
+
+HTTP calls are intercepted with an httpx transport and subprocesses with a drop-in
+for asyncio.create_subprocess_exec. Interactions are matched by a normalized key
+(HTTP method and path, or argv with project paths collapsed) and served back in
+recorded order per key, so a replay follows the same sequence as the session.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import settings
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Build output written into these directories is not needed to replay a session
+SKIPPED_OUTPUT_DIRS = {"Intermediates.noindex", "ModuleCache.noindex", "Index.noindex", "Logs",
+                       "SourcePackages", ".snapshots"}
+MAX_RECORDED_PATHS = 500
+PROJECT_PATH_PATTERN = re.compile(r'^.*?/proj_[0-9a-f]{8}')
+
+
+class CassetteMiss(RuntimeError):
+    """Replay reached an interaction the cassette does not contain"""
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "off", latency: str = "original"):
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._queues: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[str, Dict] = {}
+
+        if self.mode == "record":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            print(f"[CASSETTE] Recording to {self.path}")
+        elif self.mode == "replay":
+            self._load()
+            print(f"[CASSETTE] Replaying {sum(len(q) for q in self._queues.values())} interactions "
+                  f"from {self.path} ({self.latency} latency)")
+
+    @property
+    def active(self) -> bool:
+        return self.mode in ("record", "replay")
+
+    def http_transport(self):
+        """Transport for httpx.AsyncClient(transport=...); None leaves httpx's default in place"""
+        if not self.active or httpx is None:
+            return None
+        return CassetteTransport(self)
+
+    async def create_subprocess_exec(self, *cmd, **kwargs):
+        """Drop-in for asyncio.create_subprocess_exec used with communicate()"""
+        if self.mode == "replay":
+            return ReplayedProcess(self, list(cmd), kwargs.get("cwd"))
+        if self.mode != "record":
+            return await asyncio.create_subprocess_exec(*cmd, **kwargs)
+
+        # List the output directory before starting so nothing the process writes is missed
+        output_dir = _output_dir(list(cmd), kwargs.get("cwd"))
+        before = _list_paths(output_dir)
+        process = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+        return RecordingProcess(self, process, list(cmd), output_dir, before)
+
+    def record(self, kind: str, key: str, request: Dict, response: Dict, elapsed: float):
+        entry = {
+            "kind": kind,
+            "key": key,
+            "request": request,
+            "response": response,
+            "elapsed": round(elapsed, 4),
+            "recorded_at": datetime.now().isoformat()
+        }
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
+
+    async def next_response(self, key: str) -> Dict:
+        """Next recorded interaction for a key; repeats the last one once a key runs dry"""
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._last[key] = entry
+            elif key in self._last:
+                entry = self._last[key]
+            else:
+                print(f"[CASSETTE] No recorded interaction for {key}")
+                raise CassetteMiss(f"No recorded interaction for {key}")
+
+        if self.latency == "original" and entry["elapsed"] > 0:
+            await asyncio.sleep(entry["elapsed"])
+        return entry
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        with open(self.path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._queues[entry["key"]].append(entry)
+
+
+def _http_key(method: str, path: str) -> str:
+    return f"http {method} {path}"
+
+
+def _subprocess_key(cmd: List[str]) -> str:
+    # Project IDs differ between sessions, so collapse anything under a project directory;
+    # the workspaces directory (shared build caches) differs between machines and benchmark runs
+    return "exec " + " ".join(
+        PROJECT_PATH_PATTERN.sub("<project>", str(arg)).replace(_workspaces_dir, "<workspaces>") for arg in cmd
+    )
+
+
+def _output_dir(cmd: List[str], cwd: Optional[str]) -> Optional[str]:
+    """Directory whose new files a command is expected to produce (xcodegen's cwd, xcodebuild's project)"""
+    if "-derivedDataPath" in cmd:
+        index = cmd.index("-derivedDataPath")
+        if index + 1 < len(cmd):
+            return os.path.dirname(os.path.abspath(cmd[index + 1]))
+    return cwd
+
+
+def _list_paths(root: Optional[str]) -> Dict[str, str]:
+    """Relative path -> 'dir', 'file' or 'exec' for everything under root worth replaying"""
+    paths = {}
+    if not root or not os.path.isdir(root):
+        return paths
+    for current, dirs, filenames in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in SKIPPED_OUTPUT_DIRS]
+        for name in dirs:
+            paths[os.path.relpath(os.path.join(current, name), root)] = "dir"
+        for name in filenames:
+            full_path = os.path.join(current, name)
+            paths[os.path.relpath(full_path, root)] = "exec" if os.access(full_path, os.X_OK) else "file"
+    return paths
+
+
+def _recreate_paths(root: Optional[str], created: Dict[str, str]):
+    if not root:
+        return
+    for relative_path, kind in sorted(created.items()):
+        full_path = os.path.join(root, relative_path)
+        if kind == "dir":
+            os.makedirs(full_path, exist_ok=True)
+        elif not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            open(full_path, 'w').close()
+            if kind == "exec":
+                os.chmod(full_path, 0o755)
+
+
+class RecordingProcess:
+    """Wraps a real process and records its output and the files it created"""
+
+    def __init__(self, cassette: Cassette, process, cmd: List[str], output_dir: Optional[str],
+                 before: Dict[str, str]):
+        self._cassette = cassette
+        self._process = process
+        self._cmd = cmd
+        self._output_dir = output_dir
+        self._before = before
+        self._start = time.perf_counter()
+
+    @property
+    def returncode(self):
+        return self._process.returncode
+
+    async def communicate(self, input: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+        stdout, stderr = await self._process.communicate(input)
+        elapsed = time.perf_counter() - self._start
+
+        created = {path: kind for path, kind in _list_paths(self._output_dir).items() if path not in self._before}
+        self._cassette.record("subprocess", _subprocess_key(self._cmd), {"argv": self._cmd}, {
+            "returncode": self._process.returncode,
+            "stdout": (stdout or b"").decode('utf-8', errors='replace'),
+            "stderr": (stderr or b"").decode('utf-8', errors='replace'),
+            "created_paths": dict(list(created.items())[:MAX_RECORDED_PATHS])
+        }, elapsed)
+        return stdout, stderr
+
+    async def wait(self) -> int:
+        return await self._process.wait()
+
+
+class ReplayedProcess:
+    """Serves a recorded process result and recreates the files it produced as placeholders"""
+
+    def __init__(self, cassette: Cassette, cmd: List[str], cwd: Optional[str]):
+        self._cassette = cassette
+        self._cmd = cmd
+        self._output_dir = _output_dir(cmd, cwd)
+        self.returncode: Optional[int] = None
+
+    async def communicate(self, input: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+        entry = await self._cassette.next_response(_subprocess_key(self._cmd))
+        response = entry["response"]
+        _recreate_paths(self._output_dir, response.get("created_paths", {}))
+        self.returncode = response["returncode"]
+        return response["stdout"].encode(), response["stderr"].encode()
+
+    async def wait(self) -> int:
+        if self.returncode is None:
+            await self.communicate()
+        return self.returncode
+
+
+if httpx is not None:
+    class CassetteTransport(httpx.AsyncBaseTransport):
+        """httpx transport that records real responses or serves recorded ones"""
+
+        def __init__(self, cassette: Cassette):
+            self._cassette = cassette
+            self._inner = httpx.AsyncHTTPTransport() if cassette.mode == "record" else None
+
+        async def handle_async_request(self, request):
+            key = _http_key(request.method, request.url.path)
+
+            if self._cassette.mode == "replay":
+                entry = await self._cassette.next_response(key)
+                response = entry["response"]
+                return httpx.Response(
+                    response["status_code"],
+                    headers=response["headers"],
+                    content=response["body"].encode(),
+                    request=request
+                )
+
+            start = time.perf_counter()
+            response = await self._inner.handle_async_request(request)
+            body = await response.aread()
+            elapsed = time.perf_counter() - start
+
+            # The body is kept decoded, so drop headers describing the wire encoding
+            headers = {k: v for k, v in response.headers.items()
+                       if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+
+            try:
+                request_body = json.loads(request.content or b"{}")
+            except ValueError:
+                request_body = (request.content or b"").decode('utf-8', errors='replace')
+            self._cassette.record("http", key, {
+                "method": request.method,
+                "url": str(request.url.copy_with(query=None)),
+                "body": request_body
+            }, {
+                "status_code": response.status_code,
+                "headers": headers,
+                "body": body.decode('utf-8', errors='replace')
+            }, elapsed)
+
+            return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+        async def aclose(self):
+            if self._inner is not None:
+                await self._inner.aclose()
+
+
+_workspaces_dir = settings.workspaces_dir()
+active_cassette = Cassette(
+    os.getenv("SWIFTGEN_CASSETTE_PATH", os.path.join(_workspaces_dir, "cassettes", "session.jsonl")),
+    mode=os.getenv("SWIFTGEN_CASSETTE_MODE", "off").lower(),
+    latency=os.getenv("SWIFTGEN_CASSETTE_LATENCY", "original").lower()
+)
+
+
+def http_transport():
+    """httpx transport for the active cassette, or None when recording is off"""
+    return active_cassette.http_transport()
+
+
+async def create_subprocess_exec(*cmd, **kwargs):
+    """asyncio.create_subprocess_exec routed through the active cassette"""
+    return await active_cassette.create_subprocess_exec(*cmd, **kwargs)
@@ -0,0 +1,180 @@
+"""
+Circuit breakers and health scores for LLM providers.
+
+One breaker per provider ("anthropic", "openai", "xai"), shared by generation,
+modification and error recovery because every provider call goes through
+rate_limiter.send (or checks the breaker directly for the OpenAI SDK).
+
+closed     calls flow; failures and timeouts are tracked over a sliding window
+open       calls fail fast with CircuitOpenError until the cool-down passes
+half_open  a single probe call is let through; success closes the breaker,
+           failure re-opens it with a doubled cool-down
+"""
+
+import os
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Names the multi-LLM service uses for providers
+LLM_PROVIDERS = {"claude": "anthropic", "gpt4": "openai", "xai": "xai"}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open"""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} circuit is open (retry in {retry_in:.0f}s)")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, provider: str, window_size: int = 20, min_calls: int = 5,
+                 failure_rate_threshold: float = 0.5, consecutive_failure_threshold: int = 3,
+                 open_seconds: float = 30, max_open_seconds: float = 600):
+        self.provider = provider
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.consecutive_failure_threshold = consecutive_failure_threshold
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+
+        self.state = CLOSED
+        self.open_seconds = open_seconds
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.consecutive_failures = 0
+        # (succeeded, outcome, latency seconds) of recent calls
+        self.window: deque = deque(maxlen=window_size)
+        self.transitions = 0
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def is_available(self) -> bool:
+        """Whether a call would be let through right now (does not reserve the probe)"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self.retry_in() <= 0
+        return not self.probe_in_flight
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError; moves open -> half_open once the cool-down passes"""
+        if self.state == OPEN and self.retry_in() <= 0:
+            self._transition(HALF_OPEN)
+        if self.state == OPEN:
+            raise CircuitOpenError(self.provider, self.retry_in())
+        if self.state == HALF_OPEN:
+            if self.probe_in_flight:
+                raise CircuitOpenError(self.provider, 0)
+            self.probe_in_flight = True
+
+    def record_success(self, latency: float):
+        if self.state == HALF_OPEN:
+            # Start the closed state with a clean window so old failures cannot re-open it
+            self.probe_in_flight = False
+            self.open_seconds = self.base_open_seconds
+            self.window.clear()
+            self._transition(CLOSED)
+        self.window.append((True, "success", latency))
+        self.consecutive_failures = 0
+
+    def record_failure(self, outcome: str, latency: float):
+        """outcome is e.g. 'timeout', 'http_500', 'http_429', 'error'"""
+        self.window.append((False, outcome, latency))
+        self.consecutive_failures += 1
+
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+            self.open_seconds = min(self.max_open_seconds, self.open_seconds * 2)
+            self._open()
+            return
+
+        failures = sum(1 for succeeded, _, _ in self.window if not succeeded)
+        failure_rate = failures / len(self.window)
+        if self.state == CLOSED and (
+            self.consecutive_failures >= self.consecutive_failure_threshold
+            or (len(self.window) >= self.min_calls and failure_rate >= self.failure_rate_threshold)
+        ):
+            self._open()
+
+    def release_probe(self):
+        """The admitted call ended without a verdict on provider health (e.g. a 400)"""
+        self.probe_in_flight = False
+
+    def health_score(self) -> float:
+        """0..1 - success rate over the window, discounted by mean latency; 0 while open"""
+        if self.state == OPEN and self.retry_in() > 0:
+            return 0.0
+        if not self.window:
+            return 1.0
+        success_rate = sum(1 for succeeded, _, _ in self.window if succeeded) / len(self.window)
+        mean_latency = sum(latency for _, _, latency in self.window) / len(self.window)
+        # A provider averaging 60s scores half of an equally reliable instant one
+        return round(success_rate / (1 + mean_latency / 60), 3)
+
+    def latency_percentile(self, pct: float, min_samples: int = 5) -> Optional[float]:
+        """Nearest-rank latency percentile of recent successful calls, None until there are enough"""
+        latencies = sorted(latency for succeeded, _, latency in self.window if succeeded)
+        if len(latencies) < min_samples:
+            return None
+        rank = max(1, math.ceil(pct / 100 * len(latencies)))
+        return latencies[rank - 1]
+
+    def get_stats(self) -> Dict:
+        outcomes: Dict[str, int] = {}
+        for _, outcome, _ in self.window:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        p90 = self.latency_percentile(90)
+        return {
+            "state": self.state,
+            "health_score": self.health_score(),
+            "retry_in": round(self.retry_in(), 1) if self.state == OPEN else 0,
+            "consecutive_failures": self.consecutive_failures,
+            "p90_latency": round(p90, 2) if p90 is not None else None,
+            "recent_calls": len(self.window),
+            "recent_outcomes": outcomes,
+            "transitions": self.transitions
+        }
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state != self.state:
+            print(f"[CIRCUIT] {self.provider}: {self.state} -> {state}")
+            self.state = state
+            self.transitions += 1
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(
+            provider,
+            open_seconds=float(os.getenv("SWIFTGEN_CIRCUIT_OPEN_SECONDS", 30)),
+            consecutive_failure_threshold=int(os.getenv("SWIFTGEN_CIRCUIT_FAILURES", 3))
+        )
+    return _breakers[provider]
+
+
+def order_by_health(llms: List[str], preferred: Optional[str] = None) -> List[str]:
+    """Multi-LLM names that are currently callable: preferred first, the rest by health score"""
+    available = [llm for llm in llms if get_breaker(LLM_PROVIDERS.get(llm, llm)).is_available()]
+    available.sort(key=lambda llm: (llm != preferred, -get_breaker(LLM_PROVIDERS.get(llm, llm)).health_score()))
+    return available
+
+
+def get_stats() -> Dict[str, Dict]:
+    return {provider: breaker.get_stats() for provider, breaker in _breakers.items()}
@@ -8,13 +8,21 @@ from datetime import datetime
 import random
 import hashlib
 import re
+import metrics
+import tracing
+import cassette
+import rate_limiter
+import circuit_breaker
+import prompt_cache
+import diagnostics
+from diagnostics import Diagnostic
 
 load_dotenv()
 
 class ClaudeService:
     def __init__(self):
         self.api_key = os.getenv("CLAUDE_API_KEY", "")
-        self.api_url = "https://api.anthropic.com/v1/messages"
+        self.api_url = f"{os.getenv('ANTHROPIC_BASE_URL', 'https://api.anthropic.com')}/v1/messages"
         self.model = "claude-3-opus-20240229"
         self.headers = {
             "x-api-key": self.api_key,
@@ -147,11 +155,15 @@ struct ContentView: View {
 
                         return response
 
+                except circuit_breaker.CircuitOpenError:
+                    # Retrying cannot help until the cool-down passes
+                    raise
                 except Exception as e:
                     last_error = str(e)
                     if attempt < max_retries - 1:
-                        print(f"Attempt {attempt + 1} failed: {str(e)}, retrying...")
-                        await asyncio.sleep(2)
+                        delay = rate_limiter.backoff_delay(attempt)
+                        print(f"Attempt {attempt + 1} failed: {str(e)}, retrying in {delay:.1f}s...")
+                        await asyncio.sleep(delay)
                         continue
 
             raise Exception(f"Failed to generate app after {max_retries} attempts. Last error: {last_error}")
@@ -231,12 +243,15 @@ struct ContentView: View {
         return response
 
     def _create_intelligent_generation_prompt(self, description: str, app_name: Optional[str],
-                                              safe_bundle_id: str) -> str:
-        """Create a prompt that unleashes Claude's creativity with proper string formatting"""
+                                              safe_bundle_id: str) -> List[Dict]:
+        """Create a prompt that unleashes Claude's creativity with proper string formatting.
+
+        The instructions are identical for every app and come first so they form a cached prefix.
+        """
 
         unique_seed = hashlib.md5(f"{datetime.now().isoformat()}{description}{random.random()}".encode()).hexdigest()[:8]
 
-        prompt = f"""Create a UNIQUE SwiftUI iOS app based on this request: "{description}"
+        instructions = """Create a UNIQUE SwiftUI iOS app based on the request at the end of this message.
 
 CRITICAL REQUIREMENTS:
 1. Create EXACTLY what the user asked for - analyze their specific needs
@@ -244,7 +259,7 @@ CRITICAL REQUIREMENTS:
 3. Add creative touches, unique features, and thoughtful UX that sets this app apart
 4. Use modern SwiftUI patterns (iOS 15+) and best practices
 5. Think beyond basic functionality - what would make this app exceptional?
-6. CRITICAL: Use EXACTLY this bundle ID: {safe_bundle_id} - DO NOT use "com.swiftgen.myapp"
+6. CRITICAL: Use EXACTLY the bundle ID given with the request - DO NOT use "com.swiftgen.myapp"
 7. ENSURE all files have actual Swift code content - no empty strings
 
 UNIQUENESS FACTORS TO CONSIDER:
@@ -263,40 +278,47 @@ TECHNICAL REQUIREMENTS:
 - All calculations and state changes must update the UI
 - Every file must have complete, working Swift code
 
-IMPORTANT: Bundle ID must be exactly: {safe_bundle_id}
-DO NOT USE: com.swiftgen.myapp
-
-UNIQUE SEED FOR VARIATION: {unique_seed}
-
 Return ONLY a valid JSON object (no explanatory text):
-{{
+{
     "files": [
-        {{
+        {
             "path": "Sources/App.swift",
             "content": "// Your COMPLETE unique implementation with actual Swift code"
-        }},
-        {{
+        },
+        {
             "path": "Sources/ContentView.swift", 
             "content": "// Your COMPLETE unique implementation with actual Swift code"
-        }}
+        }
         // Add more files as needed for your unique architecture
     ],
     "features": ["List of unique features you implemented"],
-    "bundle_id": "{safe_bundle_id}",
-    "app_name": "{app_name or 'Your chosen app name'}",
+    "bundle_id": "<the bundle ID given with the request>",
+    "app_name": "<the app name given with the request, or your chosen app name>",
     "unique_aspects": "What makes this implementation special and different"
-}}"""
+}"""
 
-        return prompt
+        request = f"""REQUEST: "{description}"
+
+IMPORTANT: Bundle ID must be exactly: {safe_bundle_id}
+DO NOT USE: com.swiftgen.myapp
+App name: {app_name or 'Your chosen app name'}
+
+UNIQUE SEED FOR VARIATION: {unique_seed}"""
+
+        return [prompt_cache.block(instructions, cache=True), prompt_cache.block(request)]
 
     def _create_intelligent_modification_prompt(self, app_name: str, original_description: str,
                                                 modification_request: str, existing_files: List[Dict],
-                                                safe_bundle_id: str) -> str:
-        """Create a prompt for intelligent modifications with proper string formatting"""
+                                                safe_bundle_id: str) -> List[Dict]:
+        """Create a prompt for intelligent modifications with proper string formatting.
+
+        Instructions, then project code, then the request: retries and follow-up requests
+        against unchanged code reuse the cached prefix.
+        """
 
         code_context = "\n\n".join([
             f"File: {file['path']}\n```swift\n{file['content']}\n```"
-            for file in existing_files
+            for file in sorted(existing_files, key=lambda f: f['path'])
         ])
 
         # Analyze the modification request to provide intelligent context
@@ -348,15 +370,7 @@ Ensure:
 4. UI updates after calculation
 """
 
-        prompt = f"""Modify this iOS app based on the request: "{modification_request}"
-
-Current app: {app_name}
-Original purpose: {original_description}
-
-Current code:
-{code_context}
-
-{additional_instructions}
+        instructions = """Modify the iOS app below based on the request at the end of this message.
 
 Make the requested changes and return the COMPLETE modified code.
 
@@ -367,50 +381,78 @@ CRITICAL SYNTAX RULES:
 - Ensure all Button actions actually perform their intended function
 - Every file must have complete, working Swift code
 
-IMPORTANT: Keep the EXACT SAME bundle ID: {safe_bundle_id}
+IMPORTANT: Keep the EXACT SAME bundle ID given with the app.
 NO SPACES IN BUNDLE ID!
 
 Return ONLY a valid JSON object (no explanatory text) with ALL files:
-{{
+{
     "files": [
-        {{
+        {
             "path": "Sources/App.swift",
             "content": "// Complete modified code with PROPER SYNTAX and actual content"
-        }},
-        {{
+        },
+        {
             "path": "Sources/ContentView.swift",
             "content": "// Complete modified code with PROPER SYNTAX and actual content"
-        }}
+        }
     ],
     "features": ["Original features", "NEW: Changes made"],
-    "bundle_id": "{safe_bundle_id}",
-    "app_name": "{app_name}",
+    "bundle_id": "<the app's bundle ID>",
+    "app_name": "<the app's name>",
     "modification_summary": "What was changed"
-}}"""
+}"""
 
-        return prompt
+        project = f"""Current app: {app_name}
+Bundle ID: {safe_bundle_id}
+Original purpose: {original_description}
+
+Current code:
+{code_context}"""
 
-    async def _call_claude_api(self, prompt: str) -> Optional[Dict]:
-        """Make API call to Claude with improved error handling"""
+        request = f"""Modify this iOS app based on the request: "{modification_request}"
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
+{additional_instructions}"""
+
+        return [
+            prompt_cache.block(instructions, cache=True),
+            prompt_cache.block(project, cache=True),
+            prompt_cache.block(request)
+        ]
+
+    async def _call_claude_api(self, prompt: prompt_cache.Prompt) -> Optional[Dict]:
+        """Make API call to Claude with improved error handling; prompt is a string or prompt_cache blocks"""
+
+        async with httpx.AsyncClient(timeout=120.0, transport=cassette.http_transport()) as client:
             try:
-                response = await client.post(
-                    self.api_url,
-                    headers=self.headers,
-                    json={
-                        "model": self.model,
-                        "system": self.system_prompt,
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": prompt
+                with tracing.span("llm.request", provider="anthropic", model=self.model) as llm_span, \
+                        metrics.LLM_REQUEST_SECONDS.time(
+                            metrics.LLM_REQUESTS_TOTAL, provider="anthropic", model=self.model, outcome="success"
+                        ) as timer:
+                    response = await rate_limiter.send(
+                        "anthropic",
+                        lambda: client.post(
+                            self.api_url,
+                            headers=self.headers,
+                            json={
+                                "model": self.model,
+                                "system": prompt_cache.anthropic_system(self.system_prompt),
+                                "messages": [
+                                    {
+                                        "role": "user",
+                                        "content": prompt_cache.anthropic_content(prompt)
+                                    }
+                                ],
+                                "max_tokens": 4096,
+                                "temperature": 0.7
                             }
-                        ],
-                        "max_tokens": 4096,
-                        "temperature": 0.7
-                    }
-                )
+                        ),
+                        rate_limiter.estimate_tokens(self.system_prompt + prompt_cache.to_text(prompt), 4096)
+                    )
+                    llm_span.set_attribute("status_code", response.status_code)
+                    if response.status_code != 200:
+                        timer.labels["outcome"] = f"http_{response.status_code}"
+                    else:
+                        prompt_cache.record_usage("anthropic", response.json())
 
                 if response.status_code == 200:
                     result = response.json()
@@ -422,7 +464,10 @@ Return ONLY a valid JSON object (no explanatory text) with ALL files:
                     print("=== END RESPONSE PREVIEW ===\n")
 
                     # Try to extract JSON
-                    parsed = self._extract_json_from_response(content)
+                    with metrics.JSON_EXTRACTION_SECONDS.time(parser="claude_service", outcome="success") as timer:
+                        parsed = self._extract_json_from_response(content)
+                        if not parsed:
+                            timer.labels["outcome"] = "failed"
 
                     if parsed and "files" in parsed and len(parsed["files"]) > 0:
                         # Log the actual files we're returning
@@ -659,7 +704,8 @@ Return ONLY a valid JSON object (no explanatory text) with ALL files:
             "unique_aspects": "AI-generated implementation"
         }
 
-    async def analyze_build_errors(self, errors: List[str], project_files: List[Dict]) -> Dict:
+    async def analyze_build_errors(self, errors: List[Diagnostic], project_files: List[Dict],
+                                   reference_signatures: str = "") -> Dict:
         """Let Claude analyze and fix build errors - THIS IS THE KEY METHOD"""
 
         if not self.api_key:
@@ -670,13 +716,13 @@ Return ONLY a valid JSON object (no explanatory text) with ALL files:
             }
 
         # Create a comprehensive prompt for Claude to fix the errors
-        error_text = "\n".join(errors)
+        error_text = diagnostics.format_all(errors)
 
         # Include ALL files that have errors
         files_with_errors = []
         for file in project_files:
-            # Check if this file is mentioned in any error
-            if any(file["path"] in error for error in errors):
+            # Check if any error is located in this file
+            if any(error.in_file(file["path"]) for error in errors):
                 files_with_errors.append(file)
 
         # If no specific files found, include all files
@@ -685,16 +731,10 @@ Return ONLY a valid JSON object (no explanatory text) with ALL files:
 
         code_context = "\n\n".join([
             f"File: {file['path']}\n```swift\n{file['content']}\n```"
-            for file in files_with_errors
+            for file in sorted(files_with_errors, key=lambda f: f['path'])
         ])
 
-        prompt = f"""You are an expert Swift developer. Fix these Swift compilation errors.
-
-BUILD ERRORS:
-{error_text}
-
-CURRENT CODE WITH ERRORS:
-{code_context}
+        instructions = """You are an expert Swift developer. Fix the Swift compilation errors listed at the end of this message.
 
 ANALYSIS:
 1. Look at each error carefully
@@ -708,12 +748,12 @@ COMMON FIXES:
 - TextField("text"", ...) → TextField("text", ...)
 
 Return ONLY a JSON object with ALL the files (fixed) and ensure each file has actual content:
-{{
+{
     "files": [
-        {{
+        {
             "path": "Sources/ContentView.swift",
             "content": "// COMPLETE FIXED CODE HERE - not empty!"
-        }}
+        }
         // Include ALL files that need fixes
     ],
     "fixes_applied": [
@@ -721,10 +761,20 @@ Return ONLY a JSON object with ALL the files (fixed) and ensure each file has ac
         "Fixed single quotes to double quotes",
         // List each fix you made
     ]
-}}
+}
 
 IMPORTANT: Return the COMPLETE fixed code for each file, not just snippets. Every file must have actual Swift code content."""
 
+        prompt = [
+            prompt_cache.block(instructions, cache=True),
+            prompt_cache.block(f"CURRENT CODE WITH ERRORS:\n{code_context}", cache=True),
+            prompt_cache.block(
+                "DECLARATIONS FROM OTHER FILES (context only, do not return these files):\n"
+                f"```swift\n{reference_signatures}\n```" if reference_signatures else ""
+            ),
+            prompt_cache.block(f"BUILD ERRORS:\n{error_text}")
+        ]
+
         try:
             print("Sending errors to Claude for intelligent fixing...")
             response = await self._call_claude_api(prompt)
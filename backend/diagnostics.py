@@ -0,0 +1,123 @@
+"""
+Structured compiler diagnostics parsed from xcodebuild output.
+
+parse() reads the output once and returns deduplicated Diagnostic records, with
+the notes and fix-its the compiler printed under each one. Recovery strategies
+and prompt builders use the fields (file, line, message) instead of re-scanning
+raw lines; str() gives back the compiler's own one-line form for logs and the API.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# /path/Sources/ContentView.swift:12:5: error: cannot find 'foo' in scope
+LOCATED = re.compile(
+    r'^(?P<file>\S.*?\.swift):(?P<line>\d+):(?P<column>\d+): '
+    r'(?P<severity>fatal error|error|warning|note): (?P<message>.*)$'
+)
+# xcodebuild: error: Unable to find a destination matching ...
+UNLOCATED = re.compile(r'^(?:[\w.\-]+: )?(?P<severity>fatal error|error): (?P<message>.*)$')
+CARET = re.compile(r'^\s*\^[~^]*\s*$')
+
+
+@dataclass
+class Diagnostic:
+    """One compiler diagnostic; file, line and column are None when the tool gave no location"""
+
+    __slots__ = ("file", "line", "column", "severity", "message", "notes", "fixits")
+
+    file: Optional[str]
+    line: Optional[int]
+    column: Optional[int]
+    severity: str
+    message: str
+    notes: List[str]
+    fixits: List[str]
+
+    def __str__(self) -> str:
+        if self.file is None:
+            return f"{self.severity}: {self.message}"
+        return f"{self.file}:{self.line}:{self.column}: {self.severity}: {self.message}"
+
+    def key(self) -> Tuple:
+        return (self.file, self.line, self.column, self.severity, self.message)
+
+    def in_file(self, path: str) -> bool:
+        """Whether this diagnostic points at a project-relative path like Sources/ContentView.swift"""
+        if self.file is None:
+            return False
+        return (self.file == path or self.file.endswith("/" + path)
+                or os.path.basename(self.file) == os.path.basename(path))
+
+    def format(self) -> str:
+        """The diagnostic with its notes and fix-its, for prompts"""
+        lines = [str(self)]
+        lines += [f"    note: {note}" for note in self.notes]
+        lines += [f"    fix-it: {fixit}" for fixit in self.fixits]
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def generic(message: str) -> Diagnostic:
+    """An unlocated error for failures the compiler output did not explain"""
+    return Diagnostic(None, None, None, "error", message, [], [])
+
+
+def parse(text: str, severity: str = "error", limit: int = 10) -> List[Diagnostic]:
+    """Unique diagnostics of one severity, in output order, with their notes and fix-its"""
+    found: List[Diagnostic] = []
+    seen = set()
+    current: Optional[Diagnostic] = None  # Last diagnostic, kept or not; notes and fix-its attach to it
+    after_caret = False
+
+    for raw_line in text.split('\n'):
+        line = raw_line.rstrip()
+        match = LOCATED.match(line.strip())
+        if match:
+            after_caret = False
+            found_severity = "error" if match["severity"] == "fatal error" else match["severity"]
+            if found_severity == "note":
+                if current is not None:
+                    note = f"{match['message']} ({os.path.basename(match['file'])}:{match['line']})"
+                    if note not in current.notes:
+                        current.notes.append(note)
+                continue
+            current = Diagnostic(match["file"], int(match["line"]), int(match["column"]),
+                                 found_severity, match["message"], [], [])
+        else:
+            match = UNLOCATED.match(line.strip())
+            if match:
+                after_caret = False
+                current = Diagnostic(None, None, None, "error", match["message"], [], [])
+            elif current is not None and CARET.match(line):
+                after_caret = True
+                continue
+            elif current is not None and after_caret and line.strip() and line[:1].isspace():
+                # The line under the caret is the compiler's suggested replacement
+                if line.strip() not in current.fixits:
+                    current.fixits.append(line.strip())
+                after_caret = False
+                continue
+            else:
+                after_caret = False
+                continue
+
+        if current.severity != severity:
+            continue
+        key = current.key()
+        if key in seen:
+            # Same diagnostic reported again (another architecture or compile step); collect its notes there
+            current = next(d for d in found if d.key() == key)
+            continue
+        seen.add(key)
+        found.append(current)
+
+    return found[:limit]
+
+
+def format_all(diagnostics: List[Diagnostic]) -> str:
+    return "\n".join(d.format() for d in diagnostics)
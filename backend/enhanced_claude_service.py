@@ -1,13 +1,22 @@
 import os
 import json
 import httpx
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 import asyncio
+import time
 from datetime import datetime
 import random
 import hashlib
 import re
+import metrics
+import tracing
+import cassette
+import rate_limiter
+import circuit_breaker
+import llm_router
+import prompt_cache
+import settings
 
 # Import the base class
 try:
@@ -32,10 +41,11 @@ class EnhancedClaudeService(BaseLLMService):
         # self.xai_api_key = os.getenv("XAI_API_KEY", "")
         self.xai_api_key = ""  # DISABLED until we get proper endpoint
 
-        self.claude_api_url = "https://api.anthropic.com/v1/messages"
-        self.openai_api_url = "https://api.openai.com/v1/chat/completions"
+        # Base URLs can be overridden to point at a local stand-in (see benchmarks/)
+        self.claude_api_url = f"{os.getenv('ANTHROPIC_BASE_URL', 'https://api.anthropic.com')}/v1/messages"
+        self.openai_api_url = f"{os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')}/chat/completions"
         # The xAI endpoint might need to be updated when they provide the correct one
-        self.xai_api_url = "https://api.x.ai/v1/chat/completions"
+        self.xai_api_url = f"{os.getenv('XAI_BASE_URL', 'https://api.x.ai/v1')}/chat/completions"
 
         # Track which LLMs are available
         self.available_llms = []
@@ -50,6 +60,12 @@ class EnhancedClaudeService(BaseLLMService):
         if os.getenv("XAI_API_KEY"):
             print("Note: xAI is temporarily disabled due to endpoint issues")
 
+        # Hedging: once a call outlives its provider's p90 latency, race the next healthy provider
+        self.hedging_enabled = settings.env_flag("SWIFTGEN_HEDGING")
+        self.hedge_default_delay = float(os.getenv("SWIFTGEN_HEDGE_DELAY_SECONDS", 45))
+        self.hedge_max_rate = float(os.getenv("SWIFTGEN_HEDGE_MAX_RATE", 0.1))
+        self.hedge_stats = {"calls": 0, "hedged": 0, "backup_wins": 0}
+
         # System prompts for each LLM
         self.system_prompts = {
             "claude": self._get_claude_system_prompt(),
@@ -161,13 +177,15 @@ struct ContentView: View {
         # Create safe bundle ID
         safe_bundle_id = self._create_safe_bundle_id(app_name) if app_name else self._create_safe_bundle_id("app")
 
-        # Decide which LLM to use based on request complexity and availability
-        selected_llm = self._select_best_llm_for_task(description)
+        # Rank the healthy LLMs by recorded successes per second; open circuits are skipped outright
+        llms_to_try = llm_router.router.rank(circuit_breaker.order_by_health(self.available_llms), "generate")
+        if not llms_to_try:
+            raise Exception(self._all_circuits_open_message())
 
-        print(f"Selected {selected_llm} for app generation based on request analysis")
+        print(f"Selected {llms_to_try[0]} for app generation based on recorded outcomes")
 
         # For complex apps, we might want to get perspectives from multiple LLMs
-        if self._is_complex_request(description) and len(self.available_llms) > 1:
+        if self._is_complex_request(description) and len(llms_to_try) > 1:
             print("Complex request detected - using multi-LLM approach")
             return await self._generate_with_multiple_llms(description, app_name, safe_bundle_id)
         else:
@@ -175,61 +193,124 @@ struct ContentView: View {
             last_error = None
             tried_llms = []
 
-            # Start with the selected LLM
-            llms_to_try = [selected_llm] + [llm for llm in self.available_llms if llm != selected_llm]
-
-            for llm in llms_to_try:
-                try:
-                    print(f"Attempting to generate with {llm}...")
-                    result = await self._generate_with_single_llm(llm, description, app_name, safe_bundle_id)
-                    if result:
-                        # CRITICAL: Ensure files have content
-                        result = self._ensure_response_has_content(result, safe_bundle_id, app_name or "App")
-
-                        print(f"Successfully generated app using {llm}")
-                        result["generated_by_llm"] = llm  # Track which LLM was used
-                        # CRITICAL: Ensure bundle ID is correct
-                        result["bundle_id"] = safe_bundle_id
-                        return result
-                except Exception as e:
-                    last_error = str(e)
-                    tried_llms.append(llm)
-                    print(f"Failed to generate with {llm}: {str(e)}")
+            while llms_to_try:
+                llm = llms_to_try.pop(0)
+                backup = llms_to_try[0] if llms_to_try and self.hedging_enabled else None
+                print(f"Attempting to generate with {llm}...")
+                winner, result, errors = await self._call_with_hedge(
+                    "generate", llm, backup,
+                    lambda name: self._generate_with_single_llm(name, description, app_name, safe_bundle_id)
+                )
 
-                    # Special handling for 404 errors - likely wrong endpoint
-                    if "404" in str(e):
-                        print(f"Note: {llm} returned 404 - check API endpoint configuration")
+                for failed_llm, error in errors.items():
+                    last_error = error
+                    tried_llms.append(failed_llm)
+                    print(f"Failed to generate with {failed_llm}: {error}")
 
-                    continue
+                    # Special handling for 404 errors - likely wrong endpoint
+                    if "404" in error:
+                        print(f"Note: {failed_llm} returned 404 - check API endpoint configuration")
 
-            # If all LLMs failed, raise an informative error
-            raise Exception(f"All LLMs failed to generate app. Tried: {', '.join(tried_llms)}. Last error: {last_error}")
+                    if failed_llm in llms_to_try:
+                        llms_to_try.remove(failed_llm)
 
-    def _select_best_llm_for_task(self, description: str) -> str:
-        """Select the best LLM based on the task requirements"""
-        desc_lower = description.lower()
+                if winner:
+                    # CRITICAL: Ensure files have content
+                    result = self._ensure_response_has_content(result, safe_bundle_id, app_name or "App")
 
-        # Claude is best for complex SwiftUI and detailed implementations
-        if any(word in desc_lower for word in ["complex", "advanced", "sophisticated", "detailed"]):
-            if "claude" in self.available_llms:
-                return "claude"
+                    print(f"Successfully generated app using {winner}")
+                    result["generated_by_llm"] = winner  # Track which LLM was used
+                    # CRITICAL: Ensure bundle ID is correct
+                    result["bundle_id"] = safe_bundle_id
+                    return result
 
-        # GPT-4 is great for creative and unique approaches
-        if any(word in desc_lower for word in ["creative", "unique", "innovative", "fancy"]):
-            if "gpt4" in self.available_llms:
-                return "gpt4"
+            # If all LLMs failed, raise an informative error
+            raise Exception(f"All LLMs failed to generate app. Tried: {', '.join(tried_llms)}. Last error: {last_error}")
 
-        # xAI for cutting-edge or futuristic requests (currently disabled)
-        # if any(word in desc_lower for word in ["modern", "cutting-edge", "futuristic", "ai", "ml"]):
-        #     if "xai" in self.available_llms:
-        #         return "xai"
+    def _all_circuits_open_message(self) -> str:
+        retry_in = min(circuit_breaker.get_breaker(circuit_breaker.LLM_PROVIDERS[llm]).retry_in()
+                       for llm in self.available_llms)
+        return (f"All LLM providers are currently unavailable (circuit open for "
+                f"{', '.join(self.available_llms)}). Try again in {retry_in:.0f}s.")
+
+    def _hedge_delay(self, llm: str) -> float:
+        """Seconds to wait on a provider before hedging: its recent p90 latency"""
+        p90 = circuit_breaker.get_breaker(circuit_breaker.LLM_PROVIDERS[llm]).latency_percentile(90)
+        return p90 if p90 is not None else self.hedge_default_delay
+
+    def _hedge_allowed(self, backup: str) -> bool:
+        """Backup must be healthy and hedges must stay under SWIFTGEN_HEDGE_MAX_RATE of calls"""
+        if not circuit_breaker.get_breaker(circuit_breaker.LLM_PROVIDERS[backup]).is_available():
+            return False
+        return self.hedge_stats["hedged"] < self.hedge_max_rate * self.hedge_stats["calls"]
+
+    async def _call_with_hedge(self, task_type: str, llm: str, backup: Optional[str],
+                               call: Callable[[str], Awaitable[Dict]]) -> Tuple[Optional[str], Optional[Dict], Dict[str, str]]:
+        """Run call(llm); if it is still running after the provider's p90, race call(backup) against it.
+
+        Returns (winning llm, result, errors by llm). The first result with files wins and the
+        other call is cancelled; winner is None when every call that was started failed.
+        Every call that finishes is reported to the router.
+        """
+        self.hedge_stats["calls"] += 1
+        tasks = {asyncio.create_task(call(llm)): llm}
+        started = {llm: time.monotonic()}
+        errors: Dict[str, str] = {}
+        delay = self._hedge_delay(llm)
+        hedge_decided = backup is None
+        hedged = False
 
-        # Default to available LLM with preference order
-        for llm in ["claude", "gpt4"]:  # Removed xai from default selection
-            if llm in self.available_llms:
-                return llm
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=None if hedge_decided else delay,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_decided = True
+                    if self._hedge_allowed(backup):
+                        print(f"[HEDGE] {llm} still running after {delay:.1f}s, racing {backup}")
+                        self.hedge_stats["hedged"] += 1
+                        hedged = True
+                        tasks[asyncio.create_task(call(backup))] = backup
+                        started[backup] = time.monotonic()
+                    else:
+                        metrics.LLM_HEDGES_TOTAL.inc(primary=llm, outcome="not_allowed")
+                    continue
 
-        return self.available_llms[0]
+                for task in done:
+                    name = tasks.pop(task)
+                    latency = time.monotonic() - started[name]
+                    try:
+                        result = task.result()
+                    except circuit_breaker.CircuitOpenError as e:
+                        # Never reached the provider, so nothing to learn from
+                        errors[name] = str(e)
+                        continue
+                    except Exception as e:
+                        errors[name] = str(e)
+                        llm_router.router.record_response(name, task_type, latency, parsed=False)
+                        continue
+                    parsed = bool(result and result.get("files"))
+                    llm_router.router.record_response(name, task_type, latency, parsed)
+                    if parsed:
+                        if hedged:
+                            won = "backup_won" if name == backup else "primary_won"
+                            if name == backup:
+                                self.hedge_stats["backup_wins"] += 1
+                            print(f"[HEDGE] {name} answered first")
+                            metrics.LLM_HEDGES_TOTAL.inc(primary=llm, outcome=won)
+                        return name, result, errors
+                    errors[name] = "response contained no files"
+
+            if hedged:
+                metrics.LLM_HEDGES_TOTAL.inc(primary=llm, outcome="both_failed")
+            return None, None, errors
+        finally:
+            # Cancel the losing call; its rate limiter slot and breaker probe are released on cancellation
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
 
     def _is_complex_request(self, description: str) -> bool:
         """Determine if a request is complex enough to warrant multiple LLMs"""
@@ -244,7 +325,7 @@ struct ContentView: View {
         """Generate app using multiple LLMs and combine best aspects"""
 
         tasks = []
-        for llm in self.available_llms[:2]:  # Use top 2 LLMs
+        for llm in circuit_breaker.order_by_health(self.available_llms)[:2]:  # Use top 2 healthy LLMs
             tasks.append((llm, self._generate_with_single_llm(llm, description, app_name, safe_bundle_id)))
 
         # Wait for both results
@@ -289,17 +370,15 @@ struct ContentView: View {
             raise ValueError(f"Unknown LLM: {llm}")
 
     def _create_generation_prompt(self, description: str, app_name: Optional[str],
-                                  safe_bundle_id: str, llm: str) -> str:
-        """Create LLM-specific generation prompt"""
+                                  safe_bundle_id: str, llm: str) -> List[Dict]:
+        """Create LLM-specific generation prompt: per-LLM instructions (cached prefix), then the request"""
 
         unique_seed = hashlib.md5(f"{datetime.now().isoformat()}{description}{random.random()}{llm}".encode()).hexdigest()[:8]
 
         # Use the actual app name, not "MyApp"
         actual_app_name = app_name if app_name else "App"
 
-        base_prompt = f"""Create a UNIQUE SwiftUI iOS app based on this request: "{description}"
-
-App Name: {actual_app_name}
+        instructions = """Create a UNIQUE SwiftUI iOS app based on the request at the end of this message.
 
 UNIQUENESS REQUIREMENT: Even if someone else asks for the same type of app, yours must be completely different in:
 - Visual design and color scheme
@@ -309,45 +388,50 @@ UNIQUENESS REQUIREMENT: Even if someone else asks for the same type of app, your
 - Overall user experience
 
 TECHNICAL REQUIREMENTS:
-- Bundle ID must be EXACTLY: {safe_bundle_id}
+- Bundle ID must be EXACTLY the one given with the request
 - Use modern SwiftUI (iOS 15+)
 - All interactive elements must have working implementations
 - Use proper Swift syntax (double quotes, etc.)
-- IMPORTANT: Use "{actual_app_name}" as the app name, NOT "MyApp"
+- IMPORTANT: Use the app name given with the request, NOT "MyApp"
 - CRITICAL: Only include actual Swift source files (ending in .swift) in the files array
 - Do NOT include asset files (JSON, PDF, images) in the files array
 - ENSURE all files have actual Swift code content - no empty strings
 
-UNIQUE SEED: {unique_seed}
-
 Return ONLY a valid JSON object:
-{{
+{
     "files": [
-        {{
+        {
             "path": "Sources/App.swift",
-            "content": "import SwiftUI\\n\\n@main\\nstruct {actual_app_name.replace(' ', '')}App: App {{ ... // COMPLETE CODE }}"
-        }},
-        {{
+            "content": "import SwiftUI\\n\\n@main\\nstruct <AppNameWithoutSpaces>App: App { ... // COMPLETE CODE }"
+        },
+        {
             "path": "Sources/ContentView.swift",
             "content": "// Your COMPLETE implementation with actual Swift code"
-        }}
+        }
         // Only .swift files, no assets or config files
     ],
     "features": [...],
-    "bundle_id": "{safe_bundle_id}",
-    "app_name": "{actual_app_name}",
+    "bundle_id": "<the bundle ID given with the request>",
+    "app_name": "<the app name given with the request>",
     "unique_aspects": "..."
-}}"""
+}"""
 
-        # Add LLM-specific flavor
+        # Add LLM-specific flavor; it is fixed per LLM, so it stays part of the cached prefix
         if llm == "gpt4":
-            base_prompt += "\n\nFocus on: Creative UI patterns, clean architecture, delightful micro-interactions"
+            instructions += "\n\nFocus on: Creative UI patterns, clean architecture, delightful micro-interactions"
         elif llm == "xai":
-            base_prompt += "\n\nFocus on: Futuristic design, AI-powered features, cutting-edge SwiftUI capabilities"
+            instructions += "\n\nFocus on: Futuristic design, AI-powered features, cutting-edge SwiftUI capabilities"
+
+        request = f"""REQUEST: "{description}"
+
+App Name: {actual_app_name}
+Bundle ID: {safe_bundle_id}
+
+UNIQUE SEED: {unique_seed}"""
 
-        return base_prompt
+        return [prompt_cache.block(instructions, cache=True), prompt_cache.block(request)]
 
-    async def _call_claude(self, prompt: str, safe_bundle_id: str = "") -> Dict:
+    async def _call_claude(self, prompt: prompt_cache.Prompt, safe_bundle_id: str = "") -> Dict:
         """Call Claude API"""
         if not self.claude_api_key:
             raise ValueError("Claude API key not configured")
@@ -358,18 +442,32 @@ Return ONLY a valid JSON object:
             "content-type": "application/json"
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                self.claude_api_url,
-                headers=headers,
-                json={
-                    "model": "claude-3-opus-20240229",
-                    "system": self.system_prompts["claude"],
-                    "messages": [{"role": "user", "content": prompt}],
-                    "max_tokens": 4096,
-                    "temperature": 0.8  # Higher for more creativity
-                }
-            )
+        model = "claude-3-opus-20240229"
+        async with httpx.AsyncClient(timeout=120.0, transport=cassette.http_transport()) as client:
+            with tracing.span("llm.request", provider="anthropic", model=model) as llm_span, \
+                    metrics.LLM_REQUEST_SECONDS.time(
+                        metrics.LLM_REQUESTS_TOTAL, provider="anthropic", model=model, outcome="success"
+                    ) as timer:
+                response = await rate_limiter.send(
+                    "anthropic",
+                    lambda: client.post(
+                        self.claude_api_url,
+                        headers=headers,
+                        json={
+                            "model": model,
+                            "system": prompt_cache.anthropic_system(self.system_prompts["claude"]),
+                            "messages": [{"role": "user", "content": prompt_cache.anthropic_content(prompt)}],
+                            "max_tokens": 4096,
+                            "temperature": 0.8  # Higher for more creativity
+                        }
+                    ),
+                    rate_limiter.estimate_tokens(self.system_prompts["claude"] + prompt_cache.to_text(prompt), 4096)
+                )
+                llm_span.set_attribute("status_code", response.status_code)
+                if response.status_code != 200:
+                    timer.labels["outcome"] = f"http_{response.status_code}"
+                else:
+                    prompt_cache.record_usage("anthropic", response.json())
 
             if response.status_code == 200:
                 result = response.json()
@@ -392,7 +490,7 @@ Return ONLY a valid JSON object:
             else:
                 raise Exception(f"Claude API error: {response.status_code}")
 
-    async def _call_gpt4(self, prompt: str, safe_bundle_id: str = "") -> Dict:
+    async def _call_gpt4(self, prompt: prompt_cache.Prompt, safe_bundle_id: str = "") -> Dict:
         """Call GPT-4 API"""
         if not self.openai_api_key:
             raise ValueError("OpenAI API key not configured")
@@ -402,21 +500,36 @@ Return ONLY a valid JSON object:
             "Content-Type": "application/json"
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                self.openai_api_url,
-                headers=headers,
-                json={
-                    "model": "gpt-4-turbo-preview",
-                    "messages": [
-                        {"role": "system", "content": self.system_prompts["gpt4"]},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.8,
-                    "max_tokens": 4096,
-                    "response_format": {"type": "json_object"}
-                }
-            )
+        model = "gpt-4-turbo-preview"
+        async with httpx.AsyncClient(timeout=120.0, transport=cassette.http_transport()) as client:
+            with tracing.span("llm.request", provider="openai", model=model) as llm_span, \
+                    metrics.LLM_REQUEST_SECONDS.time(
+                        metrics.LLM_REQUESTS_TOTAL, provider="openai", model=model, outcome="success"
+                    ) as timer:
+                response = await rate_limiter.send(
+                    "openai",
+                    lambda: client.post(
+                        self.openai_api_url,
+                        headers=headers,
+                        json={
+                            "model": model,
+                            "messages": [
+                                {"role": "system", "content": self.system_prompts["gpt4"]},
+                                # OpenAI caches identical prompt prefixes automatically
+                                {"role": "user", "content": prompt_cache.to_text(prompt)}
+                            ],
+                            "temperature": 0.8,
+                            "max_tokens": 4096,
+                            "response_format": {"type": "json_object"}
+                        }
+                    ),
+                    rate_limiter.estimate_tokens(self.system_prompts["gpt4"] + prompt_cache.to_text(prompt), 4096)
+                )
+                llm_span.set_attribute("status_code", response.status_code)
+                if response.status_code != 200:
+                    timer.labels["outcome"] = f"http_{response.status_code}"
+                else:
+                    prompt_cache.record_usage("openai", response.json())
 
             if response.status_code == 200:
                 result = response.json()
@@ -434,7 +547,7 @@ Return ONLY a valid JSON object:
             else:
                 raise Exception(f"GPT-4 API error: {response.status_code}")
 
-    async def _call_xai(self, prompt: str, safe_bundle_id: str = "") -> Dict:
+    async def _call_xai(self, prompt: prompt_cache.Prompt, safe_bundle_id: str = "") -> Dict:
         """Call xAI API - CURRENTLY DISABLED"""
         raise ValueError("xAI is temporarily disabled due to endpoint issues")
 
@@ -484,101 +597,84 @@ Return ONLY a valid JSON object:
                                        existing_bundle_id: str) -> Dict:
         """Modify app using the best LLM for the specific modification"""
 
-        # Analyze modification to select best LLM
-        selected_llm = self._select_best_llm_for_modification(modification_request)
+        llms_to_try = llm_router.router.rank(circuit_breaker.order_by_health(self.available_llms), "modify")
+        if not llms_to_try:
+            raise Exception(self._all_circuits_open_message())
 
-        print(f"Selected {selected_llm} for modification: {modification_request[:50]}...")
+        print(f"Selected {llms_to_try[0]} for modification: {modification_request[:50]}...")
 
         # Try selected LLM first, then fall back to others
         last_error = None
         tried_llms = []
 
-        llms_to_try = [selected_llm] + [llm for llm in self.available_llms if llm != selected_llm]
-
-        for llm in llms_to_try:
-            try:
-                print(f"Attempting modification with {llm}...")
-
-                prompt = self._create_modification_prompt(
-                    app_name, original_description, modification_request,
-                    existing_files, existing_bundle_id, llm
+        while llms_to_try:
+            llm = llms_to_try.pop(0)
+            backup = llms_to_try[0] if llms_to_try and self.hedging_enabled else None
+            print(f"Attempting modification with {llm}...")
+            winner, result, errors = await self._call_with_hedge(
+                "modify", llm, backup,
+                lambda name: self._modify_with_single_llm(
+                    name, app_name, original_description, modification_request,
+                    existing_files, existing_bundle_id
                 )
+            )
 
-                # For modifications, we need to call the LLM with the modification prompt
-                if llm == "claude":
-                    result = await self._call_claude(prompt, existing_bundle_id)
-                elif llm == "gpt4":
-                    result = await self._call_gpt4(prompt, existing_bundle_id)
-                else:
-                    continue  # Skip xAI for now
-
-                if result:
-                    # Ensure files have content
-                    result = self._ensure_response_has_content(result, existing_bundle_id, app_name)
+            for failed_llm, error in errors.items():
+                last_error = error
+                tried_llms.append(failed_llm)
+                print(f"Failed to modify with {failed_llm}: {error}")
+                if failed_llm in llms_to_try:
+                    llms_to_try.remove(failed_llm)
 
-                    # Ensure bundle ID consistency
-                    result["bundle_id"] = existing_bundle_id
-                    result["modified_by_llm"] = llm
-                    print(f"Successfully modified app using {llm}")
-                    return result
+            if winner:
+                # Ensure files have content
+                result = self._ensure_response_has_content(result, existing_bundle_id, app_name)
 
-            except Exception as e:
-                last_error = str(e)
-                tried_llms.append(llm)
-                print(f"Failed to modify with {llm}: {str(e)}")
-                continue
+                # Ensure bundle ID consistency
+                result["bundle_id"] = existing_bundle_id
+                result["modified_by_llm"] = winner
+                print(f"Successfully modified app using {winner}")
+                return result
 
         # If all LLMs failed
         raise Exception(f"All LLMs failed to modify app. Tried: {', '.join(tried_llms)}. Last error: {last_error}")
 
-    def _select_best_llm_for_modification(self, modification_request: str) -> str:
-        """Select best LLM based on modification type"""
-        mod_lower = modification_request.lower()
+    async def _modify_with_single_llm(self, llm: str, app_name: str, original_description: str,
+                                      modification_request: str, existing_files: List[Dict],
+                                      existing_bundle_id: str) -> Dict:
+        """Modify app using a specific LLM"""
 
-        # Claude for complex SwiftUI modifications
-        if any(word in mod_lower for word in ["swiftui", "animation", "gesture", "state", "binding"]):
-            if "claude" in self.available_llms:
-                return "claude"
+        prompt = self._create_modification_prompt(
+            app_name, original_description, modification_request,
+            existing_files, existing_bundle_id, llm
+        )
 
-        # GPT-4 for feature additions and refactoring
-        if any(word in mod_lower for word in ["add", "feature", "refactor", "improve", "enhance"]):
-            if "gpt4" in self.available_llms:
-                return "gpt4"
-
-        # xAI for innovative modifications (currently disabled)
-        # if any(word in mod_lower for word in ["ai", "ml", "innovative", "modern", "redesign"]):
-        #     if "xai" in self.available_llms:
-        #         return "xai"
-
-        return self.available_llms[0]
+        if llm == "claude":
+            return await self._call_claude(prompt, existing_bundle_id)
+        elif llm == "gpt4":
+            return await self._call_gpt4(prompt, existing_bundle_id)
+        else:
+            raise ValueError(f"{llm} is not supported for modifications")
 
     def _create_modification_prompt(self, app_name: str, original_description: str,
                                     modification_request: str, existing_files: List[Dict],
-                                    existing_bundle_id: str, llm: str) -> str:
-        """Create LLM-specific modification prompt"""
+                                    existing_bundle_id: str, llm: str) -> List[Dict]:
+        """Create LLM-specific modification prompt: instructions, project code, then the request"""
 
         code_context = "\n\n".join([
             f"File: {file['path']}\n```swift\n{file['content']}\n```"
-            for file in existing_files
+            for file in sorted(existing_files, key=lambda f: f['path'])
         ])
 
         # Intelligent analysis of the modification
         additional_context = self._analyze_modification_request(modification_request)
 
-        return f"""Modify this iOS app: "{modification_request}"
-
-Current app: {app_name} (NOT "MyApp")
-Original purpose: {original_description}
-
-{additional_context}
-
-Current code:
-{code_context}
+        instructions = """Modify the iOS app below as described in the request at the end of this message.
 
 Requirements:
 1. Make the requested changes while maintaining app integrity
-2. Keep bundle ID: {existing_bundle_id}
-3. Keep app name: {app_name} (do NOT change to "MyApp")
+2. Keep the bundle ID given with the app
+3. Keep the app name given with the app (do NOT change to "MyApp")
 4. Ensure all modifications are fully functional
 5. Add creative improvements where appropriate
 6. CRITICAL: Only include actual Swift source files (ending in .swift) in the files array
@@ -586,19 +682,36 @@ Requirements:
 8. ENSURE all files have actual Swift code content - no empty strings
 
 Return ONLY valid JSON with complete modified code:
-{{
+{
     "files": [
-        {{
+        {
             "path": "Sources/filename.swift",
             "content": "// Complete modified Swift code - NOT EMPTY"
-        }}
+        }
         // Only .swift files with actual content
     ],
     "features": ["Original features", "NEW: Changes made"],
-    "bundle_id": "{existing_bundle_id}",
-    "app_name": "{app_name}",
+    "bundle_id": "<the app's bundle ID>",
+    "app_name": "<the app's name>",
     "modification_summary": "What was changed"
-}}"""
+}"""
+
+        project = f"""Current app: {app_name} (NOT "MyApp")
+Bundle ID: {existing_bundle_id}
+Original purpose: {original_description}
+
+Current code:
+{code_context}"""
+
+        request = f"""Modify this iOS app: "{modification_request}"
+
+{additional_context}"""
+
+        return [
+            prompt_cache.block(instructions, cache=True),
+            prompt_cache.block(project, cache=True),
+            prompt_cache.block(request)
+        ]
 
     def _analyze_modification_request(self, modification_request: str) -> str:
         """Analyze modification request to provide intelligent context"""
@@ -0,0 +1,122 @@
+"""
+Outcome-driven routing between LLM providers.
+
+For every provider and task type ("generate", "modify", "recover") the router
+keeps what actually happened: call latency, whether the response parsed into
+files, whether the first build of that output succeeded, and whether a
+recovery attempt produced a fix. Providers are ranked by expected successes
+per second of LLM time; with probability SWIFTGEN_ROUTER_EXPLORATION (default
+0.1) a random provider goes first so the statistics of the others stay fresh.
+
+Statistics persist to <workspaces>/llm_router.json across restarts.
+"""
+
+import os
+import random
+from typing import Dict, List, Optional
+
+import settings
+from outcome_stats import OutcomeCounters, PersistedStats, smoothed_latency, smoothed_rate
+
+TASK_TYPES = ("generate", "modify", "recover")
+
+
+class ProviderTaskStats(OutcomeCounters):
+    """Outcome counters for one provider on one task type"""
+
+    FIELDS = ("calls", "parsed", "latency_total", "builds", "first_build_ok", "recoveries", "recovered")
+
+    def success_probability(self, task_type: str) -> float:
+        """Laplace-smoothed chance that a call ends in a usable result"""
+        if task_type == "recover":
+            return smoothed_rate(self.recovered, self.recoveries)
+        return smoothed_rate(self.parsed, self.calls) * smoothed_rate(self.first_build_ok, self.builds)
+
+    def mean_latency(self) -> float:
+        return smoothed_latency(self.latency_total, self.calls)
+
+    def score(self, task_type: str) -> float:
+        """Expected successes per second"""
+        return self.success_probability(task_type) / self.mean_latency()
+
+
+class LLMRouter:
+    def __init__(self, state_path: Optional[str] = None, exploration_rate: float = 0.1):
+        self.exploration_rate = exploration_rate
+        # Provider -> task type -> counters
+        self._table = PersistedStats(ProviderTaskStats, state_path, "ROUTER")
+        self._stats = self._table.table
+        self.explorations = 0
+
+    def rank(self, llms: List[str], task_type: str) -> List[str]:
+        """Candidates best-first; occasionally promotes a random one to keep exploring"""
+        ranked = sorted(llms, key=lambda llm: -self._table.peek(llm, task_type).score(task_type))
+        if len(ranked) > 1 and random.random() < self.exploration_rate:
+            explored = random.choice(ranked)
+            ranked.remove(explored)
+            ranked.insert(0, explored)
+            self.explorations += 1
+            print(f"[ROUTER] Exploring {explored} for {task_type}")
+        return ranked
+
+    def choose(self, llms: List[str], task_type: str) -> Optional[str]:
+        ranked = self.rank(llms, task_type)
+        return ranked[0] if ranked else None
+
+    def record_response(self, llm: str, task_type: str, latency: float, parsed: bool):
+        """An LLM call finished; parsed means it produced files"""
+        with self._table.lock:
+            stats = self._table.get(llm, task_type)
+            stats.calls += 1
+            stats.latency_total += latency
+            if parsed:
+                stats.parsed += 1
+        self._table.save_soon()
+
+    def record_build(self, llm: str, task_type: str, first_build_succeeded: bool):
+        """Whether the first xcodebuild of this provider's output succeeded without recovery"""
+        with self._table.lock:
+            stats = self._table.get(llm, task_type)
+            stats.builds += 1
+            if first_build_succeeded:
+                stats.first_build_ok += 1
+        self._table.save_soon()
+
+    def record_recovery(self, llm: str, latency: float, fixed: bool):
+        with self._table.lock:
+            stats = self._table.get(llm, "recover")
+            stats.calls += 1
+            stats.latency_total += latency
+            stats.recoveries += 1
+            if fixed:
+                stats.parsed += 1
+                stats.recovered += 1
+        self._table.save_soon()
+
+    def get_stats(self) -> Dict:
+        providers = {}
+        for llm, by_task in self._stats.items():
+            providers[llm] = {}
+            for task_type, stats in by_task.items():
+                providers[llm][task_type] = {
+                    **stats.to_dict(),
+                    "latency_total": round(stats.latency_total, 2),
+                    "success_probability": round(stats.success_probability(task_type), 3),
+                    "mean_latency": round(stats.mean_latency(), 2),
+                    "score": round(stats.score(task_type), 5)
+                }
+        return {
+            "exploration_rate": self.exploration_rate,
+            "explorations": self.explorations,
+            "providers": providers,
+            "ranking": {
+                task_type: sorted(self._stats, key=lambda llm: -self._table.peek(llm, task_type).score(task_type))
+                for task_type in TASK_TYPES
+            }
+        }
+
+
+router = LLMRouter(
+    settings.workspaces_path("llm_router.json"),
+    exploration_rate=float(os.getenv("SWIFTGEN_ROUTER_EXPLORATION", 0.1))
+)
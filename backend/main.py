@@ -8,7 +8,8 @@ import os
 import sys
 import json
 from datetime import datetime
-from fastapi.responses import FileResponse
+from contextlib import nullcontext
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse
 from typing import Optional, Dict, List
 
 # Add current directory to Python path to ensure local imports work
@@ -17,7 +18,18 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from claude_service import ClaudeService
 from build_service import BuildService
 from project_manager import ProjectManager
-from models import GenerateRequest, BuildStatus, ProjectStatus
+from models import GenerateRequest, BatchGenerateRequest, BuildStatus, ProjectStatus
+from batch_runner import BatchRunner, default_results_path, resolve_batch_path
+from websocket_manager import WebSocketManager
+import metrics
+import tracing
+import rate_limiter
+import circuit_breaker
+import llm_router
+import recovery_stats
+import build_profiles
+import template_warmer
+import speculative_setup
 
 # Import EnhancedClaudeService if available
 try:
@@ -64,13 +76,45 @@ build_service = BuildService()
 project_manager = ProjectManager()
 
 # Store active connections and project contexts
-active_connections: dict = {}
+ws_manager = WebSocketManager()
 project_contexts: dict = {}
 
+# Bulk generation runs by batch ID; tasks are kept so they are not garbage collected mid-run
+batch_runs: Dict[str, BatchRunner] = {}
+batch_tasks: Dict[str, asyncio.Task] = {}
+background_tasks: List[asyncio.Future] = []
+
 class ModifyRequest(BaseModel):
     project_id: str
     modification: str
     context: Optional[Dict] = None
+    build_profile: Optional[str] = None  # Defaults to the profile the project was created with
+
+def check_build_profile(name: Optional[str]):
+    """Reject unknown build profile names before any work starts"""
+    try:
+        build_profiles.resolve(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.on_event("startup")
+async def warm_build_template():
+    """Build the skeleton app in the background so new projects start from a warm DerivedData"""
+    if template_warmer.warmer.enabled:
+        background_tasks.append(asyncio.create_task(template_warmer.warmer.warm(project_manager, build_service)))
+
+@app.on_event("startup")
+async def resolve_build_destination():
+    """Resolve the simulator destination before the first build needs it"""
+    background_tasks.append(asyncio.create_task(build_service.resolve_destination()))
+
+@app.on_event("startup")
+async def measure_shared_caches():
+    """Trim and measure the shared caches once before any build uses them"""
+    if build_service.shared_caches:
+        background_tasks.append(
+            asyncio.get_event_loop().run_in_executor(None, build_service.shared_caches.evict)
+        )
 
 @app.get("/")
 async def serve_index():
@@ -82,13 +126,54 @@ async def serve_editor():
     """Serve the code editor page"""
     return FileResponse("../frontend/editor.html")
 
+@app.middleware("http")
+async def record_request_duration(request, call_next):
+    """Time API requests by route template and open a root trace span for pipeline requests"""
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+
+    # Pipeline requests get a root span, entered before call_next so the endpoint and every
+    # service it awaits inherit it; reads such as trace and log fetches are not traced
+    root_context = tracing.span(f"{request.method} {request.url.path}") if request.method != "GET" else nullcontext()
+    with root_context as root_span, metrics.REQUEST_SECONDS.time(status="500") as timer:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        timer.labels["endpoint"] = getattr(route, "path", "unmatched")
+        timer.labels["status"] = str(response.status_code)
+        if root_span:
+            root_span.name = f"{request.method} {timer.labels['endpoint']}"
+            root_span.set_attribute("status_code", response.status_code)
+            if response.status_code >= 500:
+                root_span.status = "error"
+            response.headers["X-Trace-Id"] = root_span.trace_id
+    return response
+
+@app.get("/metrics")
+async def get_metrics():
+    """Pipeline stage metrics in Prometheus text format"""
+    ws_metrics = ws_manager.get_metrics()
+    metrics.WEBSOCKET_QUEUE_DEPTH.set(ws_metrics["total_queue_depth"], stat="total")
+    metrics.WEBSOCKET_QUEUE_DEPTH.set(ws_metrics["max_queue_depth"], stat="max")
+    metrics.WEBSOCKET_SEND_LATENCY_SECONDS.set(ws_metrics["max_send_latency_ms"] / 1000)
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/generate")
 async def generate_app(request: GenerateRequest):
     """Generate iOS app from natural language description"""
-    try:
-        # Create project ID
-        project_id = f"proj_{uuid.uuid4().hex[:8]}"
+    check_build_profile(request.build_profile)
+
+    # Create project ID
+    project_id = f"proj_{uuid.uuid4().hex[:8]}"
+    tracing.set_attributes(project_id=project_id)
 
+    # Route events to clients that connected with their own job ID before we had a project ID
+    if request.job_id:
+        try:
+            ws_manager.register_job(request.job_id, project_id)
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    try:
         # Create status update callback
         async def send_status_update(message: str):
             await notify_clients(project_id, {
@@ -108,174 +193,248 @@ async def generate_app(request: GenerateRequest):
             "status": "analyzing"
         })
 
-        # Generate code using enhanced service if available, otherwise use standard
-        if use_enhanced_service and enhanced_service:
-            print(f"[MAIN] Using enhanced multi-LLM service for generation")
-            generated_code = await enhanced_service.generate_ios_app_multi_llm(
-                description=request.description,
-                app_name=request.app_name
-            )
-        else:
-            print(f"[MAIN] Using standard Claude service for generation")
-            generated_code = await claude_service.generate_ios_app(
-                description=request.description,
-                app_name=request.app_name
-            )
-
-        # CRITICAL: Debug what we received
-        print(f"\n[MAIN] Generated code structure:")
-        print(f"  Type: {type(generated_code)}")
-        print(f"  Keys: {generated_code.keys() if isinstance(generated_code, dict) else 'Not a dict'}")
-        print(f"  Number of files: {len(generated_code.get('files', []))}")
-
-        # Log file details
-        if "files" in generated_code:
-            for i, file in enumerate(generated_code["files"]):
-                print(f"  File {i+1}: {file.get('path', 'unknown')} ({len(file.get('content', ''))} chars)")
-
-        # Get the actual app name from the response
-        actual_app_name = generated_code.get("app_name", request.app_name or "MyApp")
+        # Boot the simulator and prepare the workspace while the LLM generates the code
+        setup = speculative_setup.SpeculativeSetup(project_id, project_manager, build_service, request.build_profile)
+        if speculative_setup.ENABLED:
+            setup.start()
+
+        # Any failure from here on drops the speculative work, including after generation
+        completed = False
+        try:
+            # Generate code using enhanced service if available, otherwise use standard
+            if use_enhanced_service and enhanced_service:
+                print(f"[MAIN] Using enhanced multi-LLM service for generation")
+                with tracing.span("generate_code", project_id=project_id, service="enhanced"):
+                    generated_code = await enhanced_service.generate_ios_app_multi_llm(
+                        description=request.description,
+                        app_name=request.app_name
+                    )
+            else:
+                print(f"[MAIN] Using standard Claude service for generation")
+                with tracing.span("generate_code", project_id=project_id, service="claude"):
+                    generated_code = await claude_service.generate_ios_app(
+                        description=request.description,
+                        app_name=request.app_name
+                    )
+
+            # CRITICAL: Debug what we received
+            print(f"\n[MAIN] Generated code structure:")
+            print(f"  Type: {type(generated_code)}")
+            print(f"  Keys: {generated_code.keys() if isinstance(generated_code, dict) else 'Not a dict'}")
+            print(f"  Number of files: {len(generated_code.get('files', []))}")
+
+            # Log file details
+            if "files" in generated_code:
+                for i, file in enumerate(generated_code["files"]):
+                    print(f"  File {i+1}: {file.get('path', 'unknown')} ({len(file.get('content', ''))} chars)")
+
+            # Get the actual app name from the response
+            actual_app_name = generated_code.get("app_name", request.app_name or "MyApp")
+
+            # CRITICAL FIX: Create project with the generated code AS IS
+            await notify_clients(project_id, {
+                "type": "status",
+                "message": f"Creating {actual_app_name} with unique features...",
+                "status": "creating"
+            })
 
-        # CRITICAL FIX: Create project with the generated code AS IS
-        await notify_clients(project_id, {
-            "type": "status",
-            "message": f"Creating {actual_app_name} with unique features...",
-            "status": "creating"
-        })
+            # Create project structure - pass the ENTIRE generated_code dict
+            await setup.join("workspace")
+            tracing.set_attributes(speculative_seconds=dict(setup.seconds))
+            print(f"\n[MAIN] Passing generated_code to project_manager.create_project")
+            project_path = await project_manager.create_project(
+                project_id,
+                generated_code,  # Pass the entire dict with files
+                actual_app_name,
+                request.build_profile
+            )
 
-        # Create project structure - pass the ENTIRE generated_code dict
-        print(f"\n[MAIN] Passing generated_code to project_manager.create_project")
-        project_path = await project_manager.create_project(
-            project_id,
-            generated_code,  # Pass the entire dict with files
-            actual_app_name
-        )
+            # CRITICAL: Get the actual bundle ID from the project metadata
+            project_metadata_path = os.path.join(project_path, "project.json")
+            with open(project_metadata_path, 'r') as f:
+                project_metadata = json.load(f)
 
-        # CRITICAL: Get the actual bundle ID from the project metadata
-        project_metadata_path = os.path.join(project_path, "project.json")
-        with open(project_metadata_path, 'r') as f:
-            project_metadata = json.load(f)
-
-        # Use the CORRECT bundle ID from project manager
-        correct_bundle_id = project_metadata['bundle_id']
-        correct_product_name = project_metadata['product_name']
-
-        print(f"[MAIN] Using CORRECT bundle ID: {correct_bundle_id} (not {generated_code.get('bundle_id', 'none')})")
-
-        # Log which LLM was used if multi-LLM
-        if generated_code.get("multi_llm_generated"):
-            print(f"[MAIN] App generated using multiple LLMs")
-
-        # Store project context for future modifications with CORRECT bundle ID
-        project_contexts[project_id] = {
-            "app_name": actual_app_name,
-            "description": request.description,
-            "bundle_id": correct_bundle_id,  # Use the CORRECT bundle ID
-            "product_name": correct_product_name,
-            "generated_files": generated_code.get("files", []),
-            "features": generated_code.get("features", []),
-            "unique_aspects": generated_code.get("unique_aspects", ""),
-            "modifications": [],
-            "generated_by_llm": generated_code.get("generated_by_llm", "claude")
-        }
+            # Use the CORRECT bundle ID from project manager
+            correct_bundle_id = project_metadata['bundle_id']
+            correct_product_name = project_metadata['product_name']
+
+            print(f"[MAIN] Using CORRECT bundle ID: {correct_bundle_id} (not {generated_code.get('bundle_id', 'none')})")
+
+            # Log which LLM was used if multi-LLM
+            if generated_code.get("multi_llm_generated"):
+                print(f"[MAIN] App generated using multiple LLMs")
+
+            # Store project context for future modifications with CORRECT bundle ID
+            project_contexts[project_id] = {
+                "app_name": actual_app_name,
+                "description": request.description,
+                "bundle_id": correct_bundle_id,  # Use the CORRECT bundle ID
+                "product_name": correct_product_name,
+                "generated_files": generated_code.get("files", []),
+                "features": generated_code.get("features", []),
+                "unique_aspects": generated_code.get("unique_aspects", ""),
+                "modifications": [],
+                "generated_by_llm": generated_code.get("generated_by_llm", "claude")
+            }
 
-        await notify_clients(project_id, {
-            "type": "status",
-            "message": "Building your unique app...",
-            "status": "building"
-        })
+            await notify_clients(project_id, {
+                "type": "status",
+                "message": "Building your unique app...",
+                "status": "building"
+            })
 
-        # Build the project with the CORRECT bundle ID
-        build_result = await build_service.build_project(project_path, project_id, correct_bundle_id)
+            # Build the project with the CORRECT bundle ID
+            build_result = await build_service.build_project(project_path, project_id, correct_bundle_id,
+                                                             request.build_profile)
+            if build_result.attempts and "generated_by_llm" in generated_code:
+                llm_router.router.record_build(generated_code["generated_by_llm"], "generate",
+                                               build_result.success and build_result.attempts == 1)
 
-        # Determine final status based on build and launch results
-        final_status = "failed"
-        status_type = "error"
+            # Determine final status based on build and launch results
+            final_status = "failed"
+            status_type = "error"
 
-        if build_result.success:
-            simulator_launched = getattr(build_result, 'simulator_launched', False)
+            if build_result.success:
+                simulator_launched = getattr(build_result, 'simulator_launched', False)
+                launch_pending = build_result.launch_status == "pending"
 
-            if simulator_launched:
-                final_status = "success"
-                status_type = "complete"
-            else:
-                # Build succeeded but launch failed
-                final_status = "warning"
-                status_type = "complete"
+                if simulator_launched or launch_pending:
+                    final_status = "success"
+                    status_type = "complete"
+                else:
+                    # Build succeeded but launch failed
+                    final_status = "warning"
+                    status_type = "complete"
 
-            unique_message = f"""✅ {actual_app_name} has been created successfully!
+                unique_message = f"""✅ {actual_app_name} has been created successfully!
 
-Unique features: {', '.join(generated_code.get('features', [])[:3])}
+    Unique features: {', '.join(generated_code.get('features', [])[:3])}
 
-{generated_code.get('unique_aspects', '')}"""
+    {generated_code.get('unique_aspects', '')}"""
 
-            if simulator_launched:
-                await notify_clients(project_id, {
-                    "type": status_type,
-                    "message": unique_message + "\n\n📱 The app is now running in the iOS Simulator!",
-                    "status": "success",
-                    "project_id": project_id,
-                    "simulator_launched": True,
-                    "app_name": actual_app_name
-                })
-            else:
-                # Check if it's a launch failure
-                launch_failed = any("Failed to launch app" in w for w in build_result.warnings)
-                if launch_failed:
+                if launch_pending:
+                    # The launch outcome follows as a "launch" event
                     await notify_clients(project_id, {
                         "type": status_type,
-                        "message": unique_message + "\n\n⚠️ App built successfully but couldn't launch in simulator. You can manually open it from Xcode.",
-                        "status": "warning",
+                        "message": unique_message + "\n\n📱 Launching in the iOS Simulator...",
+                        "status": "success",
                         "project_id": project_id,
                         "simulator_launched": False,
-                        "warnings": build_result.warnings,
+                        "launch_status": "pending",
                         "app_name": actual_app_name
                     })
-                else:
+                elif simulator_launched:
                     await notify_clients(project_id, {
                         "type": status_type,
-                        "message": unique_message,
+                        "message": unique_message + "\n\n📱 The app is now running in the iOS Simulator!",
                         "status": "success",
                         "project_id": project_id,
-                        "simulator_launched": False,
-                        "warnings": build_result.warnings,
+                        "simulator_launched": True,
                         "app_name": actual_app_name
                     })
-        else:
-            await notify_clients(project_id, {
-                "type": "error",
-                "message": "Build failed - attempting automatic fixes...",
-                "status": "failed",
-                "errors": build_result.errors
-            })
+                else:
+                    # Check if it's a launch failure
+                    launch_failed = any("Failed to launch app" in w for w in build_result.warnings)
+                    if launch_failed:
+                        await notify_clients(project_id, {
+                            "type": status_type,
+                            "message": unique_message + "\n\n⚠️ App built successfully but couldn't launch in simulator. You can manually open it from Xcode.",
+                            "status": "warning",
+                            "project_id": project_id,
+                            "simulator_launched": False,
+                            "warnings": build_result.warnings,
+                            "app_name": actual_app_name
+                        })
+                    else:
+                        await notify_clients(project_id, {
+                            "type": status_type,
+                            "message": unique_message,
+                            "status": "success",
+                            "project_id": project_id,
+                            "simulator_launched": False,
+                            "warnings": build_result.warnings,
+                            "app_name": actual_app_name
+                        })
+            else:
+                await notify_clients(project_id, {
+                    "type": "error",
+                    "message": "Build failed - attempting automatic fixes...",
+                    "status": "failed",
+                    "errors": build_result.errors
+                })
 
-        return {
-            "project_id": project_id,
-            "app_name": actual_app_name,
-            "bundle_id": correct_bundle_id,  # Return the CORRECT bundle ID
-            "product_name": correct_product_name,
-            "status": final_status,  # success, warning, or failed
-            "build_result": build_result.model_dump(),
-            "generated_files": generated_code.get("files", []),
-            "features": generated_code.get("features", []),
-            "unique_aspects": generated_code.get("unique_aspects", ""),
-            "simulator_launched": getattr(build_result, 'simulator_launched', False) if build_result.success else False
-        }
+            response = {
+                "project_id": project_id,
+                "app_name": actual_app_name,
+                "bundle_id": correct_bundle_id,  # Return the CORRECT bundle ID
+                "product_name": correct_product_name,
+                "status": final_status,  # success, warning, or failed
+                "build_result": build_result.model_dump(),
+                "generated_files": generated_code.get("files", []),
+                "features": generated_code.get("features", []),
+                "unique_aspects": generated_code.get("unique_aspects", ""),
+                "simulator_launched": getattr(build_result, 'simulator_launched', False) if build_result.success else False,
+                "trace_id": tracing.current_trace_id()
+            }
+            completed = True
+            return response
+        finally:
+            if not completed:
+                await setup.cancel()
 
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/generate/batch")
+async def generate_batch(request: BatchGenerateRequest):
+    """Start generating and building every app described in a JSONL file; poll the returned batch ID"""
+    # Paths come from the client, so they are confined to the batch directory; the CLI takes any path
+    try:
+        input_path = resolve_batch_path(request.input_path)
+        results_path = resolve_batch_path(request.results_path or default_results_path(request.input_path))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not os.path.exists(input_path):
+        raise HTTPException(status_code=404, detail=f"Input file not found: {request.input_path}")
+    if request.llm_concurrency < 1 or request.build_concurrency < 1:
+        raise HTTPException(status_code=400, detail="Concurrency limits must be at least 1")
+    check_build_profile(request.build_profile)
+
+    for batch_id, task in batch_tasks.items():
+        if not task.done() and batch_runs[batch_id].results_path == results_path:
+            raise HTTPException(status_code=409, detail=f"Batch {batch_id} is already writing {results_path}")
+
+    generate = enhanced_service.generate_ios_app_multi_llm if use_enhanced_service and enhanced_service \
+        else claude_service.generate_ios_app
+    runner = BatchRunner(generate, project_manager, build_service,
+                         request.llm_concurrency, request.build_concurrency, request.build_profile)
+    batch_runs[runner.batch_id] = runner
+    batch_tasks[runner.batch_id] = asyncio.create_task(
+        runner.run(input_path, results_path, resume=request.resume)
+    )
+    return {"batch_id": runner.batch_id, "results_path": results_path, "state": "running"}
+
+@app.get("/api/generate/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Progress and outcome counts of a bulk generation run"""
+    runner = batch_runs.get(batch_id)
+    if not runner:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return runner.get_status()
+
 @app.post("/api/modify")
 async def modify_app(request: ModifyRequest):
     """Modify an existing app based on user request"""
     print(f"[MODIFY API] Received request: {request.modification}")
     print(f"[MODIFY API] Project ID: {request.project_id}")
     print(f"[MODIFY API] Context: {request.context}")
+    check_build_profile(request.build_profile)
 
     try:
         project_id = request.project_id
+        tracing.set_attributes(project_id=project_id)
 
         # Check if project exists
         project_path = await project_manager.get_project_path(project_id)
@@ -327,22 +486,24 @@ async def modify_app(request: ModifyRequest):
         # Generate modified code using enhanced service if available
         if use_enhanced_service and enhanced_service:
             print(f"[MAIN] Using enhanced multi-LLM service for modification")
-            modified_code = await enhanced_service.modify_ios_app_multi_llm(
-                context.get("app_name", "MyApp"),
-                context.get("description", ""),
-                request.modification,
-                context.get("edited_files", context.get("generated_files", [])) if context.get("manual_edit") else context.get("generated_files", []),
-                existing_bundle_id=bundle_id
-            )
+            with tracing.span("modify_code", project_id=project_id, service="enhanced"):
+                modified_code = await enhanced_service.modify_ios_app_multi_llm(
+                    context.get("app_name", "MyApp"),
+                    context.get("description", ""),
+                    request.modification,
+                    context.get("edited_files", context.get("generated_files", [])) if context.get("manual_edit") else context.get("generated_files", []),
+                    existing_bundle_id=bundle_id
+                )
         else:
             print(f"[MAIN] Using standard Claude service for modification")
-            modified_code = await claude_service.modify_ios_app(
-                context.get("app_name", "MyApp"),
-                context.get("description", ""),
-                request.modification,
-                context.get("edited_files", context.get("generated_files", [])) if context.get("manual_edit") else context.get("generated_files", []),
-                existing_bundle_id=bundle_id
-            )
+            with tracing.span("modify_code", project_id=project_id, service="claude"):
+                modified_code = await claude_service.modify_ios_app(
+                    context.get("app_name", "MyApp"),
+                    context.get("description", ""),
+                    request.modification,
+                    context.get("edited_files", context.get("generated_files", [])) if context.get("manual_edit") else context.get("generated_files", []),
+                    existing_bundle_id=bundle_id
+                )
 
         # CRITICAL: Ensure the bundle ID remains the same
         modified_code["bundle_id"] = bundle_id
@@ -376,7 +537,11 @@ async def modify_app(request: ModifyRequest):
         })
 
         # Rebuild the project with the same bundle ID
-        build_result = await build_service.build_project(project_path, project_id, bundle_id)
+        build_result = await build_service.build_project(project_path, project_id, bundle_id,
+                                                         request.build_profile)
+        if build_result.attempts and "modified_by_llm" in modified_code:
+            llm_router.router.record_build(modified_code["modified_by_llm"], "modify",
+                                           build_result.success and build_result.attempts == 1)
 
         # Determine final status
         final_status = "failed"
@@ -384,15 +549,25 @@ async def modify_app(request: ModifyRequest):
 
         if build_result.success:
             simulator_launched = getattr(build_result, 'simulator_launched', False)
+            launch_pending = build_result.launch_status == "pending"
 
-            if simulator_launched:
+            if simulator_launched or launch_pending:
                 final_status = "success"
                 status_type = "complete"
             else:
                 final_status = "warning"
                 status_type = "complete"
 
-            if simulator_launched:
+            if launch_pending:
+                await notify_clients(project_id, {
+                    "type": status_type,
+                    "message": "✅ App modified successfully! Relaunching in the simulator...",
+                    "status": "success",
+                    "project_id": project_id,
+                    "simulator_launched": False,
+                    "launch_status": "pending"
+                })
+            elif simulator_launched:
                 await notify_clients(project_id, {
                     "type": status_type,
                     "message": "✅ App modified and relaunched successfully!",
@@ -435,7 +610,8 @@ async def modify_app(request: ModifyRequest):
             "status": final_status,  # success, warning, or failed
             "build_result": build_result.model_dump(),
             "modified_files": modified_code.get("files", []),
-            "features_added": modified_code.get("features", [])
+            "features_added": modified_code.get("features", []),
+            "trace_id": tracing.current_trace_id()
         }
 
     except Exception as e:
@@ -468,9 +644,40 @@ async def get_project_files(project_id: str):
     files = await project_manager.get_project_files(project_id)
     return {"files": files}
 
+class RollbackRequest(BaseModel):
+    version: int
+
+@app.get("/api/project/{project_id}/versions")
+async def list_project_versions(project_id: str):
+    """List source versions recorded for a project"""
+    versions = await project_manager.list_project_versions(project_id)
+    if versions is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"versions": versions}
+
+@app.post("/api/project/{project_id}/rollback")
+async def rollback_project(project_id: str, request: RollbackRequest):
+    """Restore project sources to a previous version"""
+    if not await project_manager.get_project_path(project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    restored = await project_manager.rollback_project(project_id, request.version)
+    if restored is None:
+        raise HTTPException(status_code=404, detail=f"Version {request.version} not found")
+
+    # Later modifications must start from the restored code
+    files = await project_manager.get_project_files(project_id)
+    if project_id in project_contexts:
+        project_contexts[project_id]["generated_files"] = [
+            {"path": f["path"], "content": f["content"]} for f in files
+        ]
+
+    return {"project_id": project_id, "version": restored["version"], "restored_from": request.version, "files": files}
+
 @app.post("/api/project/{project_id}/rebuild")
-async def rebuild_project(project_id: str):
-    """Rebuild an existing project"""
+async def rebuild_project(project_id: str, build_profile: Optional[str] = None):
+    """Rebuild an existing project, optionally with another build profile"""
+    check_build_profile(build_profile)
     project_path = await project_manager.get_project_path(project_id)
     if not project_path:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -496,41 +703,163 @@ async def rebuild_project(project_id: str):
         build_service.set_status_callback(send_status_update)
 
     # Always pass bundle_id to build_project
-    build_result = await build_service.build_project(project_path, project_id, bundle_id)
+    build_result = await build_service.build_project(project_path, project_id, bundle_id, build_profile)
 
     return {"build_result": build_result.model_dump()}
 
-@app.websocket("/ws/{project_id}")
-async def websocket_endpoint(websocket: WebSocket, project_id: str):
-    """WebSocket for real-time updates"""
-    await websocket.accept()
+@app.get("/api/project/{project_id}/launch")
+async def get_launch_status(project_id: str):
+    """Status of the project's latest simulator launch, which runs after the build has returned"""
+    launch = build_service.launcher.get(project_id) if build_service.launcher else None
+    if not launch:
+        raise HTTPException(status_code=404, detail="No launch for this project")
+    return launch
+
+@app.get("/api/project/{project_id}/build-logs")
+async def list_build_logs(project_id: str):
+    """List per-attempt build logs for a project, newest first"""
+    try:
+        return {"logs": build_service.log_store.list_logs(project_id)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    if project_id not in active_connections:
-        active_connections[project_id] = []
-    active_connections[project_id].append(websocket)
+def _get_build_log_index(project_id: str, log_id: str) -> Dict:
+    try:
+        index = build_service.log_store.get_index(project_id, log_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not index:
+        raise HTTPException(status_code=404, detail="Build log not found")
+    return index
+
+@app.get("/api/project/{project_id}/build-logs/{log_id}/index")
+async def get_build_log_index(project_id: str, log_id: str):
+    """Sizes plus byte offsets of error and warning lines in a build log"""
+    return _get_build_log_index(project_id, log_id)
+
+@app.get("/api/project/{project_id}/build-logs/{log_id}/tail")
+async def tail_build_log(project_id: str, log_id: str, lines: int = 200):
+    """Stream the last N lines of a build log"""
+    _get_build_log_index(project_id, log_id)
+    lines = max(1, min(lines, 10000))
+    return StreamingResponse(
+        build_service.log_store.iter_tail(project_id, log_id, lines),
+        media_type="text/plain; charset=utf-8"
+    )
+
+@app.get("/api/project/{project_id}/build-logs/{log_id}")
+async def read_build_log(project_id: str, log_id: str, start: int = 0, end: Optional[int] = None):
+    """Stream an uncompressed byte range [start, end) of a build log"""
+    index = _get_build_log_index(project_id, log_id)
+    start = max(0, start)
+    end = index["size"] if end is None else min(end, index["size"])
+    return StreamingResponse(
+        build_service.log_store.iter_range(project_id, log_id, start, end),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Log-Size": str(index["size"]), "X-Range": f"{start}-{max(start, end)}"}
+    )
+
+@app.get("/api/build-cache/stats")
+async def get_build_cache_stats():
+    """Entries, size and hit/miss counts of the build output cache, the shared module/package caches
+    and the warm DerivedData templates"""
+    stats = build_service.build_cache.get_stats()
+    if build_service.shared_caches:
+        stats["shared_caches"] = build_service.shared_caches.get_stats()
+    stats["templates"] = template_warmer.warmer.get_stats()
+    return stats
+
+@app.get("/api/traces")
+async def list_traces(limit: int = 50, project_id: Optional[str] = None):
+    """Recent request traces, newest first"""
+    return {"traces": tracing.exporter.list_traces(max(1, min(limit, 200)), project_id)}
+
+@app.get("/api/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Waterfall of a request's spans with offsets from the start of the trace"""
+    spans = tracing.exporter.get_spans(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return tracing.build_waterfall(spans)
+
+@app.get("/api/llm/rate-limits")
+async def get_llm_rate_limits():
+    """Remaining request/token capacity, queue length and throttling per LLM provider"""
+    return rate_limiter.get_stats()
+
+@app.get("/api/llm/router")
+async def get_llm_router_stats():
+    """Per-provider, per-task outcomes and the resulting provider ranking"""
+    return llm_router.router.get_stats()
+
+@app.get("/api/build/profiles")
+async def get_build_profiles():
+    """Available build profiles, their settings and the default"""
+    return build_profiles.describe()
+
+@app.get("/api/build/destination")
+async def get_build_destination():
+    """The simulator destination builds run against, and whether a build has succeeded on it"""
+    return build_service.destination_resolver.get_info()
+
+@app.get("/api/recovery/stats")
+async def get_recovery_stats():
+    """Per-category success, latency and token cost of each error recovery strategy"""
+    return recovery_stats.stats.get_stats()
+
+@app.get("/api/llm/health")
+async def get_llm_health():
+    """Circuit breaker state and health score per LLM provider"""
+    return circuit_breaker.get_stats()
+
+@app.get("/api/websocket/metrics")
+async def get_websocket_metrics():
+    """Outbound queue depth and send latency for connected WebSocket clients"""
+    return ws_manager.get_metrics()
+
+@app.get("/api/project/{project_id}/events")
+async def get_project_events(project_id: str, since: int = 0):
+    """Retained progress events after a sequence number"""
+    return ws_manager.get_events(project_id, since)
+
+@app.websocket("/ws/{project_id}")
+async def websocket_endpoint(websocket: WebSocket, project_id: str, since: Optional[int] = None):
+    """WebSocket for real-time updates; pass ?since=<seq> to replay missed events"""
+    connection = await ws_manager.connect(project_id, websocket, since)
 
     try:
         while True:
             # Keep connection alive
             await websocket.receive_text()
     except WebSocketDisconnect:
-        active_connections[project_id].remove(websocket)
-        if not active_connections[project_id]:
-            del active_connections[project_id]
+        pass
+    finally:
+        await ws_manager.disconnect(connection)
 
 async def notify_clients(project_id: str, message: dict):
-    """Send message to all connected clients for a project"""
-    if project_id in active_connections:
-        disconnected = []
-        for connection in active_connections[project_id]:
-            try:
-                await connection.send_json(message)
-            except:
-                disconnected.append(connection)
-
-        # Remove disconnected clients
-        for conn in disconnected:
-            active_connections[project_id].remove(conn)
+    """Queue a message for all connected clients of a project without waiting on them"""
+    await ws_manager.broadcast(project_id, message)
+
+async def notify_launch(project_id: str, launch: dict):
+    """Launch progress as status messages, and the outcome as a launch event"""
+    if launch["status"] in ("launched", "failed", "cancelled"):
+        await notify_clients(project_id, {
+            "type": "launch",
+            "message": launch["message"],
+            "status": launch["status"],
+            "project_id": project_id,
+            "simulator_launched": launch["status"] == "launched",
+            "launch": launch
+        })
+    else:
+        await notify_clients(project_id, {
+            "type": "status",
+            "message": launch["message"],
+            "status": "launching"
+        })
+
+if build_service.launcher:
+    build_service.launcher.set_notify(notify_launch)
 
 if __name__ == "__main__":
     import uvicorn
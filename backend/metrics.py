@@ -0,0 +1,211 @@
+"""
+Lightweight pipeline instrumentation for SwiftGen.
+
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format at /metrics. Kept dependency-free so every service can import it.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Buckets in seconds, sized for LLM calls and Xcode builds rather than web requests
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 180, 300, 600)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], Dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def time(self, counter: Optional[Counter] = None, **labels) -> "Timer":
+        """Context manager observing elapsed seconds; set timer.labels[...] before exit to refine labels.
+
+        If a counter is given it is incremented with the same final labels.
+        """
+        return Timer(self, labels, counter)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        inf = 'le="+Inf"'
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    le = f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class Timer:
+    """Times a block into a histogram; works across awaits inside async code"""
+
+    def __init__(self, histogram: Histogram, labels: Dict, counter: Optional[Counter] = None):
+        self.histogram = histogram
+        self.counter = counter
+        self.labels = dict(labels)
+        self.start = 0.0
+        self.elapsed: Optional[float] = None
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.start
+        if exc_type is not None and "outcome" in self.histogram.labelnames:
+            self.labels["outcome"] = "error"
+        self.histogram.observe(self.elapsed, **self.labels)
+        if self.counter is not None:
+            self.counter.inc(**self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                return self._metrics[metric.name]
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# LLM providers
+LLM_REQUEST_SECONDS = registry.register(Histogram(
+    "swiftgen_llm_request_seconds", "LLM HTTP call latency", ("provider", "model", "outcome")))
+LLM_REQUESTS_TOTAL = registry.register(Counter(
+    "swiftgen_llm_requests_total", "LLM calls by result", ("provider", "model", "outcome")))
+LLM_THROTTLED_TOTAL = registry.register(Counter(
+    "swiftgen_llm_throttled_total", "429/529/503 responses from LLM providers", ("provider", "status")))
+LLM_RATE_LIMIT_WAIT_SECONDS = registry.register(Histogram(
+    "swiftgen_llm_rate_limit_wait_seconds", "Time LLM calls spent queued for provider capacity", ("provider",)))
+LLM_INPUT_TOKENS_TOTAL = registry.register(Counter(
+    "swiftgen_llm_input_tokens_total", "Prompt tokens by prompt cache result (read, write, uncached)",
+    ("provider", "cache")))
+LLM_HEDGES_TOTAL = registry.register(Counter(
+    "swiftgen_llm_hedges_total", "Backup requests raced against slow LLM calls", ("primary", "outcome")))
+JSON_EXTRACTION_SECONDS = registry.register(Histogram(
+    "swiftgen_json_extraction_seconds", "Time spent extracting JSON from LLM responses", ("parser", "outcome"),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)))
+
+# Project and build pipeline
+PROJECT_MATERIALIZE_SECONDS = registry.register(Histogram(
+    "swiftgen_project_materialize_seconds", "Writing generated sources, Info.plist and project.yml", ("operation",),
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)))
+XCODEGEN_SECONDS = registry.register(Histogram(
+    "swiftgen_xcodegen_seconds", "xcodegen generate duration", ("outcome",)))
+XCODEBUILD_ATTEMPT_SECONDS = registry.register(Histogram(
+    "swiftgen_xcodebuild_attempt_seconds", "Duration of each xcodebuild attempt", ("attempt", "profile", "outcome")))
+BUILD_CACHE_TOTAL = registry.register(Counter(
+    "swiftgen_build_cache_total", "Build cache lookups", ("result",)))
+RECOVERY_STRATEGY_SECONDS = registry.register(Histogram(
+    "swiftgen_recovery_strategy_seconds", "Duration of each error recovery strategy", ("strategy", "outcome")))
+SIMULATOR_STEP_SECONDS = registry.register(Histogram(
+    "swiftgen_simulator_step_seconds", "Simulator boot, install and launch", ("step", "outcome")))
+
+# API
+REQUEST_SECONDS = registry.register(Histogram(
+    "swiftgen_request_seconds", "End-to-end API request duration", ("endpoint", "status")))
+WEBSOCKET_QUEUE_DEPTH = registry.register(Gauge(
+    "swiftgen_websocket_queue_depth", "Messages waiting in WebSocket send queues", ("stat",)))
+WEBSOCKET_SEND_LATENCY_SECONDS = registry.register(Gauge(
+    "swiftgen_websocket_send_latency_max_seconds", "Slowest WebSocket send observed on open connections"))
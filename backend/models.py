@@ -5,6 +5,16 @@ from datetime import datetime
 class GenerateRequest(BaseModel):
     description: str
     app_name: Optional[str] = None
+    job_id: Optional[str] = None  # Client-chosen ID it may already be listening on via /ws/{job_id}
+    build_profile: Optional[str] = None  # "fast-dev" or "full"; defaults to SWIFTGEN_BUILD_PROFILE
+
+class BatchGenerateRequest(BaseModel):
+    input_path: str  # JSONL file of {"description", "app_name", "id"} objects, relative to workspaces/batches
+    results_path: Optional[str] = None  # Relative to workspaces/batches; defaults to <input>.results.jsonl
+    llm_concurrency: int = 2
+    build_concurrency: int = 1
+    resume: bool = True
+    build_profile: Optional[str] = None
 
 class BuildStatus(BaseModel):
     status: str  # 'pending', 'building', 'success', 'failed'
@@ -20,6 +30,13 @@ class BuildResult(BaseModel):
     app_path: Optional[str] = None
     simulator_launched: bool = False
     simulator_message: Optional[str] = None
+    launch_status: Optional[str] = None  # pending while the app is launched in the background, then launched/failed
+    cache_hit: bool = False
+    fingerprint: Optional[str] = None
+    attempts: int = 0
+    build_profile: Optional[str] = None
+    xcodebuild_time: float = 0  # Seconds inside xcodebuild across attempts, the part the profile affects
+    destination: Optional[str] = None  # xcodebuild -destination the build ran against
 
 class ProjectStatus(BaseModel):
     project_id: str
@@ -0,0 +1,118 @@
+"""
+Outcome counters persisted across restarts, shared by the LLM router and recovery statistics.
+
+Counters live in a two-level table (provider -> task type, error category ->
+strategy) that is written to a JSON file. Recording an outcome only marks the
+table dirty: a timer thread writes it at most once per SAVE_DELAY_SECONDS, and
+whatever is still unsaved is written when the process exits.
+"""
+
+import os
+import json
+import atexit
+import threading
+from typing import Dict, Generic, Optional, Type, TypeVar
+
+# Assumed latency with no history, so one fast sample does not dominate
+PRIOR_LATENCY_SECONDS = 30.0
+
+SAVE_DELAY_SECONDS = 2.0
+
+
+def smoothed_rate(successes: float, trials: float) -> float:
+    """Laplace-smoothed success rate"""
+    return (successes + 1) / (trials + 2)
+
+
+def smoothed_latency(latency_total: float, samples: float) -> float:
+    """Mean latency with one sample of PRIOR_LATENCY_SECONDS mixed in"""
+    return (latency_total + PRIOR_LATENCY_SECONDS) / (samples + 1)
+
+
+class OutcomeCounters:
+    """Named numeric counters; subclasses list them in FIELDS"""
+
+    FIELDS: tuple = ()
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field, 0))
+
+    def add(self, other: "OutcomeCounters"):
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+C = TypeVar("C", bound=OutcomeCounters)
+
+
+class PersistedStats(Generic[C]):
+    """Counters by key and subkey, saved to state_path shortly after they change"""
+
+    def __init__(self, counters: Type[C], state_path: Optional[str], log_prefix: str,
+                 save_delay: float = SAVE_DELAY_SECONDS):
+        self.counters = counters
+        self.state_path = state_path
+        self.log_prefix = log_prefix
+        self.save_delay = save_delay
+        self.table: Dict[str, Dict[str, C]] = {}
+        # Held while counters change; record_* callers take it around their updates
+        self.lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._load()
+        if self.state_path:
+            atexit.register(self.flush)
+
+    def get(self, key: str, subkey: str) -> C:
+        return self.table.setdefault(key, {}).setdefault(subkey, self.counters())
+
+    def peek(self, key: str, subkey: str) -> C:
+        """Counters without creating an entry; no history gives the priors"""
+        return self.table.get(key, {}).get(subkey) or self.counters()
+
+    def save_soon(self):
+        """Schedule a save unless one is already pending"""
+        if not self.state_path:
+            return
+        with self.lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write the counters now"""
+        if not self.state_path:
+            return
+        with self._save_lock:
+            with self.lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                data = {key: {subkey: counters.to_dict() for subkey, counters in by_subkey.items()}
+                        for key, by_subkey in self.table.items()}
+            try:
+                os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+                tmp_path = f"{self.state_path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.state_path)
+            except OSError as e:
+                print(f"[{self.log_prefix}] Could not save state: {e}")
+
+    def _load(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r') as f:
+                data = json.load(f)
+            for key, by_subkey in data.items():
+                for subkey, values in by_subkey.items():
+                    self.table.setdefault(key, {})[subkey] = self.counters(**values)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"[{self.log_prefix}] Ignoring unreadable state {self.state_path}: {e}")
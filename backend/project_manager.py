@@ -1,14 +1,21 @@
 import os
-import shutil
 import json
 import yaml
 import re
+import shutil
+import asyncio
 from typing import Dict, List, Optional
 from datetime import datetime
+from snapshot_store import SnapshotStore
+import metrics
+import tracing
+import build_profiles
+import template_warmer
+import settings
 
 class ProjectManager:
     def __init__(self):
-        self.workspaces_dir = "../workspaces"
+        self.workspaces_dir = settings.workspaces_dir()
         self.templates_dir = "../templates/ios_app_template"
         os.makedirs(self.workspaces_dir, exist_ok=True)
 
@@ -76,8 +83,39 @@ class ProjectManager:
 
         return path
 
-    async def create_project(self, project_id: str, generated_code: Dict, app_name: str) -> str:
+    async def create_project(self, project_id: str, generated_code: Dict, app_name: str,
+                             build_profile: Optional[str] = None) -> str:
         """Create a new iOS project from generated code"""
+        with tracing.span("project.create", project_id=project_id, file_count=len(generated_code.get("files", []))), \
+                metrics.PROJECT_MATERIALIZE_SECONDS.time(operation="create"):
+            project_path = self._materialize_project(project_id, generated_code, app_name, build_profile)
+
+        # Start from the skeleton app's DerivedData so the first build only compiles this app's sources
+        derived_data_path = os.path.join(project_path, "DerivedData")
+        if not template_warmer.warmer.is_fresh_seed(derived_data_path):  # prepare_workspace may have seeded it
+            with tracing.span("project.seed_derived_data", project_id=project_id) as seed_span:
+                seeded = await asyncio.get_event_loop().run_in_executor(
+                    None, template_warmer.warmer.seed, derived_data_path, build_profile
+                )
+                seed_span.set_attributes(seeded=seeded)
+        return project_path
+
+    def prepare_workspace(self, project_id: str, build_profile: Optional[str] = None) -> str:
+        """Create a project's directory before its code exists, with the warm DerivedData if there is one"""
+        project_path = os.path.join(self.workspaces_dir, project_id)
+        os.makedirs(os.path.join(project_path, "Sources"), exist_ok=True)
+        template_warmer.warmer.seed(os.path.join(project_path, "DerivedData"), build_profile)
+        return project_path
+
+    def discard_workspace(self, project_id: str):
+        """Remove a directory prepare_workspace created for a project that was never created"""
+        project_path = os.path.join(self.workspaces_dir, project_id)
+        if os.path.isdir(project_path) and not os.path.exists(os.path.join(project_path, "project.json")):
+            shutil.rmtree(project_path, ignore_errors=True)
+
+    def _materialize_project(self, project_id: str, generated_code: Dict, app_name: str,
+                             build_profile: Optional[str] = None) -> str:
+        """Write sources, Info.plist, project.yml and metadata for a new project"""
 
         # CRITICAL: Create all names ONCE and use consistently
         safe_target_name = self._create_safe_target_name(app_name)
@@ -255,7 +293,8 @@ struct ContentView: View {
             safe_bundle_id,
             safe_target_name,
             safe_product_name,
-            generated_code.get("dependencies", [])
+            generated_code.get("dependencies", []),
+            build_profiles.resolve(build_profile)
         )
 
         with open(os.path.join(project_path, "project.yml"), 'w') as f:
@@ -270,9 +309,14 @@ struct ContentView: View {
             "product_name": safe_product_name,
             "target_name": safe_target_name,
             "files": [f["path"] for f in valid_swift_files],
+            "build_profile": build_profiles.resolve(build_profile),
             "modifications": []
         }
 
+        # Record the generated sources as version 1
+        initial_version = SnapshotStore(project_path).snapshot("Initial generation")
+        metadata["version"] = initial_version["version"]
+
         with open(os.path.join(project_path, "project.json"), 'w') as f:
             json.dump(metadata, f, indent=2)
 
@@ -363,7 +407,7 @@ struct ContentView: View {
 
     def _generate_project_yml(self, app_name: str, bundle_id: str,
                               target_name: str, product_name: str,
-                              dependencies: List[str]) -> Dict:
+                              dependencies: List[str], build_profile: str) -> Dict:
         """Generate xcodegen configuration with PROPER COMPILATION SETTINGS"""
 
         print(f"\n[PROJECT YML] Generating with consistent names:")
@@ -371,6 +415,7 @@ struct ContentView: View {
         print(f"  Target Name: {target_name}")
         print(f"  Product Name: {product_name}")
         print(f"  Bundle ID: {bundle_id}")
+        print(f"  Build profile: {build_profile}")
 
         config = {
             'name': target_name,
@@ -405,7 +450,6 @@ struct ContentView: View {
                             'ASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME': 'AccentColor',
                             'CLANG_ENABLE_MODULES': 'YES',
                             'SWIFT_OPTIMIZATION_LEVEL': '-Onone',
-                            'ENABLE_TESTABILITY': 'YES',
                             'GCC_DYNAMIC_NO_PIC': 'NO',
                             'GCC_OPTIMIZATION_LEVEL': '0',
                             'GCC_PREPROCESSOR_DEFINITIONS': 'DEBUG=1 $(inherited)',
@@ -426,6 +470,9 @@ struct ContentView: View {
             }
         }
 
+        # Architectures, indexing and testability come from the build profile
+        config['targets'][target_name]['settings']['base'].update(build_profiles.project_settings(build_profile))
+
         # Add dependencies if any
         if dependencies:
             config['targets'][target_name]['dependencies'] = []
@@ -438,6 +485,12 @@ struct ContentView: View {
 
     async def update_project_files(self, project_id: str, updated_files: List[Dict]) -> bool:
         """Update existing project files"""
+        with tracing.span("project.update", project_id=project_id, file_count=len(updated_files)), \
+                metrics.PROJECT_MATERIALIZE_SECONDS.time(operation="update"):
+            return self._write_updated_files(project_id, updated_files)
+
+    def _write_updated_files(self, project_id: str, updated_files: List[Dict]) -> bool:
+        """Write modified sources and record a new version"""
         project_path = os.path.join(self.workspaces_dir, project_id)
         if not os.path.exists(project_path):
             return False
@@ -449,9 +502,10 @@ struct ContentView: View {
             with open(metadata_path, 'r') as f:
                 metadata = json.load(f)
 
-        # Backup current files
-        backup_dir = os.path.join(project_path, ".backups", datetime.now().strftime("%Y%m%d_%H%M%S"))
-        os.makedirs(backup_dir, exist_ok=True)
+        # Make sure the current state is recoverable (projects created before snapshots existed)
+        snapshots = SnapshotStore(project_path)
+        if not snapshots.latest_version():
+            snapshots.snapshot("Before modification")
 
         # Update each file
         for file_info in updated_files:
@@ -465,22 +519,21 @@ struct ContentView: View {
 
             file_path = os.path.join(project_path, fixed_path)
 
-            # Backup existing file if it exists
-            if os.path.exists(file_path):
-                backup_path = os.path.join(backup_dir, fixed_path)
-                os.makedirs(os.path.dirname(backup_path), exist_ok=True)
-                shutil.copy2(file_path, backup_path)
-
             # Write new content
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             with open(file_path, 'w') as f:
                 f.write(file_info["content"])
 
+        # Record the modified sources; unchanged files reuse their existing blobs
+        version = snapshots.snapshot("Modification")
+
         # Update metadata
         if metadata:
             metadata["last_modified"] = datetime.now().isoformat()
+            metadata["version"] = version["version"]
             metadata["modifications"].append({
                 "timestamp": datetime.now().isoformat(),
+                "version": version["version"],
                 "files_updated": [f["path"] for f in updated_files if f["path"].endswith(".swift")]
             })
 
@@ -489,6 +542,41 @@ struct ContentView: View {
 
         return True
 
+    async def list_project_versions(self, project_id: str) -> Optional[List[Dict]]:
+        """List recorded source versions, newest first"""
+        project_path = os.path.join(self.workspaces_dir, project_id)
+        if not os.path.exists(project_path):
+            return None
+        return SnapshotStore(project_path).list_versions()
+
+    async def rollback_project(self, project_id: str, version: int) -> Optional[Dict]:
+        """Restore project sources to a previous version"""
+        project_path = os.path.join(self.workspaces_dir, project_id)
+        if not os.path.exists(project_path):
+            return None
+
+        restored = SnapshotStore(project_path).restore(version)
+        if restored is None:
+            return None
+
+        metadata_path = os.path.join(project_path, "project.json")
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r') as f:
+                metadata = json.load(f)
+            metadata["last_modified"] = datetime.now().isoformat()
+            metadata["version"] = restored["version"]
+            metadata["files"] = sorted(restored["files"].keys())
+            metadata.setdefault("modifications", []).append({
+                "timestamp": datetime.now().isoformat(),
+                "version": restored["version"],
+                "rolled_back_to": version
+            })
+            with open(metadata_path, 'w') as f:
+                json.dump(metadata, f, indent=2)
+
+        print(f"[PROJECT MANAGER] Rolled back {project_id} to version {version} (now version {restored['version']})")
+        return restored
+
     async def get_project_status(self, project_id: str) -> Optional[Dict]:
         """Get project status and metadata"""
         project_path = os.path.join(self.workspaces_dir, project_id)
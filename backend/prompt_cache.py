@@ -0,0 +1,88 @@
+"""
+Prompt caching helpers.
+
+Prompts are built as a list of text blocks ordered from most to least stable:
+static instructions first, then project context, then the request itself. A
+block marked cache=True ends a reusable prefix. Anthropic gets a cache_control
+breakpoint there; OpenAI-compatible providers cache identical prefixes on their
+own, so they get the same blocks joined in the same order.
+
+Anthropic only caches prefixes above a minimum length (about 1024 tokens), so a
+breakpoint on a short prefix is simply ignored by the API.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Union
+
+import metrics
+import tracing
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Anthropic allows four breakpoints per request; the system prompt uses one
+MAX_MESSAGE_BREAKPOINTS = 3
+
+Prompt = Union[str, List[Dict]]
+
+# Token totals of the innermost token_meter(); asyncio tasks share the parent's dict
+_meter: contextvars.ContextVar = contextvars.ContextVar("swiftgen_token_meter", default=None)
+
+
+def block(text: str, cache: bool = False) -> Dict:
+    return {"text": text, "cache": cache}
+
+
+def blocks(prompt: Prompt) -> List[Dict]:
+    """Normalize a plain-string prompt to a single uncached block"""
+    return [block(prompt)] if isinstance(prompt, str) else prompt
+
+
+def to_text(prompt: Prompt) -> str:
+    return "\n\n".join(b["text"] for b in blocks(prompt) if b["text"])
+
+
+def anthropic_system(system_prompt: str) -> List[Dict]:
+    return [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+
+
+def anthropic_content(prompt: Prompt) -> List[Dict]:
+    """Message content blocks with breakpoints on the last (longest) cacheable prefixes"""
+    parts = [b for b in blocks(prompt) if b["text"]]
+    cached = [i for i, b in enumerate(parts) if b["cache"]][-MAX_MESSAGE_BREAKPOINTS:]
+    content = []
+    for i, b in enumerate(parts):
+        entry = {"type": "text", "text": b["text"]}
+        if i in cached:
+            entry["cache_control"] = CACHE_CONTROL
+        content.append(entry)
+    return content
+
+
+def record_usage(provider: str, payload: Dict) -> Dict[str, int]:
+    """Attach token usage, including cache reads and writes, to the current span and metrics"""
+    usage = tracing.token_usage(payload)
+    tracing.set_attributes(**usage)
+    meter = _meter.get()
+    if meter is not None:
+        meter["input_tokens"] += usage["input_tokens"]
+        meter["output_tokens"] += usage["output_tokens"]
+    uncached = usage["input_tokens"] - usage["cached_input_tokens"] - usage["cache_write_tokens"]
+    metrics.LLM_INPUT_TOKENS_TOTAL.inc(usage["cached_input_tokens"], provider=provider, cache="read")
+    metrics.LLM_INPUT_TOKENS_TOTAL.inc(usage["cache_write_tokens"], provider=provider, cache="write")
+    metrics.LLM_INPUT_TOKENS_TOTAL.inc(max(0, uncached), provider=provider, cache="uncached")
+    if usage["cached_input_tokens"] or usage["cache_write_tokens"]:
+        print(f"[PROMPT CACHE] {provider}: {usage['cached_input_tokens']} cached, "
+              f"{usage['cache_write_tokens']} written, {max(0, uncached)} uncached input tokens")
+    return usage
+
+
+@contextmanager
+def token_meter() -> Iterator[Dict[str, int]]:
+    """Sum the tokens of every LLM call recorded inside the block"""
+    meter = {"input_tokens": 0, "output_tokens": 0}
+    token = _meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _meter.reset(token)
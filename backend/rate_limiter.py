@@ -0,0 +1,223 @@
+"""
+Per-provider rate limiting for LLM calls.
+
+Each provider gets a requests/minute and a tokens/minute token bucket shared by
+every caller in the process. Callers queue in arrival order, so concurrent
+generations, modifications and recoveries get provider capacity fairly instead
+of racing. 429/529 responses pause the whole provider for Retry-After (or an
+exponential backoff with jitter) and the request is retried.
+
+Limits come from SWIFTGEN_<PROVIDER>_RPM and SWIFTGEN_<PROVIDER>_TPM, e.g.
+SWIFTGEN_ANTHROPIC_RPM=50.
+"""
+
+import os
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+import metrics
+import tracing
+import circuit_breaker
+
+# Status codes that mean "slow down", not "your request is wrong"
+THROTTLE_STATUS_CODES = {429, 529, 503}
+
+DEFAULT_LIMITS = {
+    "anthropic": (50, 80000),
+    "openai": (60, 150000),
+    "xai": (60, 100000),
+}
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available; requests larger than capacity wait for a full bucket"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class ProviderLimiter:
+    """Request and token budgets for one provider, granted in FIFO order"""
+
+    def __init__(self, provider: str, requests_per_minute: float, tokens_per_minute: float):
+        self.provider = provider
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        # asyncio.Lock wakes waiters in the order they arrived, which is what makes this fair
+        self._queue = asyncio.Lock()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self.throttled = 0
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Wait for capacity; returns the seconds spent waiting"""
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._queue:
+                while True:
+                    delay = max(
+                        self.paused_until - time.monotonic(),
+                        self.requests.wait_time(1),
+                        self.tokens.wait_time(estimated_tokens)
+                    )
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self.requests.consume(1)
+                self.tokens.consume(estimated_tokens)
+        finally:
+            self.waiting -= 1
+        return time.monotonic() - start
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once the provider reports real usage"""
+        if actual_tokens < estimated_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+        elif actual_tokens > estimated_tokens:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds: float):
+        """Hold every queued request for this provider, e.g. after a 429"""
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def get_stats(self) -> Dict:
+        return {
+            "requests_available": round(self.requests.tokens, 2),
+            "tokens_available": round(self.tokens.tokens),
+            "waiting": self.waiting,
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "throttled_responses": self.throttled
+        }
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Retry-After in seconds (delta-seconds or HTTP-date form), if present"""
+    value = headers.get("retry-after") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough input tokens (4 chars each) plus the output budget"""
+    return len(prompt) // 4 + max_tokens
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    if provider not in _limiters:
+        default_rpm, default_tpm = DEFAULT_LIMITS.get(provider, (60, 100000))
+        _limiters[provider] = ProviderLimiter(
+            provider,
+            float(os.getenv(f"SWIFTGEN_{provider.upper()}_RPM", default_rpm)),
+            float(os.getenv(f"SWIFTGEN_{provider.upper()}_TPM", default_tpm))
+        )
+    return _limiters[provider]
+
+
+def get_stats() -> Dict[str, Dict]:
+    return {provider: limiter.get_stats() for provider, limiter in _limiters.items()}
+
+
+async def send(provider: str, request: Callable[[], Awaitable], estimated_tokens: int, max_attempts: int = 4):
+    """Run an httpx request under the provider's limits and circuit breaker, retrying throttled responses.
+
+    Raises CircuitOpenError without calling the provider while its breaker is open.
+    Returns the final response; callers handle non-200 statuses as before.
+    """
+    breaker = circuit_breaker.get_breaker(provider)
+    breaker.before_call()
+
+    limiter = get_limiter(provider)
+    waited = 0.0
+    response = None
+    start = time.monotonic()
+
+    try:
+        for attempt in range(max_attempts):
+            waited += await limiter.acquire(estimated_tokens)
+            try:
+                response = await request()
+            except Exception as e:
+                outcome = "timeout" if "Timeout" in type(e).__name__ else "error"
+                breaker.record_failure(outcome, time.monotonic() - start - waited)
+                raise
+
+            if response.status_code not in THROTTLE_STATUS_CODES:
+                if response.status_code == 200:
+                    try:
+                        usage = tracing.token_usage(response.json())
+                        limiter.settle(estimated_tokens, usage["input_tokens"] + usage["output_tokens"])
+                    except ValueError:
+                        pass
+                break
+
+            metrics.LLM_THROTTLED_TOTAL.inc(provider=provider, status=str(response.status_code))
+            if attempt == max_attempts - 1:
+                break
+
+            delay = backoff_delay(attempt, parse_retry_after(response.headers))
+            print(f"[RATE LIMIT] {provider} returned {response.status_code}, "
+                  f"backing off {delay:.1f}s (attempt {attempt + 1}/{max_attempts})")
+            limiter.pause(delay)
+    except asyncio.CancelledError:
+        # A cancelled call (e.g. the losing side of a hedge) says nothing about provider health
+        breaker.release_probe()
+        raise
+
+    latency = time.monotonic() - start - waited
+    if response.status_code == 200:
+        breaker.record_success(latency)
+    elif response.status_code in THROTTLE_STATUS_CODES or response.status_code >= 500:
+        breaker.record_failure(f"http_{response.status_code}", latency)
+    else:
+        # A 4xx says the request was wrong, not that the provider is unhealthy
+        breaker.release_probe()
+
+    metrics.LLM_RATE_LIMIT_WAIT_SECONDS.observe(waited, provider=provider)
+    tracing.set_attributes(rate_limit_wait_ms=round(waited * 1000, 1), attempts=attempt + 1)
+    return response
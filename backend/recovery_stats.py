@@ -0,0 +1,133 @@
+"""
+Measured outcomes of error recovery strategies, per error category.
+
+For every strategy and error category from RobustErrorRecoverySystem._analyze_errors
+this keeps how often the strategy ran, how often it produced a fix, how often the
+rebuild after that fix was green, and the time and tokens it spent. Strategies
+are ordered by green builds per second of recovery time, which minimizes the
+expected time to a green build when they are tried one after another. A strategy
+that has never produced a green build after SWIFTGEN_RECOVERY_SKIP_AFTER (default
+8) attempts for a request's error categories is skipped, except with probability
+SWIFTGEN_RECOVERY_EXPLORATION (default 0.1) so it can prove itself again.
+
+Statistics persist to <workspaces>/recovery_stats.json across restarts.
+"""
+
+import os
+import random
+from typing import Dict, List, Optional
+
+import settings
+from outcome_stats import OutcomeCounters, PersistedStats, smoothed_latency, smoothed_rate
+
+
+class StrategyStats(OutcomeCounters):
+    """Outcome counters for one strategy on one error category"""
+
+    FIELDS = ("attempts", "fixes", "greens", "latency_total", "tokens_total")
+
+    def green_probability(self) -> float:
+        """Laplace-smoothed chance that running the strategy ends in a green build"""
+        return smoothed_rate(self.greens, self.attempts)
+
+    def mean_latency(self) -> float:
+        return smoothed_latency(self.latency_total, self.attempts)
+
+    def score(self) -> float:
+        """Green builds per second; sorting by it minimizes expected time-to-green"""
+        return self.green_probability() / self.mean_latency()
+
+
+class RecoveryStats:
+    def __init__(self, state_path: Optional[str] = None, exploration_rate: float = 0.1, skip_after: int = 8):
+        self.exploration_rate = exploration_rate
+        self.skip_after = skip_after
+        # Error category -> strategy -> counters
+        self._table = PersistedStats(StrategyStats, state_path, "RECOVERY STATS")
+        self._stats = self._table.table
+        self._pending: Dict[str, Dict] = {}
+        self.skips = 0
+
+    def order(self, strategies: List[str], categories: List[str], fixed_last: List[str] = ()) -> List[str]:
+        """Strategies best-first for these error categories, without those not worth trying.
+
+        Names in fixed_last keep their place at the end and are never skipped.
+        """
+        movable = [name for name in strategies if name not in fixed_last]
+        kept = []
+        for name in movable:
+            pooled = self._pooled(name, categories)
+            if (pooled.attempts >= self.skip_after and pooled.greens == 0
+                    and random.random() >= self.exploration_rate):
+                self.skips += 1
+                print(f"[RECOVERY STATS] Skipping {name}: no green build in {pooled.attempts} attempts on {categories}")
+                continue
+            kept.append(name)
+        # Stable sort: strategies without history keep their default order
+        kept.sort(key=lambda name: -self._pooled(name, categories).score())
+        return kept + [name for name in strategies if name in fixed_last]
+
+    def record_attempt(self, strategy: str, categories: List[str], latency: float, tokens: int,
+                       fixed: bool, build_key: Optional[str] = None):
+        """A strategy ran; a fix stays pending until record_build reports the rebuild"""
+        with self._table.lock:
+            for category in categories:
+                stats = self._table.get(category, strategy)
+                stats.attempts += 1
+                stats.latency_total += latency
+                stats.tokens_total += tokens
+                if fixed:
+                    stats.fixes += 1
+            if fixed and build_key:
+                self._pending[build_key] = {"strategy": strategy, "categories": list(categories)}
+        self._table.save_soon()
+
+    def record_build(self, build_key: str, success: bool):
+        """The rebuild after a fix for build_key finished"""
+        with self._table.lock:
+            pending = self._pending.pop(build_key, None)
+            if not pending or not success:
+                return
+            for category in pending["categories"]:
+                self._table.get(category, pending["strategy"]).greens += 1
+        self._table.save_soon()
+
+    def get_stats(self) -> Dict:
+        categories = {}
+        for category, by_strategy in self._stats.items():
+            categories[category] = {
+                strategy: {
+                    **stats.to_dict(),
+                    "latency_total": round(stats.latency_total, 2),
+                    "green_probability": round(stats.green_probability(), 3),
+                    "mean_latency": round(stats.mean_latency(), 2),
+                    "mean_tokens": round(stats.tokens_total / stats.attempts) if stats.attempts else 0,
+                    "score": round(stats.score(), 5)
+                }
+                for strategy, stats in by_strategy.items()
+            }
+        return {
+            "exploration_rate": self.exploration_rate,
+            "skip_after": self.skip_after,
+            "skips": self.skips,
+            "pending_builds": len(self._pending),
+            "categories": categories,
+            "ranking": {
+                category: sorted(by_strategy, key=lambda name: -by_strategy[name].score())
+                for category, by_strategy in self._stats.items()
+            }
+        }
+
+    def _pooled(self, strategy: str, categories: List[str]) -> StrategyStats:
+        """Counters summed over the categories present, without creating entries"""
+        pooled = StrategyStats()
+        for category in categories:
+            pooled.add(self._table.peek(category, strategy))
+        return pooled
+
+
+stats = RecoveryStats(
+    settings.workspaces_path("recovery_stats.json"),
+    exploration_rate=float(os.getenv("SWIFTGEN_RECOVERY_EXPLORATION", 0.1)),
+    skip_after=int(os.getenv("SWIFTGEN_RECOVERY_SKIP_AFTER", 8))
+)
@@ -0,0 +1,215 @@
+"""
+Build diagnostics from xcodebuild result bundles (-resultBundlePath).
+
+xcresulttool turns a result bundle into JSON: errors and warnings with exact
+source locations, and the build log with a duration for every compile step.
+Xcode 16 has `xcresulttool get build-results` and `get log`; older versions only
+have the generic object graph (`get --format json`, now `get --legacy`), where
+every value is wrapped as {"_value": ...} or {"_values": [...]}. Both are parsed.
+
+Recorded xcresulttool output lives in fixtures/xcresult, so the parsers can be
+checked anywhere:
+
+    python result_bundle.py fixtures/xcresult/build_results_failed.json --log fixtures/xcresult/build_log.json
+"""
+
+import os
+import re
+import sys
+import json
+import asyncio
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cassette
+import diagnostics
+from diagnostics import Diagnostic
+
+# "Compile ContentView.swift (arm64)", "Compile ContentView.swift (in target 'App' ...)", "SwiftCompile normal arm64 ..."
+COMPILE_TITLE = re.compile(r'^(?:Compile|Compiling|SwiftCompile)\b.*?([\w+\-.]+\.swift)\b')
+# Generic driver failures that only repeat the located errors
+COMMAND_FAILED = re.compile(r'^Command \S+ failed with a nonzero exit code$')
+
+
+@dataclass
+class BundleResults:
+    errors: List[Diagnostic] = field(default_factory=list)
+    warnings: List[Diagnostic] = field(default_factory=list)
+    compile_seconds: Dict[str, float] = field(default_factory=dict)  # Source file name -> summed over architectures
+
+    def slowest_files(self, count: int = 3) -> List[Tuple[str, float]]:
+        return sorted(self.compile_seconds.items(), key=lambda item: -item[1])[:count]
+
+
+def _v(value: Any) -> Any:
+    """Unwrap legacy {"_value": x} / {"_values": [...]} wrappers; other values pass through"""
+    if isinstance(value, dict):
+        if "_value" in value:
+            return value["_value"]
+        if "_values" in value:
+            return value["_values"]
+    return value
+
+
+def _issue(severity: str, message: str, url: Optional[str]) -> Diagnostic:
+    """Diagnostic from an issue message and its document URL (line and column numbers in it are 0-based)"""
+    if not url:
+        return Diagnostic(None, None, None, severity, message, [], [])
+    parsed = urlparse(url)
+    location = {key: values[0] for key, values in parse_qs(parsed.fragment).items()}
+    line = location.get("StartingLineNumber")
+    column = location.get("StartingColumnNumber")
+    return Diagnostic(
+        unquote(parsed.path) or None,
+        int(line) + 1 if line is not None else None,
+        int(column) + 1 if column is not None else None,
+        severity, message, [], []
+    )
+
+
+def _without_command_failures(found: List[Diagnostic]) -> List[Diagnostic]:
+    if any(d.file for d in found):
+        return [d for d in found if d.file or not COMMAND_FAILED.match(d.message)]
+    return found
+
+
+def parse_build_results(data: Dict) -> Tuple[List[Diagnostic], List[Diagnostic]]:
+    """Errors and warnings from `xcresulttool get build-results` (Xcode 16+)"""
+    found = {}
+    for key, severity in (("errors", "error"), ("warnings", "warning")):
+        found[severity] = _without_command_failures([
+            _issue(severity, issue.get("message", ""), issue.get("sourceURL"))
+            for issue in data.get(key) or []
+        ])
+    return found["error"], found["warning"]
+
+
+def parse_legacy_results(data: Dict) -> Tuple[List[Diagnostic], List[Diagnostic]]:
+    """Errors and warnings from the legacy ActionsInvocationRecord"""
+    issues = data.get("issues") or {}
+    found = {}
+    for key, severity in (("errorSummaries", "error"), ("warningSummaries", "warning")):
+        summaries = _v(issues.get(key)) or []
+        found[severity] = _without_command_failures([
+            _issue(severity, _v(summary.get("message")) or "",
+                   _v((summary.get("documentLocationInCreatingWorkspace") or {}).get("url")))
+            for summary in summaries
+        ])
+    return found["error"], found["warning"]
+
+
+def legacy_log_id(data: Dict) -> Optional[str]:
+    """ID of the build log object in a legacy ActionsInvocationRecord"""
+    for action in _v(data.get("actions")) or []:
+        log_ref = (action.get("buildResult") or {}).get("logRef")
+        if log_ref:
+            return _v(log_ref.get("id"))
+    return None
+
+
+def parse_build_log(data: Dict) -> Dict[str, float]:
+    """Seconds spent compiling each source file, from either log format"""
+    seconds: Dict[str, float] = {}
+
+    def visit(section: Dict):
+        match = COMPILE_TITLE.match(_v(section.get("title")) or "")
+        if match:
+            name = match.group(1)
+            seconds[name] = round(seconds.get(name, 0.0) + float(_v(section.get("duration")) or 0), 3)
+        for subsection in _v(section.get("subsections")) or []:
+            visit(subsection)
+
+    visit(data)
+    return seconds
+
+
+def with_text_details(structured: List[Diagnostic], scraped: List[Diagnostic]) -> List[Diagnostic]:
+    """Copy notes and fix-its that only the text output has onto the matching structured diagnostics"""
+    by_location = {(os.path.basename(d.file), d.line, d.message): d for d in scraped if d.file}
+    for d in structured:
+        match = by_location.get((os.path.basename(d.file), d.line, d.message)) if d.file else None
+        if match:
+            d.notes = match.notes
+            d.fixits = match.fixits
+    return structured
+
+
+async def _xcresulttool(*args: str) -> Optional[Dict]:
+    """JSON output of `xcrun xcresulttool <args>`, or None if this Xcode does not support the call"""
+    try:
+        process = await cassette.create_subprocess_exec(
+            'xcrun', 'xcresulttool', *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await process.communicate()
+        if process.returncode != 0:
+            return None
+        return json.loads(stdout.decode())
+    except (OSError, ValueError):
+        return None
+
+
+async def read(bundle_path: str, limit: int = 10) -> Optional[BundleResults]:
+    """Diagnostics and compile timings from a result bundle, or None if it could not be read"""
+    if not os.path.isdir(bundle_path):
+        return None
+
+    data = await _xcresulttool('get', 'build-results', '--path', bundle_path)
+    if data is not None:
+        errors, warnings = parse_build_results(data)
+        log = await _xcresulttool('get', 'log', '--type', 'build', '--path', bundle_path)
+    else:
+        # The object graph of Xcode 15 and earlier; later versions still answer behind --legacy
+        data = None
+        for legacy in (['--legacy'], []):
+            data = await _xcresulttool('get', *legacy, '--format', 'json', '--path', bundle_path)
+            if data is not None:
+                break
+        if data is None:
+            return None
+        errors, warnings = parse_legacy_results(data)
+        log_id = legacy_log_id(data)
+        log = await _xcresulttool('get', *legacy, '--format', 'json', '--path', bundle_path,
+                                 '--id', log_id) if log_id else None
+
+    return BundleResults(
+        errors=errors[:limit],
+        warnings=warnings[:limit],
+        compile_seconds=parse_build_log(log) if log else {}
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the diagnostics parsed from xcresulttool JSON or a result bundle")
+    parser.add_argument("source", help="a .xcresult bundle, or a JSON file of build-results / legacy xcresulttool output")
+    parser.add_argument("--log", help="JSON file of the build log (`get log --type build` or the legacy log object)")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        results = asyncio.run(read(args.source))
+        if results is None:
+            sys.exit(f"Could not read {args.source}")
+    else:
+        with open(args.source, 'r') as f:
+            data = json.load(f)
+        errors, warnings = parse_legacy_results(data) if "issues" in data else parse_build_results(data)
+        results = BundleResults(errors=errors, warnings=warnings)
+        if args.log:
+            with open(args.log, 'r') as f:
+                results.compile_seconds = parse_build_log(json.load(f))
+
+    print(json.dumps({
+        "errors": [d.to_dict() for d in results.errors],
+        "warnings": [d.to_dict() for d in results.warnings],
+        "compile_seconds": results.compile_seconds,
+        "text": diagnostics.format_all(results.errors)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,18 @@ import time
 from typing import Dict, List, Tuple, Optional, Any
 from datetime import datetime
 
+import metrics
+import tracing
+import cassette
+import rate_limiter
+import circuit_breaker
+import llm_router
+import prompt_cache
+import recovery_stats
+import diagnostics
+from diagnostics import Diagnostic
+import settings
+
 # Import AI services
 try:
     import openai
@@ -26,6 +38,20 @@ try:
 except ImportError:
     httpx = None
 
+# LLM-backed strategies and the multi-LLM name the router and circuit breakers know them by
+STRATEGY_LLMS = {
+    "_claude_recovery": "claude",
+    "_openai_recovery": "gpt4",
+    "_xai_recovery": "xai",
+}
+
+# Declarations worth showing as context for another file; bodies are left out
+SIGNATURE_LINE = re.compile(
+    r'^\s{0,4}(?:@\w+(?:\([^)]*\))?\s+)*(?:(?:public|private|fileprivate|internal|static|final|mutating|override)\s+)*'
+    r'(?:struct|class|enum|protocol|extension|func|var|let|init|case|typealias)\b'
+)
+TYPE_DECLARATION = re.compile(r'^(?:\w+\s+)*(?:struct|class|enum|protocol)\s+(\w+)', re.MULTILINE)
+
 
 class RobustErrorRecoverySystem:
     """Multi-model error recovery system for Swift build errors"""
@@ -44,6 +70,10 @@ class RobustErrorRecoverySystem:
         self.attempt_count = 0
         self.max_attempts = 3
 
+        # Per-file recovery: one small concurrent request per failing file
+        self.per_file_enabled = settings.env_flag("SWIFTGEN_PER_FILE_RECOVERY")
+        self.file_concurrency = int(os.getenv("SWIFTGEN_RECOVERY_FILE_CONCURRENCY", 4))
+
         # Load error patterns
         self.error_patterns = self._load_error_patterns()
 
@@ -132,6 +162,10 @@ class RobustErrorRecoverySystem:
         # Always try simple pattern-based fixes first (fastest)
         strategies.append(self._pattern_based_recovery)
 
+        # Fix each failing file in parallel before sending everything in one request
+        if self.per_file_enabled and self._recovery_llms():
+            strategies.append(self._per_file_recovery)
+
         # Then try LLMs based on availability and strengths
         if self.claude_service:
             strategies.append(self._claude_recovery)  # Best for complex Swift/SwiftUI issues
@@ -154,7 +188,7 @@ class RobustErrorRecoverySystem:
 
         return strategies
 
-    async def recover_from_errors(self, errors: List[str], swift_files: List[Dict],
+    async def recover_from_errors(self, errors: List[Diagnostic], swift_files: List[Dict],
                                   project_path: str) -> Tuple[bool, List[Dict]]:
         """Main entry point for error recovery"""
 
@@ -167,23 +201,43 @@ class RobustErrorRecoverySystem:
 
         # Analyze errors
         error_analysis = self._analyze_errors(errors)
-        self.logger.info(f"Error types detected: {error_analysis}")
-
-        # Determine best LLM for these errors
-        preferred_llm = self._analyze_errors_for_llm_selection(errors)
-        self.logger.info(f"Preferred LLM for these errors: {preferred_llm}")
+        self.logger.info(f"Error types detected: { {category: len(found) for category, found in error_analysis.items()} }")
 
-        # Try recovery strategies in order
-        for strategy in self.recovery_strategies:
+        # Try recovery strategies in order of measured time-to-green for these error categories
+        categories = list(error_analysis) or ["other"]
+        for strategy in self._order_strategies(categories):
             strategy_name = strategy.__name__
+            llm = STRATEGY_LLMS.get(strategy_name)
+            if llm and not circuit_breaker.get_breaker(circuit_breaker.LLM_PROVIDERS[llm]).is_available():
+                self.logger.info(f"Skipping strategy {strategy_name}: {llm} circuit is open")
+                continue
             self.logger.info(f"Attempting strategy: {strategy_name}")
 
             start_time = time.time()
             try:
-                if asyncio.iscoroutinefunction(strategy):
-                    success, modified_files = await strategy(errors, swift_files, error_analysis)
-                else:
-                    success, modified_files = strategy(errors, swift_files, error_analysis)
+                with tracing.span("recovery.strategy", strategy=strategy_name) as strategy_span, \
+                        metrics.RECOVERY_STRATEGY_SECONDS.time(strategy=strategy_name, outcome="success") as timer, \
+                        prompt_cache.token_meter() as tokens:
+                    try:
+                        if asyncio.iscoroutinefunction(strategy):
+                            success, modified_files = await strategy(errors, swift_files, error_analysis)
+                        else:
+                            success, modified_files = strategy(errors, swift_files, error_analysis)
+                    except Exception:
+                        recovery_stats.stats.record_attempt(
+                            strategy_name, categories, time.time() - start_time,
+                            tokens["input_tokens"] + tokens["output_tokens"], False
+                        )
+                        raise
+                    strategy_span.set_attribute("success", bool(success))
+                    if not success:
+                        timer.labels["outcome"] = "unresolved"
+                recovery_stats.stats.record_attempt(
+                    strategy_name, categories, time.time() - start_time,
+                    tokens["input_tokens"] + tokens["output_tokens"], bool(success), build_key=project_path
+                )
+                if llm:
+                    llm_router.router.record_recovery(llm, time.time() - start_time, bool(success))
 
                 if success:
                     elapsed = time.time() - start_time
@@ -193,6 +247,8 @@ class RobustErrorRecoverySystem:
                     self.logger.info(f"Strategy {strategy_name} did not resolve the issues")
 
             except Exception as e:
+                if llm:
+                    llm_router.router.record_recovery(llm, time.time() - start_time, False)
                 self.logger.error(f"Strategy {strategy_name} failed with error: {e}")
                 import traceback
                 traceback.print_exc()
@@ -201,7 +257,11 @@ class RobustErrorRecoverySystem:
         self.logger.warning("All recovery strategies exhausted")
         return False, swift_files
 
-    def _analyze_errors(self, errors: List[str]) -> Dict[str, List[str]]:
+    def record_build_result(self, project_path: str, success: bool):
+        """Report the rebuild after a returned fix, so strategies are credited with green builds"""
+        recovery_stats.stats.record_build(project_path, success)
+
+    def _analyze_errors(self, errors: List[Diagnostic]) -> Dict[str, List[Diagnostic]]:
         """Analyze and categorize errors"""
 
         analysis = {
@@ -220,7 +280,7 @@ class RobustErrorRecoverySystem:
             # Check against known patterns
             for error_type, pattern_info in self.error_patterns.items():
                 for pattern in pattern_info.get("patterns", []):
-                    if pattern in error.lower():
+                    if pattern in error.message.lower():
                         if error_type in analysis:
                             analysis[error_type].append(error)
                             categorized = True
@@ -234,32 +294,29 @@ class RobustErrorRecoverySystem:
         # Remove empty categories
         return {k: v for k, v in analysis.items() if v}
 
-    def _analyze_errors_for_llm_selection(self, errors: List[str]) -> str:
-        """Analyze errors to determine which LLM might be best"""
+    def _order_strategies(self, categories: List[str]) -> List:
+        """Strategies by measured success and cost for these categories; the last resort stays last"""
+        by_name = {s.__name__: s for s in self._order_llm_strategies(self.recovery_strategies)}
+        ordered = recovery_stats.stats.order(list(by_name), categories, fixed_last=["_last_resort_recovery"])
+        self.logger.info(f"Strategy order for {categories}: {ordered}")
+        return [by_name[name] for name in ordered]
 
-        # Count error types
-        swift_ui_errors = sum(1 for e in errors if 'SwiftUI' in e or 'View' in e or '@Environment' in e)
-        syntax_errors = sum(1 for e in errors if 'syntax' in e.lower() or 'expected' in e)
-        type_errors = sum(1 for e in errors if 'type' in e or 'generic' in e)
+    def _order_llm_strategies(self, strategies: List) -> List:
+        """Put the LLM strategies in the router's order for recovery, leaving the others in place"""
+        by_llm = {STRATEGY_LLMS[s.__name__]: s for s in strategies if s.__name__ in STRATEGY_LLMS}
+        ranked = iter(llm_router.router.rank(list(by_llm), "recover"))
+        return [by_llm[next(ranked)] if s.__name__ in STRATEGY_LLMS else s for s in strategies]
 
-        # Determine best LLM based on error types
-        if swift_ui_errors > syntax_errors:
-            return "claude"  # Claude is best for SwiftUI
-        elif syntax_errors > type_errors:
-            return "openai"  # GPT-4 is good for general syntax
-        else:
-            return "any"  # Any LLM can handle it
-
-    def _pattern_based_recovery(self, errors: List[str], swift_files: List[Dict],
+    def _pattern_based_recovery(self, errors: List[Diagnostic], swift_files: List[Dict],
                                 error_analysis: Dict) -> Tuple[bool, List[Dict]]:
         """Pattern-based recovery for common Swift errors"""
 
         self.logger.info("Attempting pattern-based recovery")
 
         # Check for specific error patterns
-        has_environment_error = any("generic parameter" in error and "Environment" in error for error in errors)
-        has_single_quote_error = any("single-quoted string literal" in error for error in errors)
-        has_double_quote_error = any("unterminated string literal" in error for error in errors)
+        has_environment_error = any("generic parameter" in e.message and "Environment" in e.message for e in errors)
+        has_single_quote_error = any("single-quoted string literal" in e.message for e in errors)
+        has_double_quote_error = any("unterminated string literal" in e.message for e in errors)
 
         modified_files = []
         total_fixes_applied = 0
@@ -319,8 +376,8 @@ class RobustErrorRecoverySystem:
         self.logger.info("Pattern-based recovery made no changes")
         return False, swift_files
 
-    async def _claude_recovery(self, errors: List[str], swift_files: List[Dict],
-                               error_analysis: Dict) -> Tuple[bool, List[Dict]]:
+    async def _claude_recovery(self, errors: List[Diagnostic], swift_files: List[Dict],
+                               error_analysis: Dict, reference_signatures: str = "") -> Tuple[bool, List[Dict]]:
         """Use Claude for intelligent recovery - THIS SHOULD BE OUR BEST OPTION"""
 
         if not self.claude_service:
@@ -331,7 +388,7 @@ class RobustErrorRecoverySystem:
 
         try:
             # Send ALL the errors and files to Claude
-            result = await self.claude_service.analyze_build_errors(errors, swift_files)
+            result = await self.claude_service.analyze_build_errors(errors, swift_files, reference_signatures)
 
             if result and "files" in result:
                 self.logger.info(f"Claude fixed errors: {result.get('fixes_applied', [])}")
@@ -346,8 +403,8 @@ class RobustErrorRecoverySystem:
 
         return False, swift_files
 
-    async def _openai_recovery(self, errors: List[str], swift_files: List[Dict],
-                               error_analysis: Dict) -> Tuple[bool, List[Dict]]:
+    async def _openai_recovery(self, errors: List[Diagnostic], swift_files: List[Dict],
+                               error_analysis: Dict, reference_signatures: str = "") -> Tuple[bool, List[Dict]]:
         """Use OpenAI GPT-4 for recovery with enhanced prompting"""
 
         if not self.openai_key or not AsyncOpenAI:
@@ -357,15 +414,20 @@ class RobustErrorRecoverySystem:
         self.logger.info("Attempting OpenAI GPT-4 recovery")
 
         try:
-            client = AsyncOpenAI(api_key=self.openai_key)
+            transport = cassette.http_transport()
+            client = AsyncOpenAI(
+                api_key=self.openai_key,
+                base_url=os.getenv("OPENAI_BASE_URL"),
+                http_client=httpx.AsyncClient(timeout=60.0, transport=transport) if transport and httpx else None
+            )
 
             # Create a detailed prompt for GPT-4
-            error_text = "\n".join(errors)
+            error_text = diagnostics.format_all(errors)
 
             # Include files with errors
             code_context = ""
             for file in swift_files:
-                if any(file["path"] in error for error in errors):
+                if any(error.in_file(file["path"]) for error in errors):
                     code_context += f"\nFile: {file['path']}\n```swift\n{file['content']}\n```\n"
 
             messages = [
@@ -381,13 +443,8 @@ Key rules:
                 },
                 {
                     "role": "user",
-                    "content": f"""Fix these Swift build errors:
-
-ERRORS:
-{error_text}
-
-CURRENT CODE:
-{code_context}
+                    # Static text first, then code, then errors: OpenAI caches repeated prefixes
+                    "content": f"""Fix the Swift build errors listed at the end of this message.
 
 Return a JSON object with this structure:
 {{
@@ -398,17 +455,46 @@ Return a JSON object with this structure:
         }}
     ],
     "fixes_applied": ["List of fixes made"]
-}}"""
+}}
+
+CURRENT CODE:
+{code_context}
+{self._signatures_section(reference_signatures)}
+ERRORS:
+{error_text}"""
                 }
             ]
 
-            response = await client.chat.completions.create(
-                model="gpt-4-turbo-preview",  # or "gpt-4" or "gpt-3.5-turbo"
-                messages=messages,
-                temperature=0.3,
-                max_tokens=4000,
-                response_format={"type": "json_object"}  # Force JSON response
-            )
+            with tracing.span("llm.request", provider="openai", model="gpt-4-turbo-preview"), \
+                    metrics.LLM_REQUEST_SECONDS.time(
+                        metrics.LLM_REQUESTS_TOTAL, provider="openai", model="gpt-4-turbo-preview", outcome="success"
+                    ):
+                # The OpenAI client retries 429s itself (honoring Retry-After); we only share capacity
+                breaker = circuit_breaker.get_breaker("openai")
+                breaker.before_call()
+                limiter = rate_limiter.get_limiter("openai")
+                estimated_tokens = rate_limiter.estimate_tokens(json.dumps(messages), 4000)
+                call_start = time.monotonic()
+                try:
+                    call_start += await limiter.acquire(estimated_tokens)
+                    response = await client.chat.completions.create(
+                        model="gpt-4-turbo-preview",  # or "gpt-4" or "gpt-3.5-turbo"
+                        messages=messages,
+                        temperature=0.3,
+                        max_tokens=4000,
+                        response_format={"type": "json_object"}  # Force JSON response
+                    )
+                except asyncio.CancelledError:
+                    breaker.release_probe()
+                    raise
+                except Exception as e:
+                    outcome = "timeout" if "Timeout" in type(e).__name__ else "error"
+                    breaker.record_failure(outcome, time.monotonic() - call_start)
+                    raise
+                breaker.record_success(time.monotonic() - call_start)
+                if response.usage:
+                    prompt_cache.record_usage("openai", {"usage": response.usage.model_dump()})
+                    limiter.settle(estimated_tokens, response.usage.total_tokens)
 
             content = response.choices[0].message.content
             self.logger.info("GPT-4 response received")
@@ -432,8 +518,8 @@ Return a JSON object with this structure:
 
         return False, swift_files
 
-    async def _xai_recovery(self, errors: List[str], swift_files: List[Dict],
-                            error_analysis: Dict) -> Tuple[bool, List[Dict]]:
+    async def _xai_recovery(self, errors: List[Diagnostic], swift_files: List[Dict],
+                            error_analysis: Dict, reference_signatures: str = "") -> Tuple[bool, List[Dict]]:
         """Use xAI (Grok) for recovery"""
 
         if not self.xai_key or not httpx:
@@ -444,7 +530,7 @@ Return a JSON object with this structure:
 
         try:
             # xAI API endpoint (update with actual endpoint when available)
-            url = "https://api.x.ai/v1/chat/completions"
+            url = f"{os.getenv('XAI_BASE_URL', 'https://api.x.ai/v1')}/chat/completions"
 
             headers = {
                 "Authorization": f"Bearer {self.xai_key}",
@@ -452,7 +538,7 @@ Return a JSON object with this structure:
             }
 
             # Create prompt similar to other LLMs
-            prompt = self._create_error_fix_prompt(errors, swift_files, error_analysis)
+            prompt = self._create_error_fix_prompt(errors, swift_files, error_analysis, reference_signatures)
 
             data = {
                 "model": "grok-1",  # or whatever model name xAI uses
@@ -470,8 +556,21 @@ Return a JSON object with this structure:
                 "max_tokens": 4000
             }
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(url, headers=headers, json=data)
+            async with httpx.AsyncClient(timeout=60.0, transport=cassette.http_transport()) as client:
+                with tracing.span("llm.request", provider="xai", model=data["model"]) as llm_span, \
+                        metrics.LLM_REQUEST_SECONDS.time(
+                            metrics.LLM_REQUESTS_TOTAL, provider="xai", model=data["model"], outcome="success"
+                        ) as timer:
+                    response = await rate_limiter.send(
+                        "xai",
+                        lambda: client.post(url, headers=headers, json=data),
+                        rate_limiter.estimate_tokens(json.dumps(data["messages"]), data["max_tokens"])
+                    )
+                    llm_span.set_attribute("status_code", response.status_code)
+                    if response.status_code != 200:
+                        timer.labels["outcome"] = f"http_{response.status_code}"
+                    else:
+                        prompt_cache.record_usage("xai", response.json())
 
                 if response.status_code == 200:
                     result = response.json()
@@ -495,7 +594,7 @@ Return a JSON object with this structure:
 
         return False, swift_files
 
-    async def _combined_recovery(self, errors: List[str], swift_files: List[Dict],
+    async def _combined_recovery(self, errors: List[Diagnostic], swift_files: List[Dict],
                                  error_analysis: Dict) -> Tuple[bool, List[Dict]]:
         """Combine insights from multiple models for better results"""
 
@@ -504,13 +603,16 @@ Return a JSON object with this structure:
         # Run multiple LLMs in parallel for faster results
         tasks = []
 
-        if self.claude_service:
+        def available(llm: str) -> bool:
+            return circuit_breaker.get_breaker(circuit_breaker.LLM_PROVIDERS[llm]).is_available()
+
+        if self.claude_service and available("claude"):
             tasks.append(('claude', self._claude_recovery(errors, swift_files, error_analysis)))
 
-        if self.openai_key:
+        if self.openai_key and available("gpt4"):
             tasks.append(('openai', self._openai_recovery(errors, swift_files, error_analysis)))
 
-        if self.xai_key:
+        if self.xai_key and available("xai"):
             tasks.append(('xai', self._xai_recovery(errors, swift_files, error_analysis)))
 
         if not tasks:
@@ -539,7 +641,109 @@ Return a JSON object with this structure:
 
         return True, results[0][1]
 
-    def _syntax_validator_recovery(self, errors: List[str], swift_files: List[Dict],
+    def _recovery_llms(self) -> List[str]:
+        return [llm for llm, configured in (("claude", self.claude_service), ("gpt4", self.openai_key),
+                                              ("xai", self.xai_key)) if configured]
+
+    async def _per_file_recovery(self, errors: List[Diagnostic], swift_files: List[Dict],
+                                 error_analysis: Dict) -> Tuple[bool, List[Dict]]:
+        """Fix each failing file with its own concurrent request and merge the fixed files"""
+
+        errors_by_file = self._group_errors_by_file(errors, swift_files)
+        if not errors_by_file:
+            self.logger.info("Per-file recovery: no errors could be attributed to a file")
+            return False, swift_files
+
+        llms = circuit_breaker.order_by_health(self._recovery_llms())
+        if not llms:
+            return False, swift_files
+        llm = llm_router.router.choose(llms, "recover")
+        strategy = {"claude": self._claude_recovery, "gpt4": self._openai_recovery, "xai": self._xai_recovery}[llm]
+        self.logger.info(f"Per-file recovery: {len(errors_by_file)} files with {llm}")
+
+        files_by_path = {file["path"]: file for file in swift_files}
+        slots = asyncio.Semaphore(self.file_concurrency)
+
+        async def fix_file(path: str, file_errors: List[Diagnostic]) -> Optional[str]:
+            target = files_by_path[path]
+            signatures = self._reference_signatures(target, swift_files)
+            async with slots:
+                start_time = time.time()
+                with tracing.span("recovery.file", path=path, llm=llm, errors=len(file_errors)) as file_span:
+                    try:
+                        success, fixed = await strategy(file_errors, [target], self._analyze_errors(file_errors),
+                                                        reference_signatures=signatures)
+                    except Exception as e:
+                        self.logger.error(f"Per-file recovery of {path} failed: {e}")
+                        success, fixed = False, []
+                    content = self._fixed_content(target, fixed) if success else None
+                    file_span.set_attribute("success", content is not None)
+                llm_router.router.record_recovery(llm, time.time() - start_time, content is not None)
+                return content
+
+        paths = list(errors_by_file)
+        contents = await asyncio.gather(*(fix_file(path, errors_by_file[path]) for path in paths))
+        fixed_contents = {path: content for path, content in zip(paths, contents) if content is not None}
+
+        if not fixed_contents:
+            self.logger.info("Per-file recovery fixed no files")
+            return False, swift_files
+
+        self.logger.info(f"Per-file recovery fixed {len(fixed_contents)}/{len(paths)} files: {list(fixed_contents)}")
+        return True, [
+            {**file, "content": fixed_contents[file["path"]]} if file["path"] in fixed_contents else file
+            for file in swift_files
+        ]
+
+    def _group_errors_by_file(self, errors: List[Diagnostic], swift_files: List[Dict]) -> Dict[str, List[Diagnostic]]:
+        """Map each file path to the errors located in it"""
+        grouped: Dict[str, List[Diagnostic]] = {}
+        for error in errors:
+            for file in swift_files:
+                if error.in_file(file["path"]):
+                    grouped.setdefault(file["path"], []).append(error)
+                    break
+        return grouped
+
+    def _reference_signatures(self, target: Dict, swift_files: List[Dict]) -> str:
+        """Declaration lines, without bodies, from other files whose types the target uses"""
+        sections = []
+        for file in sorted(swift_files, key=lambda f: f["path"]):
+            if file["path"] == target["path"]:
+                continue
+            type_names = TYPE_DECLARATION.findall(file["content"])
+            if not any(re.search(rf'\b{re.escape(name)}\b', target["content"]) for name in type_names):
+                continue
+            lines = [line.split("{")[0].rstrip() for line in file["content"].split("\n") if SIGNATURE_LINE.match(line)]
+            if lines:
+                sections.append(f"// {file['path']}\n" + "\n".join(lines))
+        return "\n\n".join(sections)
+
+    def _fixed_content(self, target: Dict, fixed_files: List[Dict]) -> Optional[str]:
+        """The new content for the target file from a strategy's result, if it changed"""
+        if not fixed_files:
+            return None
+        matches = [f for f in fixed_files if f.get("path") == target["path"]
+                   or os.path.basename(f.get("path", "")) == os.path.basename(target["path"])]
+        if not matches and len(fixed_files) == 1:
+            matches = fixed_files
+        content = matches[0].get("content") if matches else None
+        if not content or not content.strip() or content == target["content"]:
+            return None
+        return content
+
+    @staticmethod
+    def _signatures_section(reference_signatures: str) -> str:
+        if not reference_signatures:
+            return ""
+        return f"""
+REFERENCED DECLARATIONS (other files, for context only - do not return them):
+```swift
+{reference_signatures}
+```
+"""
+
+    def _syntax_validator_recovery(self, errors: List[Diagnostic], swift_files: List[Dict],
                                    error_analysis: Dict) -> Tuple[bool, List[Dict]]:
         """Use Swift syntax validator for recovery"""
 
@@ -548,25 +752,13 @@ Return a JSON object with this structure:
 
             self.logger.info("Attempting Swift syntax validator recovery")
 
-            validator = SwiftSyntaxValidator()
-            modified_files = []
-            total_fixes = 0
-
-            for file in swift_files:
-                content, fixes = validator.fix_swift_file(file["content"], file["path"])
-
-                if fixes:
-                    self.logger.info(f"Validator applied {len(fixes)} fixes to {file['path']}")
-                    for fix in fixes[:3]:  # Show first 3 fixes
-                        self.logger.info(f"  - {fix}")
-                    total_fixes += len(fixes)
-
-                modified_files.append({
-                    "path": file["path"],
-                    "content": content
-                })
+            # General fixes for every file, plus targeted ones at the reported diagnostics
+            modified_files = SwiftSyntaxValidator.analyze_and_fix_build_errors(errors, swift_files)
+            originals = {file["path"]: file["content"] for file in swift_files}
+            changed = [file["path"] for file in modified_files if file["content"] != originals.get(file["path"])]
 
-            if total_fixes > 0:
+            if changed:
+                self.logger.info(f"Validator changed {len(changed)} files: {changed}")
                 return True, modified_files
 
         except ImportError:
@@ -578,7 +770,7 @@ Return a JSON object with this structure:
 
         return False, swift_files
 
-    def _last_resort_recovery(self, errors: List[str], swift_files: List[Dict],
+    def _last_resort_recovery(self, errors: List[Diagnostic], swift_files: List[Dict],
                               error_analysis: Dict) -> Tuple[bool, List[Dict]]:
         """Last resort - create minimal working version"""
 
@@ -639,27 +831,28 @@ struct ContentView: View {
         self.logger.info("Created minimal working version")
         return True, minimal_files
 
-    def _create_error_fix_prompt(self, errors: List[str], swift_files: List[Dict],
-                                 error_analysis: Dict) -> str:
+    def _create_error_fix_prompt(self, errors: List[Diagnostic], swift_files: List[Dict],
+                                 error_analysis: Dict, reference_signatures: str = "") -> str:
         """Create prompt for AI models"""
 
         # Include all relevant code
         code_context = ""
         for file in swift_files:
-            if any(file["path"] in error for error in errors):
+            if any(error.in_file(file["path"]) for error in errors):
                 code_context += f"\nFile: {file['path']}\n```swift\n{file['content']}\n```\n"
 
+        analysis = {category: [e.message for e in found] for category, found in error_analysis.items()}
         prompt = f"""Fix these Swift build errors:
 
 ERRORS:
-{chr(10).join(errors)}
+{diagnostics.format_all(errors)}
 
 ERROR ANALYSIS:
-{json.dumps(error_analysis, indent=2)}
+{json.dumps(analysis, indent=2)}
 
 CODE:
 {code_context}
-
+{self._signatures_section(reference_signatures)}
 CRITICAL RULES:
 1. Use double quotes " not single quotes '
 2. Use @Environment(\.dismiss) not presentationMode
@@ -0,0 +1,31 @@
+"""
+Environment settings shared by the backend modules.
+
+Paths default to locations relative to this directory rather than the current
+working directory, so the server, batch_runner.py and the benchmarks all find
+the same workspaces wherever they are started from.
+"""
+
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def workspaces_dir() -> str:
+    """Absolute path of SWIFTGEN_WORKSPACES_DIR, by default ../workspaces next to the backend"""
+    return os.path.abspath(os.path.join(
+        BACKEND_DIR, os.getenv("SWIFTGEN_WORKSPACES_DIR", os.path.join("..", "workspaces"))
+    ))
+
+
+def workspaces_path(*parts: str) -> str:
+    """A path inside the workspaces directory"""
+    return os.path.join(workspaces_dir(), *parts)
+
+
+def env_flag(name: str, default: bool = True) -> bool:
+    """An on/off environment toggle; anything other than off, 0 or false counts as on"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() not in ("off", "0", "false")
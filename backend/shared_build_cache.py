@@ -0,0 +1,153 @@
+import os
+import time
+import shutil
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class SharedBuildCaches:
+    """Module and Swift package caches shared by every project's xcodebuild.
+
+    Each project has its own DerivedData, so without this every cold build
+    recompiles the Clang/Swift modules for SwiftUI and Foundation and fetches its
+    packages again. Builds point MODULE_CACHE_DIR and -packageCachePath here
+    instead. The compiler and SwiftPM lock their own cache entries, so concurrent
+    builds can share them. Eviction deletes files, so it only runs when no build
+    is using the caches: builds hold a shared flock on the lock file, eviction
+    takes it exclusively without waiting and is skipped if it cannot.
+
+    Measuring a cache walks every file in it, so the sizes in get_stats are the
+    ones the last eviction pass measured rather than walked again per request.
+    """
+
+    EVICT_INTERVAL_SECONDS = 600
+
+    def __init__(self, root: str, module_cache_max_bytes: int = 4 * 1024 ** 3,
+                 package_cache_max_bytes: int = 2 * 1024 ** 3):
+        self.root = root
+        self.module_cache_dir = os.path.join(root, "ModuleCache.noindex")
+        self.package_cache_dir = os.path.join(root, "PackageCache")
+        self.limits = {self.module_cache_dir: module_cache_max_bytes, self.package_cache_dir: package_cache_max_bytes}
+        self.lock_path = os.path.join(root, ".lock")
+        for path in (self.module_cache_dir, self.package_cache_dir):
+            os.makedirs(path, exist_ok=True)
+
+        self.builds = 0
+        self.active_builds = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._last_evict = 0.0
+        # Cache dir -> bytes after the last eviction pass, and when that was
+        self.sizes: Dict[str, int] = {}
+        self.sizes_measured_at: Optional[float] = None
+
+    def xcodebuild_args(self) -> List[str]:
+        return [
+            '-packageCachePath', self.package_cache_dir,
+            f'MODULE_CACHE_DIR={self.module_cache_dir}'
+        ]
+
+    @asynccontextmanager
+    async def in_use(self):
+        """Hold a shared lock for the duration of a build, then evict if it is time to"""
+        lock_file = open(self.lock_path, 'a')
+        try:
+            if fcntl:
+                await asyncio.get_event_loop().run_in_executor(None, fcntl.flock, lock_file, fcntl.LOCK_SH)
+            self.builds += 1
+            self.active_builds += 1
+            try:
+                yield
+            finally:
+                self.active_builds -= 1
+        finally:
+            lock_file.close()  # Releases the lock
+
+        if time.time() - self._last_evict >= self.EVICT_INTERVAL_SECONDS:
+            await asyncio.get_event_loop().run_in_executor(None, self.evict)
+
+    def evict(self) -> bool:
+        """Trim each cache to its size limit, oldest entries first; False if builds were running"""
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return False
+            elif self.active_builds:
+                return False
+            self._last_evict = time.time()
+
+            for cache_dir, max_bytes in self.limits.items():
+                entries = self._entries(cache_dir)
+                total = sum(entry["size"] for entry in entries)
+                self.sizes[cache_dir] = total
+                if total <= max_bytes:
+                    continue
+                # Trim to 80% of the limit so the next build does not push it straight back over
+                for entry in sorted(entries, key=lambda entry: entry["last_used"]):
+                    if total <= max_bytes * 0.8:
+                        break
+                    self._remove(entry["path"])
+                    total -= entry["size"]
+                    self.evicted_bytes += entry["size"]
+                    self.evictions += 1
+                    print(f"[SHARED CACHE] Evicted {os.path.basename(entry['path'])} "
+                          f"({entry['size'] // (1024 * 1024)} MB) from {os.path.basename(cache_dir)}")
+                self.sizes[cache_dir] = total
+            self.sizes_measured_at = time.time()
+        return True
+
+    def get_stats(self) -> Dict:
+        return {
+            "root": self.root,
+            "module_cache_bytes": self.sizes.get(self.module_cache_dir),
+            "package_cache_bytes": self.sizes.get(self.package_cache_dir),
+            "sizes_measured_at": self.sizes_measured_at,
+            "module_cache_max_bytes": self.limits[self.module_cache_dir],
+            "package_cache_max_bytes": self.limits[self.package_cache_dir],
+            "builds": self.builds,
+            "active_builds": self.active_builds,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes
+        }
+
+    def _entries(self, cache_dir: str) -> List[Dict]:
+        """Top-level entries (a module configuration, a package repository) with size and last use"""
+        entries = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            size, last_used = self._usage(path)
+            entries.append({"path": path, "size": size, "last_used": last_used})
+        return entries
+
+    def _usage(self, path: str) -> Tuple[int, float]:
+        if not os.path.isdir(path) or os.path.islink(path):
+            stat = os.lstat(path)
+            return stat.st_size, stat.st_mtime
+        size, last_used = 0, os.path.getmtime(path)
+        for root, _, filenames in os.walk(path):
+            for filename in filenames:
+                file_path = os.path.join(root, filename)
+                try:
+                    stat = os.lstat(file_path)
+                except OSError:
+                    continue
+                size += stat.st_size
+                last_used = max(last_used, stat.st_mtime)
+        return size, last_used
+
+    def _remove(self, path: str):
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
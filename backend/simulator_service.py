@@ -2,6 +2,8 @@ import os
 import asyncio
 import json
 from typing import Tuple, Optional, List, Dict
+import metrics
+import cassette
 
 class SimulatorService:
     """Service for managing iOS Simulator operations"""
@@ -9,9 +11,39 @@ class SimulatorService:
     def __init__(self):
         self.default_device_type = "iPhone 16 Pro"
         self.fallback_devices = ["iPhone 16", "iPhone 15", "iPhone 14"]
+        # One boot at a time; callers that arrive while it runs wait for it instead of booting again
+        self._boot_task: Optional[asyncio.Task] = None
+        self._boot_waiters = 0
 
     async def ensure_simulator_booted(self) -> Tuple[bool, Optional[str], str]:
-        """Ensure iOS simulator is booted and ready"""
+        """Ensure iOS simulator is booted and ready.
+
+        The boot is only cancelled when every caller waiting for it has been cancelled.
+        """
+        if self._boot_task is None or self._boot_task.done():
+            self._boot_task = asyncio.create_task(self._timed_boot())
+            self._boot_waiters = 0
+        task = self._boot_task
+        self._boot_waiters += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._boot_task is task and self._boot_waiters == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            if self._boot_task is task:
+                self._boot_waiters -= 1
+
+    async def _timed_boot(self) -> Tuple[bool, Optional[str], str]:
+        with metrics.SIMULATOR_STEP_SECONDS.time(step="boot", outcome="success") as timer:
+            result = await self._boot_simulator()
+            if not result[0]:
+                timer.labels["outcome"] = "failed"
+        return result
+
+    async def _boot_simulator(self) -> Tuple[bool, Optional[str], str]:
+        """Reuse a booted simulator or boot the preferred device"""
 
         print("Checking simulator status...")
 
@@ -53,7 +85,7 @@ class SimulatorService:
         print(f"Booting {device_name} simulator...")
 
         boot_cmd = ['xcrun', 'simctl', 'boot', device_to_boot]
-        process = await asyncio.create_subprocess_exec(
+        process = await cassette.create_subprocess_exec(
             *boot_cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
@@ -146,13 +178,16 @@ class SimulatorService:
             print(f"[SIMULATOR] Running: xcrun simctl install {device_id} {app_path}")
 
             install_cmd = ['xcrun', 'simctl', 'install', device_id, app_path]
-            process = await asyncio.create_subprocess_exec(
-                *install_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            with metrics.SIMULATOR_STEP_SECONDS.time(step="install", outcome="success") as timer:
+                process = await cassette.create_subprocess_exec(
+                    *install_cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
 
-            stdout, stderr = await process.communicate()
+                stdout, stderr = await process.communicate()
+                if process.returncode != 0:
+                    timer.labels["outcome"] = "failed"
 
             if process.returncode != 0:
                 error_msg = stderr.decode() if stderr else "Unknown error"
@@ -178,13 +213,16 @@ class SimulatorService:
             print(f"[SIMULATOR] Running: xcrun simctl launch {device_id} {bundle_id}")
 
             launch_cmd = ['xcrun', 'simctl', 'launch', device_id, bundle_id]
-            process = await asyncio.create_subprocess_exec(
-                *launch_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            with metrics.SIMULATOR_STEP_SECONDS.time(step="launch", outcome="success") as timer:
+                process = await cassette.create_subprocess_exec(
+                    *launch_cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
 
-            stdout, stderr = await process.communicate()
+                stdout, stderr = await process.communicate()
+                if process.returncode != 0:
+                    timer.labels["outcome"] = "failed"
 
             if process.returncode != 0:
                 error_msg = stderr.decode() if stderr else "Unknown error"
@@ -209,7 +247,7 @@ class SimulatorService:
         """Get the device ID of the currently booted simulator"""
 
         cmd = ['xcrun', 'simctl', 'list', 'devices', 'booted', '-j']
-        process = await asyncio.create_subprocess_exec(
+        process = await cassette.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
@@ -236,7 +274,7 @@ class SimulatorService:
         """Get information about a specific device"""
 
         cmd = ['xcrun', 'simctl', 'list', 'devices', '-j']
-        process = await asyncio.create_subprocess_exec(
+        process = await cassette.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
@@ -262,7 +300,7 @@ class SimulatorService:
         """Get available iOS simulator devices"""
 
         cmd = ['xcrun', 'simctl', 'list', 'devices', 'available', '-j']
-        process = await asyncio.create_subprocess_exec(
+        process = await cassette.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
@@ -292,7 +330,7 @@ class SimulatorService:
         """Open the Simulator app"""
 
         cmd = ['open', '-a', 'Simulator']
-        process = await asyncio.create_subprocess_exec(
+        process = await cassette.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
@@ -308,7 +346,7 @@ class SimulatorService:
             return False
 
         cmd = ['xcrun', 'simctl', 'io', device_id, 'screenshot', output_path]
-        process = await asyncio.create_subprocess_exec(
+        process = await cassette.create_subprocess_exec(
             *cmd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE
@@ -0,0 +1,175 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class SnapshotStore:
+    """Content-addressed version history for a project's source files.
+
+    Each file body is stored once under .snapshots/objects/<sha256>, and every
+    version is a small manifest mapping paths to hashes, so an unchanged file
+    costs nothing per version and a rollback only rewrites files that differ.
+    """
+
+    def __init__(self, project_path: str, tracked_dir: str = "Sources", max_versions: int = 50):
+        self.project_path = project_path
+        self.tracked_dir = tracked_dir
+        self.max_versions = max_versions
+        self.snapshots_dir = os.path.join(project_path, ".snapshots")
+        self.objects_dir = os.path.join(self.snapshots_dir, "objects")
+        self.versions_dir = os.path.join(self.snapshots_dir, "versions")
+
+    def snapshot(self, message: str = "") -> Dict:
+        """Record the current tracked files as a new version"""
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+        files = {}
+        for relative_path, data in self._iter_tracked_files():
+            files[relative_path] = self._store_blob(data)
+
+        latest = self.latest_version()
+        manifest = {
+            "version": (latest["version"] + 1) if latest else 1,
+            "created_at": datetime.now().isoformat(),
+            "message": message,
+            "files": files
+        }
+
+        # Nothing changed since the last version - don't record an empty step
+        if latest and latest["files"] == files:
+            return latest
+
+        self._write_json(self._manifest_path(manifest["version"]), manifest)
+        self.prune()
+        return manifest
+
+    def list_versions(self) -> List[Dict]:
+        """Version summaries, newest first"""
+        versions = []
+        for version in self._version_numbers():
+            manifest = self.get_version(version)
+            if manifest:
+                versions.append({
+                    "version": manifest["version"],
+                    "created_at": manifest["created_at"],
+                    "message": manifest.get("message", ""),
+                    "files": sorted(manifest["files"].keys())
+                })
+        versions.reverse()
+        return versions
+
+    def get_version(self, version: int) -> Optional[Dict]:
+        try:
+            with open(self._manifest_path(version), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def latest_version(self) -> Optional[Dict]:
+        numbers = self._version_numbers()
+        return self.get_version(numbers[-1]) if numbers else None
+
+    def restore(self, version: int) -> Optional[Dict]:
+        """Make the working tree match a version and record that as a new version.
+
+        Only files whose content hash differs are rewritten; tracked files that did
+        not exist in the target version are removed.
+        """
+        target = self.get_version(version)
+        if target is None:
+            return None
+
+        current = {path: self._hash(data) for path, data in self._iter_tracked_files()}
+
+        for relative_path, blob_hash in target["files"].items():
+            if current.get(relative_path) == blob_hash:
+                continue
+            with open(self._blob_path(blob_hash), 'rb') as f:
+                data = f.read()
+            file_path = os.path.join(self.project_path, relative_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as f:
+                f.write(data)
+
+        for relative_path in current:
+            if relative_path not in target["files"]:
+                os.remove(os.path.join(self.project_path, relative_path))
+
+        return self.snapshot(f"Rollback to version {version}")
+
+    def prune(self):
+        """Drop versions beyond max_versions, then collect unreferenced blobs"""
+        numbers = self._version_numbers()
+        for version in numbers[:-self.max_versions] if len(numbers) > self.max_versions else []:
+            os.remove(self._manifest_path(version))
+        self.collect_garbage()
+
+    def collect_garbage(self) -> int:
+        """Delete blobs no manifest refers to; returns how many were removed"""
+        if not os.path.isdir(self.objects_dir):
+            return 0
+
+        referenced = set()
+        for version in self._version_numbers():
+            manifest = self.get_version(version)
+            if manifest:
+                referenced.update(manifest["files"].values())
+
+        removed = 0
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for name in os.listdir(prefix_dir):
+                if prefix + name not in referenced:
+                    os.remove(os.path.join(prefix_dir, name))
+                    removed += 1
+            if not os.listdir(prefix_dir):
+                os.rmdir(prefix_dir)
+        return removed
+
+    def _iter_tracked_files(self):
+        tracked_root = os.path.join(self.project_path, self.tracked_dir)
+        if not os.path.isdir(tracked_root):
+            return
+        for root, _, filenames in os.walk(tracked_root):
+            for filename in sorted(filenames):
+                if not filename.endswith('.swift'):
+                    continue
+                file_path = os.path.join(root, filename)
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                yield os.path.relpath(file_path, self.project_path).replace(os.sep, '/'), data
+
+    def _hash(self, data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _store_blob(self, data: bytes) -> str:
+        blob_hash = self._hash(data)
+        blob_path = self._blob_path(blob_hash)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = f"{blob_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+        return blob_hash
+
+    def _blob_path(self, blob_hash: str) -> str:
+        return os.path.join(self.objects_dir, blob_hash[:2], blob_hash[2:])
+
+    def _manifest_path(self, version: int) -> str:
+        return os.path.join(self.versions_dir, f"{version:06d}.json")
+
+    def _version_numbers(self) -> List[int]:
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(int(name[:-5]) for name in os.listdir(self.versions_dir)
+                      if name.endswith('.json') and name[:-5].isdigit())
+
+    def _write_json(self, path: str, data: Dict):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
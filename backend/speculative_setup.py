@@ -0,0 +1,97 @@
+"""
+Work started when a generate request arrives, overlapping LLM generation.
+
+Generation takes tens of seconds, and until now the simulator boot, the project
+directory and the warm DerivedData template all waited for it. None of them
+depend on the generated code, so they start with the request:
+
+  simulator  boots the simulator; the launch after the build joins the same boot
+  workspace  creates the project directory and clones the warm DerivedData into it
+  template   builds the skeleton app for the request's build profile if it is not warm yet
+
+create_project joins the workspace step; the other two are not waited for.
+If the request fails at any point, the simulator boot is cancelled and the
+speculative directory removed unless the project was created in it. The
+template warm-up keeps running: it is shared with every other request.
+
+Set SWIFTGEN_SPECULATIVE_SETUP=off to run these steps after generation again.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import tracing
+import template_warmer
+import settings
+
+ENABLED = settings.env_flag("SWIFTGEN_SPECULATIVE_SETUP")
+
+
+class SpeculativeSetup:
+    """Simulator boot, workspace creation and template warm-up for one generate request"""
+
+    def __init__(self, project_id: str, project_manager, build_service, build_profile: Optional[str] = None):
+        self.project_id = project_id
+        self.project_manager = project_manager
+        self.build_service = build_service
+        self.build_profile = build_profile
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def start(self):
+        simulator_service = self.build_service.simulator_service
+        if simulator_service:
+            self._start("simulator", simulator_service.ensure_simulator_booted())
+        self._start("workspace", asyncio.get_event_loop().run_in_executor(
+            None, self.project_manager.prepare_workspace, self.project_id, self.build_profile
+        ))
+        if template_warmer.warmer.enabled:
+            self._start("template", template_warmer.warmer.warm(self.project_manager, self.build_service,
+                                                                self.build_profile))
+
+    def _start(self, name: str, work):
+        async def run():
+            start = datetime.now()
+            try:
+                with tracing.span(f"speculative.{name}", project_id=self.project_id):
+                    return await work
+            finally:
+                self.seconds[name] = round((datetime.now() - start).total_seconds(), 3)
+
+        task = asyncio.create_task(run())
+        task.add_done_callback(lambda done: self._finished(name, work, done))
+        self._tasks[name] = task
+
+    def _finished(self, name: str, work, task: asyncio.Task):
+        """Nobody awaits the simulator and template steps, so their failures are retrieved here"""
+        if task.cancelled():
+            if asyncio.iscoroutine(work):
+                work.close()  # Cancelled before it started
+        elif task.exception() is not None:
+            print(f"[SPECULATIVE] {self.project_id}: {name} failed: {task.exception()}")
+
+    async def join(self, name: str) -> Any:
+        """Result of a step once it has finished, or None if it failed or never started"""
+        task = self._tasks.get(name)
+        if task is None:
+            return None
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            return None
+        except Exception:
+            return None
+
+    async def cancel(self):
+        """Drop the work that only this request needed"""
+        simulator = self._tasks.get("simulator")
+        if simulator and not simulator.done():
+            simulator.cancel()
+        # The workspace step runs in a thread that cannot be interrupted, so let it finish before removing it
+        await asyncio.gather(*(self._tasks[name] for name in ("simulator", "workspace") if name in self._tasks),
+                             return_exceptions=True)
+        await asyncio.get_event_loop().run_in_executor(None, self.project_manager.discard_workspace, self.project_id)
+        print(f"[SPECULATIVE] {self.project_id}: request failed, cancelled speculative work")
@@ -13,6 +13,8 @@ Handles ALL Swift syntax issues including:
 import re
 from typing import Tuple, List, Dict, Optional
 
+from diagnostics import Diagnostic
+
 class SwiftSyntaxValidator:
     """World-class Swift syntax validator that fixes ALL common issues"""
 
@@ -300,7 +302,7 @@ class SwiftSyntaxValidator:
         return content, fixes
 
     @staticmethod
-    def analyze_and_fix_build_errors(errors: List[str], swift_files: List[Dict]) -> List[Dict]:
+    def analyze_and_fix_build_errors(errors: List[Diagnostic], swift_files: List[Dict]) -> List[Dict]:
         """Analyze specific build errors and apply targeted fixes"""
         fixed_files = []
 
@@ -309,37 +311,40 @@ class SwiftSyntaxValidator:
             file_path = file["path"]
 
             # Check if this file has errors
-            file_has_errors = any(file_path in error for error in errors)
+            file_errors = [error for error in errors if error.in_file(file_path)]
 
-            if file_has_errors:
+            if file_errors:
                 # Apply aggressive fixes for files with errors
                 content, fixes = SwiftSyntaxValidator.fix_swift_file(content, file_path)
 
                 # Additional targeted fixes based on specific errors
-                for error in errors:
-                    if file_path in error:
-                        if "generic parameter" in error and "Environment" in error:
-                            # Specific fix for Environment generic parameter issue
-                            content = re.sub(
-                                r'@Environment\([^)]+\)\s+var\s+presentationMode.*',
-                                '@Environment(\\.dismiss) private var dismiss',
-                                content
-                            )
-                        elif "single-quoted string literal" in error:
-                            # Ensure all single quotes are replaced
-                            content = content.replace("'", '"')
-                        elif "unterminated string literal" in error:
-                            # Fix unterminated strings
-                            lines = content.split('\n')
-                            for i, line in enumerate(lines):
-                                if line.count('"') % 2 != 0:
-                                    # Odd number of quotes - fix it
-                                    if line.strip().endswith('"'):
-                                        line = '"' + line
-                                    else:
-                                        line = line + '"'
-                                    lines[i] = line
-                            content = '\n'.join(lines)
+                for error in file_errors:
+                    if "generic parameter" in error.message and "Environment" in error.message:
+                        # Specific fix for Environment generic parameter issue
+                        content = re.sub(
+                            r'@Environment\([^)]+\)\s+var\s+presentationMode.*',
+                            '@Environment(\\.dismiss) private var dismiss',
+                            content
+                        )
+                    elif "single-quoted string literal" in error.message:
+                        # Ensure all single quotes are replaced
+                        content = content.replace("'", '"')
+                    elif "unterminated string literal" in error.message:
+                        # Fix unterminated strings on the reported line, or every line if none was given
+                        lines = content.split('\n')
+                        targets = [error.line - 1] if error.line else range(len(lines))
+                        for i in targets:
+                            if i >= len(lines):
+                                continue
+                            line = lines[i]
+                            if line.count('"') % 2 != 0:
+                                # Odd number of quotes - fix it
+                                if line.strip().endswith('"'):
+                                    line = '"' + line
+                                else:
+                                    line = line + '"'
+                                lines[i] = line
+                        content = '\n'.join(lines)
             else:
                 # Still apply basic fixes to all files
                 content, _ = SwiftSyntaxValidator.fix_swift_file(content, file_path)
@@ -0,0 +1,260 @@
+"""
+DerivedData pre-warmed from a skeleton app.
+
+Every generated app has the same shape: one SwiftUI target from the same
+project.yml and Info.plist, for iOS 16. Its first build still starts from an
+empty DerivedData, so most of that build goes into work that does not depend on
+the app at all: SDK stat caches, module and compilation caches, and explicitly
+built SDK modules. The warmer builds a skeleton app once per toolchain and build
+profile, and new projects start from a copy-on-write clone of the skeleton's
+DerivedData, leaving out the parts that belong to the skeleton itself (its
+products, build database, intermediates, logs, result bundle and index).
+
+Clones use clonefile/reflink where the filesystem has it, hard links otherwise.
+Compilers write cache files to a temporary file and rename it into place, so a
+hard-linked cache file is never changed under another project. The compilation
+cache database is the exception: it is updated in place, so it is always copied
+when the filesystem cannot clone.
+"""
+
+import os
+import sys
+import json
+import shutil
+import asyncio
+import hashlib
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import yaml
+
+import build_profiles
+import settings
+
+TEMPLATE_APP_NAME = "SwiftGenTemplate"
+
+SKELETON_SOURCES = {
+    "App.swift": """import SwiftUI
+
+@main
+struct SwiftGenTemplateApp: App {
+    var body: some Scene {
+        WindowGroup {
+            ContentView()
+        }
+    }
+}
+""",
+    "ContentView.swift": """import SwiftUI
+
+struct ContentView: View {
+    @State private var items: [String] = []
+    @State private var text = ""
+
+    var body: some View {
+        NavigationStack {
+            List {
+                TextField("New item", text: $text)
+                    .onSubmit {
+                        items.append(text)
+                        text = ""
+                    }
+                ForEach(items, id: \\.self) { item in
+                    Text(item)
+                }
+            }
+            .navigationTitle("Template")
+        }
+    }
+}
+"""
+}
+
+# Paths in a DerivedData that belong to the project that was built; everything else is reusable
+PROJECT_SPECIFIC = {"Build/Products", "Build/Intermediates.noindex/XCBuildData", "Logs", "Index.noindex",
+                    "SourcePackages", "ResultBundles", "info.plist"}
+# Updated in place, so never hard-linked
+IN_PLACE_UPDATED = {"CompilationCache.noindex"}
+SEED_MARKER = ".template_seed"
+
+
+def _clone(src: str, dst: str, allow_hardlink: bool = True) -> str:
+    """Copy-on-write clone of a file or directory; returns how it was copied"""
+    flag = '-c' if sys.platform == "darwin" else '--reflink=always'
+    if subprocess.run(['cp', '-R', flag, src, dst], capture_output=True).returncode == 0:
+        return "reflink"
+    if os.path.isdir(dst):
+        shutil.rmtree(dst, ignore_errors=True)
+
+    if allow_hardlink:
+        try:
+            if os.path.isdir(src):
+                shutil.copytree(src, dst, symlinks=True, copy_function=os.link)
+            else:
+                os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            # Different filesystem
+            if os.path.isdir(dst):
+                shutil.rmtree(dst, ignore_errors=True)
+
+    if os.path.isdir(src):
+        shutil.copytree(src, dst, symlinks=True)
+    else:
+        shutil.copy2(src, dst)
+    return "copy"
+
+
+def _summary(errors: List) -> str:
+    return "; ".join(str(e) for e in errors[:3]) or "build failed"
+
+
+class TemplateWarmer:
+    """Builds the skeleton app per toolchain and profile, and seeds new projects' DerivedData from it"""
+
+    def __init__(self, root: str, enabled: bool = True):
+        self.root = root
+        self.enabled = enabled
+        self.toolchain: Optional[str] = None  # Learned from the build service on the first warm-up
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.seeds = 0
+        self.seed_methods: Dict[str, int] = {}
+        self.last_error: Optional[str] = None
+
+    def template_path(self, toolchain: str, profile: str) -> str:
+        key = hashlib.sha256(toolchain.encode()).hexdigest()[:12]
+        return os.path.join(self.root, f"{profile}-{key}")
+
+    def _info_path(self, toolchain: str, profile: str) -> str:
+        return os.path.join(self.template_path(toolchain, profile), "template.json")
+
+    def is_warm(self, toolchain: str, profile: str) -> bool:
+        return os.path.exists(self._info_path(toolchain, profile))
+
+    async def warm(self, project_manager, build_service, profile: Optional[str] = None) -> bool:
+        """Build the skeleton app for a profile unless this toolchain already has it"""
+        if not self.enabled:
+            return False
+        profile = build_profiles.resolve(profile)
+        self.toolchain = await build_service._get_toolchain_version()
+        if self.is_warm(self.toolchain, profile):
+            return True
+
+        lock = self._locks.setdefault(profile, asyncio.Lock())
+        async with lock:
+            if self.is_warm(self.toolchain, profile):
+                return True
+
+            start = datetime.now()
+            skeleton_path = os.path.join(self.template_path(self.toolchain, profile), "Skeleton")
+            shutil.rmtree(skeleton_path, ignore_errors=True)
+            self._write_skeleton(project_manager, skeleton_path, profile)
+            print(f"[TEMPLATE] Warming {profile} template for {self.toolchain.splitlines()[0]}")
+
+            success, message = await build_service._run_xcodegen(skeleton_path)
+            if success:
+                success, _, errors, _ = await build_service._run_xcodebuild(skeleton_path, profile)
+                message = _summary(errors)
+            if not success:
+                self.last_error = message
+                print(f"[TEMPLATE] Warm-up failed, new projects start from an empty DerivedData: {message}")
+                return False
+
+            seconds = (datetime.now() - start).total_seconds()
+            with open(self._info_path(self.toolchain, profile), 'w') as f:
+                json.dump({"toolchain": self.toolchain, "profile": profile,
+                           "built_at": datetime.now().isoformat(), "build_seconds": round(seconds, 1)}, f, indent=2)
+            self.last_error = None
+            print(f"[TEMPLATE] {profile} template ready in {seconds:.1f}s")
+            return True
+
+    def _write_skeleton(self, project_manager, skeleton_path: str, profile: str):
+        """The skeleton app, written with the same project.yml and Info.plist generated apps get"""
+        sources_dir = os.path.join(skeleton_path, "Sources")
+        os.makedirs(sources_dir, exist_ok=True)
+        for name, content in SKELETON_SOURCES.items():
+            with open(os.path.join(sources_dir, name), 'w') as f:
+                f.write(content)
+
+        project_manager._create_info_plist(skeleton_path, TEMPLATE_APP_NAME, TEMPLATE_APP_NAME)
+        config = project_manager._generate_project_yml(
+            TEMPLATE_APP_NAME, project_manager._create_safe_bundle_id(TEMPLATE_APP_NAME),
+            TEMPLATE_APP_NAME, TEMPLATE_APP_NAME, [], profile
+        )
+        with open(os.path.join(skeleton_path, "project.yml"), 'w') as f:
+            yaml.dump(config, f, default_flow_style=False)
+
+    def _reusable_entries(self, derived_data: str) -> List[str]:
+        """Paths relative to a DerivedData that do not belong to the project that was built"""
+        entries = []
+        for name in sorted(os.listdir(derived_data)):
+            if name == "Build":
+                for parent in ("Build", "Build/Intermediates.noindex"):
+                    parent_path = os.path.join(derived_data, parent)
+                    if not os.path.isdir(parent_path):
+                        continue
+                    for child in sorted(os.listdir(parent_path)):
+                        relative = f"{parent}/{child}"
+                        # Intermediates.noindex is walked into; <Project>.build holds the skeleton's own objects
+                        if relative in PROJECT_SPECIFIC or relative == "Build/Intermediates.noindex" \
+                                or child.endswith(".build"):
+                            continue
+                        entries.append(relative)
+            elif name not in PROJECT_SPECIFIC:
+                entries.append(name)
+        return entries
+
+    def seed(self, derived_data_path: str, profile: Optional[str] = None) -> bool:
+        """Clone the warm template into an empty DerivedData; False if there is no template yet"""
+        if not self.enabled or self.toolchain is None:
+            return False
+        profile = build_profiles.resolve(profile)
+        if not self.is_warm(self.toolchain, profile):
+            return False
+        template = os.path.join(self.template_path(self.toolchain, profile), "Skeleton", "DerivedData")
+        if not os.path.isdir(template) or os.path.exists(derived_data_path):
+            return False
+
+        methods = set()
+        for relative in self._reusable_entries(template):
+            target = os.path.join(derived_data_path, relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            method = _clone(os.path.join(template, relative), target,
+                            allow_hardlink=relative.split("/")[0] not in IN_PLACE_UPDATED)
+            methods.add(method)
+            self.seed_methods[method] = self.seed_methods.get(method, 0) + 1
+
+        os.makedirs(derived_data_path, exist_ok=True)
+        with open(os.path.join(derived_data_path, SEED_MARKER), 'w') as f:
+            json.dump({"profile": profile, "toolchain": self.toolchain, "methods": sorted(methods)}, f)
+        self.seeds += 1
+        return True
+
+    def is_fresh_seed(self, derived_data_path: str) -> bool:
+        """Whether a DerivedData was seeded and nothing has been built into it since"""
+        return (os.path.exists(os.path.join(derived_data_path, SEED_MARKER))
+                and not os.path.exists(os.path.join(derived_data_path, "Build", "Products"))
+                and not os.path.exists(os.path.join(derived_data_path, "Logs")))
+
+    def get_stats(self) -> Dict:
+        templates = []
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                info_path = os.path.join(self.root, name, "template.json")
+                if os.path.exists(info_path):
+                    with open(info_path, 'r') as f:
+                        templates.append(json.load(f))
+        return {
+            "enabled": self.enabled,
+            "templates": templates,
+            "seeds": self.seeds,
+            "seed_methods": self.seed_methods,
+            "last_error": self.last_error
+        }
+
+
+warmer = TemplateWarmer(
+    settings.workspaces_path("template_derived_data"),
+    enabled=settings.env_flag("SWIFTGEN_TEMPLATE_WARMING")
+)
@@ -0,0 +1,109 @@
+"""Result bundle parsing against the recorded xcresulttool output in fixtures/xcresult"""
+
+import os
+import json
+import asyncio
+
+import result_bundle
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "xcresult")
+SOURCES = "/Users/dev/swiftgen/workspaces/proj_1a2b3c4d/Sources"
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name), 'r') as f:
+        return json.load(f)
+
+
+def fake_xcresulttool(monkeypatch, responses):
+    """Answer xcresulttool calls from fixtures, keyed by the first arguments; anything else fails"""
+    calls = []
+
+    async def xcresulttool(*args):
+        calls.append(args)
+        for prefix, fixture in responses.items():
+            if args[:len(prefix)] == prefix:
+                return load(fixture)
+        return None
+
+    monkeypatch.setattr(result_bundle, "_xcresulttool", xcresulttool)
+    return calls
+
+
+def test_build_results_errors_and_warnings():
+    errors, warnings = result_bundle.parse_build_results(load("build_results_failed.json"))
+
+    assert [(os.path.basename(e.file), e.line, e.column) for e in errors] == [
+        ("ContentView.swift", 12, 9), ("ContentView.swift", 20, 23), ("TodoItem.swift", 7, 24)
+    ]
+    assert errors[0].message == "cannot find 'itemStore' in scope"
+    assert errors[0].file == f"{SOURCES}/ContentView.swift"
+    assert [(w.severity, w.line, w.column) for w in warnings] == [("warning", 25, 13)]
+    assert warnings[0].message.startswith("initialization of immutable value 'count' was never used")
+
+
+def test_legacy_results_drop_generic_command_failures():
+    data = load("legacy_results_failed.json")
+    errors, warnings = result_bundle.parse_legacy_results(data)
+
+    # "Command SwiftCompile failed with a nonzero exit code" only repeats the located error
+    assert [e.message for e in errors] == ["cannot find 'itemStore' in scope"]
+    assert (errors[0].line, errors[0].column) == (12, 9)
+    assert [w.message for w in warnings] == ["variable 'count' was never mutated; consider changing to 'let' constant"]
+    assert result_bundle.legacy_log_id(data).startswith("0~")
+
+
+def test_compile_seconds_summed_per_file():
+    assert result_bundle.parse_build_log(load("build_log.json")) == {
+        "ContentView.swift": 4.608, "TodoItem.swift": 1.195, "TodoApp.swift": 0.341
+    }
+    assert result_bundle.parse_build_log(load("legacy_build_log.json")) == {
+        "ContentView.swift": 1.982, "TodoApp.swift": 0.441
+    }
+
+
+def test_read_bundle(tmp_path, monkeypatch):
+    fake_xcresulttool(monkeypatch, {
+        ("get", "build-results"): "build_results_failed.json",
+        ("get", "log"): "build_log.json"
+    })
+
+    results = asyncio.run(result_bundle.read(str(tmp_path)))
+
+    assert len(results.errors) == 3
+    assert [w.line for w in results.warnings] == [25]
+    assert results.slowest_files(1) == [("ContentView.swift", 4.608)]
+
+
+def test_read_legacy_bundle(tmp_path, monkeypatch):
+    data = load("legacy_results_failed.json")
+    calls = fake_xcresulttool(monkeypatch, {
+        ("get", "--legacy", "--format", "json", "--path", str(tmp_path), "--id"): "legacy_build_log.json",
+        ("get", "--legacy", "--format", "json"): "legacy_results_failed.json"
+    })
+
+    results = asyncio.run(result_bundle.read(str(tmp_path)))
+
+    assert [e.message for e in results.errors] == ["cannot find 'itemStore' in scope"]
+    assert len(results.warnings) == 1
+    assert results.compile_seconds == {"ContentView.swift": 1.982, "TodoApp.swift": 0.441}
+    assert calls[0][:2] == ("get", "build-results")
+    assert calls[-1][-1] == result_bundle.legacy_log_id(data)
+
+
+def test_read_unreadable_bundle(tmp_path, monkeypatch):
+    fake_xcresulttool(monkeypatch, {})
+    assert asyncio.run(result_bundle.read(str(tmp_path))) is None
+    assert asyncio.run(result_bundle.read(str(tmp_path / "missing.xcresult"))) is None
+
+
+def test_text_details_copied_onto_bundle_errors():
+    errors, _ = result_bundle.parse_build_results(load("build_results_failed.json"))
+    text = (f"{SOURCES}/ContentView.swift:12:9: error: cannot find 'itemStore' in scope\n"
+            f"{SOURCES}/ContentView.swift:12:9: note: did you mean 'items'?\n")
+    scraped = result_bundle.diagnostics.parse(text)
+
+    merged = result_bundle.with_text_details(errors, scraped)
+
+    assert merged[0].notes == ["did you mean 'items'? (ContentView.swift:12)"]
+    assert merged[1].notes == []
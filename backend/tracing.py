@@ -0,0 +1,277 @@
+"""
+Request tracing for SwiftGen.
+
+Spans are propagated with contextvars, so a span opened in main.py becomes the
+parent of spans opened in EnhancedClaudeService, ProjectManager, BuildService,
+RobustErrorRecoverySystem and SimulatorService for the same request - including
+inside asyncio tasks, which copy the current context. Finished spans are appended
+to a JSON-lines file in batches by a background thread, so exporting a span never
+touches the disk on the event loop, and the most recent traces are kept in memory
+for the waterfall endpoint.
+"""
+
+import os
+import json
+import time
+import uuid
+import atexit
+import threading
+import contextvars
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import settings
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("swiftgen_current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_time = time.time()
+        if exc_type is not None:
+            self.status = "error"
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        exporter.export(self)
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round(((self.end_time or time.time()) - self.start_time) * 1000, 2),
+            "status": self.status,
+            "error": self.error,
+            "attributes": dict(self.attributes)
+        }
+
+
+def span(name: str, **attributes) -> Span:
+    """Open a child of the current span, or a new trace if there is none"""
+    parent = _current_span.get()
+    if parent is None:
+        return Span(name, uuid.uuid4().hex, None, attributes)
+    return Span(name, parent.trace_id, parent.span_id, attributes)
+
+
+def root_span(name: str, **attributes) -> Span:
+    """Open a span that starts a new trace even if another span is current (e.g. background jobs)"""
+    return Span(name, uuid.uuid4().hex, None, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def set_attributes(**attributes):
+    """Attach attributes to the current span if one is active"""
+    active = _current_span.get()
+    if active is not None:
+        active.set_attributes(**attributes)
+
+
+def token_usage(payload: Dict) -> Dict[str, int]:
+    """Token counts from an Anthropic or OpenAI-style response body.
+
+    input_tokens is the whole prompt; cached_input_tokens and cache_write_tokens are the
+    parts of it read from and written to the provider's prompt cache.
+    """
+    usage = payload.get("usage") or {}
+    if "prompt_tokens" in usage:
+        details = usage.get("prompt_tokens_details") or {}
+        return {
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "cached_input_tokens": details.get("cached_tokens") or 0,
+            "cache_write_tokens": 0,
+            "output_tokens": usage.get("completion_tokens", 0)
+        }
+    # Anthropic reports cache reads and writes separately from input_tokens
+    cache_read = usage.get("cache_read_input_tokens") or 0
+    cache_write = usage.get("cache_creation_input_tokens") or 0
+    return {
+        "input_tokens": usage.get("input_tokens", 0) + cache_read + cache_write,
+        "cached_input_tokens": cache_read,
+        "cache_write_tokens": cache_write,
+        "output_tokens": usage.get("output_tokens", 0)
+    }
+
+
+def current_trace_id() -> Optional[str]:
+    active = _current_span.get()
+    return active.trace_id if active else None
+
+
+class JsonLinesExporter:
+    """Appends finished spans to a JSON-lines file and indexes recent traces in memory"""
+
+    FLUSH_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, path: str, max_traces: int = 200, max_file_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_traces = max_traces
+        self.max_file_bytes = max_file_bytes
+        self.traces: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serialized spans waiting for the writer thread
+        self._pending: List[str] = []
+        self._pending_ready = threading.Condition()
+        self._writer: Optional[threading.Thread] = None
+        self._file_lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def export(self, finished: Span):
+        record = finished.to_dict()
+        with self._lock:
+            spans = self.traces.setdefault(record["trace_id"], [])
+            spans.append(record)
+            self.traces.move_to_end(record["trace_id"])
+            while len(self.traces) > self.max_traces:
+                self.traces.popitem(last=False)
+
+        with self._pending_ready:
+            self._pending.append(json.dumps(record, default=str) + "\n")
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="span-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            with self._pending_ready:
+                self._pending_ready.wait(self.FLUSH_INTERVAL_SECONDS)
+            self.flush()
+
+    def flush(self):
+        """Write the spans exported since the last flush"""
+        with self._file_lock:
+            with self._pending_ready:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_file_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, 'a') as f:
+                    f.writelines(lines)
+            except OSError as e:
+                print(f"[TRACING] Failed to export {len(lines)} spans: {e}")
+
+    def get_spans(self, trace_id: str) -> List[Dict]:
+        with self._lock:
+            if trace_id in self.traces:
+                return list(self.traces[trace_id])
+        self.flush()
+
+        # Older traces: scan the files line by line rather than loading them
+        spans = []
+        for path in (f"{self.path}.1", self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as f:
+                for line in f:
+                    if trace_id in line:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if record.get("trace_id") == trace_id:
+                            spans.append(record)
+        return spans
+
+    def list_traces(self, limit: int = 50, project_id: Optional[str] = None) -> List[Dict]:
+        """Root spans of recent traces, newest first"""
+        with self._lock:
+            traces = list(self.traces.items())
+
+        roots = []
+        for trace_id, spans in reversed(traces):
+            root = next((s for s in spans if s["parent_id"] is None), None)
+            if root is None:
+                continue
+            if project_id and not any(s["attributes"].get("project_id") == project_id for s in spans):
+                continue
+            roots.append({
+                "trace_id": trace_id,
+                "name": root["name"],
+                "start_time": root["start_time"],
+                "duration_ms": root["duration_ms"],
+                "status": root["status"],
+                "span_count": len(spans),
+                "attributes": root["attributes"]
+            })
+            if len(roots) >= limit:
+                break
+        return roots
+
+
+def build_waterfall(spans: List[Dict]) -> Dict:
+    """Order spans depth-first under their parents with offsets relative to the trace start"""
+    if not spans:
+        return {"spans": []}
+
+    children: Dict[Optional[str], List[Dict]] = {}
+    span_ids = {s["span_id"] for s in spans}
+    for s in spans:
+        parent = s["parent_id"] if s["parent_id"] in span_ids else None
+        children.setdefault(parent, []).append(s)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: s["start_time"])
+
+    trace_start = min(s["start_time"] for s in spans)
+    trace_end = max(s["end_time"] or s["start_time"] for s in spans)
+
+    rows = []
+
+    def visit(parent_id: Optional[str], depth: int):
+        for s in children.get(parent_id, []):
+            rows.append({
+                "span_id": s["span_id"],
+                "parent_id": s["parent_id"],
+                "name": s["name"],
+                "depth": depth,
+                "offset_ms": round((s["start_time"] - trace_start) * 1000, 2),
+                "duration_ms": s["duration_ms"],
+                "status": s["status"],
+                "error": s.get("error"),
+                "attributes": s["attributes"]
+            })
+            visit(s["span_id"], depth + 1)
+
+    visit(None, 0)
+    return {
+        "trace_id": spans[0]["trace_id"],
+        "duration_ms": round((trace_end - trace_start) * 1000, 2),
+        "span_count": len(spans),
+        "spans": rows
+    }
+
+
+exporter = JsonLinesExporter(
+    os.getenv("SWIFTGEN_TRACE_FILE", settings.workspaces_path("traces", "spans.jsonl"))
+)
+atexit.register(exporter.flush)
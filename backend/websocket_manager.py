@@ -0,0 +1,308 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional
+
+from fastapi import WebSocket
+
+# Final results of a job and of its background launch; a backed-up queue drops progress updates to make room for these
+TERMINAL_TYPES = {"complete", "error", "launch"}
+
+
+class ClientConnection:
+    """A single WebSocket client with its own bounded outbound queue"""
+
+    def __init__(self, project_id: str, websocket: WebSocket, max_queue_size: int,
+                 coalesce_after: int, send_timeout: float, max_dropped: int):
+        self.project_id = project_id
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        self.coalesce_after = coalesce_after
+        self.send_timeout = send_timeout
+        self.max_dropped = max_dropped
+
+        self.queue: Deque[Dict] = deque()
+        self.has_messages = asyncio.Event()
+        self.sender_task: Optional[asyncio.Task] = None
+        self.closed = False
+        # Drops since the queue was last empty; a client that never catches up is evicted
+        self.backlog_dropped = 0
+
+        # Metrics
+        self.connected_at = time.time()
+        self.messages_sent = 0
+        self.messages_dropped = 0
+        self.messages_coalesced = 0
+        self.max_queue_depth = 0
+        self.total_send_latency = 0.0
+        self.max_send_latency = 0.0
+        self.last_send_latency = 0.0
+
+    def enqueue(self, message: Dict) -> bool:
+        """Queue a message without waiting. Returns False if the client should be dropped."""
+        if self.closed:
+            return False
+
+        # A new status message supersedes any status still waiting in a backed-up queue
+        if message.get("type") == "status" and len(self.queue) >= self.coalesce_after:
+            pending = len(self.queue)
+            self.queue = deque(m for m in self.queue if m.get("type") != "status")
+            self.messages_coalesced += pending - len(self.queue)
+
+        if len(self.queue) >= self.max_queue_size:
+            # Drop the oldest progress update to make room; final results must still get through
+            droppable = next((m for m in self.queue if m.get("type") not in TERMINAL_TYPES), None)
+            if droppable is not None:
+                self.queue.remove(droppable)
+            self.messages_dropped += 1
+            self.backlog_dropped += 1
+
+            if self.backlog_dropped > self.max_dropped:
+                return False
+            if droppable is None and message.get("type") not in TERMINAL_TYPES:
+                # Only final results are waiting; the new update is the one to lose
+                return True
+
+        self.queue.append(message)
+        self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+        self.has_messages.set()
+        return True
+
+    async def run_sender(self, on_failure):
+        """Drain the queue to the socket until the connection is closed"""
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self.backlog_dropped = 0
+                    self.has_messages.clear()
+                    await self.has_messages.wait()
+                    continue
+
+                message = self.queue.popleft()
+                start = time.perf_counter()
+                try:
+                    await asyncio.wait_for(self.websocket.send_json(message), timeout=self.send_timeout)
+                except Exception as e:
+                    print(f"[WS] Send to client of {self.project_id} failed: {type(e).__name__}: {e}")
+                    await on_failure(self)
+                    return
+
+                latency = time.perf_counter() - start
+                self.messages_sent += 1
+                self.last_send_latency = latency
+                self.total_send_latency += latency
+                self.max_send_latency = max(self.max_send_latency, latency)
+        except asyncio.CancelledError:
+            pass
+
+    def get_metrics(self) -> Dict:
+        """Snapshot of this connection's queue and latency metrics"""
+        avg_latency = self.total_send_latency / self.messages_sent if self.messages_sent else 0.0
+        return {
+            "project_id": self.project_id,
+            "connected_for": round(time.time() - self.connected_at, 1),
+            "queue_depth": len(self.queue),
+            "max_queue_depth": self.max_queue_depth,
+            "messages_sent": self.messages_sent,
+            "messages_dropped": self.messages_dropped,
+            "messages_coalesced": self.messages_coalesced,
+            "avg_send_latency_ms": round(avg_latency * 1000, 2),
+            "max_send_latency_ms": round(self.max_send_latency * 1000, 2),
+            "last_send_latency_ms": round(self.last_send_latency * 1000, 2)
+        }
+
+
+class ProjectEventLog:
+    """Ring buffer of the most recent events for one project, numbered by sequence"""
+
+    def __init__(self, max_events: int):
+        self.events: Deque[Dict] = deque(maxlen=max_events)
+        self.next_seq = 1
+
+    def append(self, message: Dict) -> Dict:
+        """Stamp a message with the next sequence number and retain it"""
+        event = dict(message)
+        event["seq"] = self.next_seq
+        self.next_seq += 1
+        self.events.append(event)
+        return event
+
+    def since(self, seq: int) -> List[Dict]:
+        """Events with a sequence number greater than seq, oldest first"""
+        return [event for event in self.events if event["seq"] > seq]
+
+    @property
+    def oldest_seq(self) -> int:
+        return self.events[0]["seq"] if self.events else self.next_seq
+
+
+class WebSocketManager:
+    """Fan-out of project updates to WebSocket clients without blocking the caller.
+
+    Every connection gets a bounded queue drained by its own task, so a slow or
+    stalled browser only delays itself - never other viewers or the build pipeline.
+    Every event is also kept in a per-project log so late or reconnecting clients
+    can resume from the last sequence number they saw.
+    """
+
+    def __init__(self, max_queue_size: int = 100, coalesce_after: int = 5,
+                 send_timeout: float = 10.0, max_dropped: int = 50,
+                 max_events_per_project: int = 500, max_projects: int = 200):
+        self.max_queue_size = max_queue_size
+        self.coalesce_after = coalesce_after
+        self.send_timeout = send_timeout
+        self.max_dropped = max_dropped
+        self.max_events_per_project = max_events_per_project
+        self.max_projects = max_projects
+
+        self.connections: Dict[str, List[ClientConnection]] = {}
+        self.event_logs: "OrderedDict[str, ProjectEventLog]" = OrderedDict()
+
+        # Client-supplied job IDs that have been bound to a real project ID
+        self.aliases: "OrderedDict[str, str]" = OrderedDict()
+
+        # Totals for connections that have already gone away
+        self.total_disconnected = 0
+        self.total_evicted = 0
+
+    def resolve(self, project_id: str) -> str:
+        """Map a job ID to the project it was bound to"""
+        return self.aliases.get(project_id, project_id)
+
+    def _get_event_log(self, project_id: str) -> ProjectEventLog:
+        log = self.event_logs.get(project_id)
+        if log is None:
+            log = ProjectEventLog(self.max_events_per_project)
+            self.event_logs[project_id] = log
+            while len(self.event_logs) > self.max_projects:
+                self.event_logs.popitem(last=False)
+        else:
+            self.event_logs.move_to_end(project_id)
+        return log
+
+    def register_job(self, job_id: str, project_id: str):
+        """Bind a client-supplied job ID to the project created for it.
+
+        Clients that connected to /ws/{job_id} before the project existed are moved
+        over, and any later connection to the job ID lands on the project.
+        """
+        existing = self.aliases.get(job_id)
+        if existing and existing != project_id:
+            raise ValueError(f"Job ID {job_id} is already bound to {existing}")
+        if job_id == project_id:
+            return
+
+        self.aliases[job_id] = project_id
+        while len(self.aliases) > self.max_projects:
+            self.aliases.popitem(last=False)
+
+        if job_id in self.event_logs and project_id not in self.event_logs:
+            self.event_logs[project_id] = self.event_logs.pop(job_id)
+
+        for connection in self.connections.pop(job_id, []):
+            connection.project_id = project_id
+            self.connections.setdefault(project_id, []).append(connection)
+
+    def get_events(self, project_id: str, since: int = 0) -> Dict:
+        """Retained events after a sequence number, for replay or polling"""
+        project_id = self.resolve(project_id)
+        log = self.event_logs.get(project_id)
+        if log is None:
+            return {"project_id": project_id, "events": [], "next_seq": 1, "truncated": False}
+        return {
+            "project_id": project_id,
+            "events": log.since(since),
+            "next_seq": log.next_seq,
+            "truncated": since + 1 < log.oldest_seq
+        }
+
+    async def connect(self, project_id: str, websocket: WebSocket,
+                      since: Optional[int] = None) -> ClientConnection:
+        """Accept and register a client, replaying events after `since` if given"""
+        await websocket.accept()
+        project_id = self.resolve(project_id)
+
+        connection = ClientConnection(
+            project_id, websocket,
+            max_queue_size=self.max_queue_size,
+            coalesce_after=self.coalesce_after,
+            send_timeout=self.send_timeout,
+            max_dropped=self.max_dropped
+        )
+
+        # Replay before registering so no live event can overtake the history
+        if since is not None:
+            history = self.get_events(project_id, since)
+            if history["truncated"]:
+                connection.queue.append({
+                    "type": "history_truncated",
+                    "oldest_seq": self.event_logs[project_id].oldest_seq
+                })
+            connection.queue.extend(history["events"])
+            connection.has_messages.set()
+
+        connection.sender_task = asyncio.create_task(connection.run_sender(self._on_send_failure))
+
+        self.connections.setdefault(project_id, []).append(connection)
+        return connection
+
+    async def disconnect(self, connection: ClientConnection):
+        """Unregister a client and stop its sender task"""
+        if connection.closed:
+            return
+        connection.closed = True
+        connection.has_messages.set()
+
+        clients = self.connections.get(connection.project_id, [])
+        if connection in clients:
+            clients.remove(connection)
+        if not clients:
+            self.connections.pop(connection.project_id, None)
+
+        if connection.sender_task and connection.sender_task is not asyncio.current_task():
+            connection.sender_task.cancel()
+
+        self.total_disconnected += 1
+
+    async def broadcast(self, project_id: str, message: Dict):
+        """Log a message and queue it for every client of a project. Never waits on the network."""
+        project_id = self.resolve(project_id)
+        event = self._get_event_log(project_id).append(message)
+
+        hopeless = []
+        for connection in list(self.connections.get(project_id, [])):
+            if not connection.enqueue(event):
+                hopeless.append(connection)
+
+        for connection in hopeless:
+            print(f"[WS] Evicting client of {project_id}: too many dropped messages")
+            await self._evict(connection)
+
+    async def _on_send_failure(self, connection: ClientConnection):
+        await self._evict(connection)
+
+    async def _evict(self, connection: ClientConnection):
+        """Drop a client that cannot keep up or whose socket is dead"""
+        if connection.closed:
+            return
+        self.total_evicted += 1
+        await self.disconnect(connection)
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=1013), timeout=1.0)
+        except Exception:
+            pass
+
+    def get_metrics(self) -> Dict:
+        """Aggregate queue depth and send latency metrics across all clients"""
+        clients = [c.get_metrics() for conns in self.connections.values() for c in conns]
+        return {
+            "active_connections": len(clients),
+            "projects": len(self.connections),
+            "event_logs": len(self.event_logs),
+            "total_queue_depth": sum(c["queue_depth"] for c in clients),
+            "max_queue_depth": max((c["max_queue_depth"] for c in clients), default=0),
+            "max_send_latency_ms": max((c["max_send_latency_ms"] for c in clients), default=0.0),
+            "total_disconnected": self.total_disconnected,
+            "total_evicted": self.total_evicted,
+            "clients": clients
+        }
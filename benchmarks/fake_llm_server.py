@@ -0,0 +1,191 @@
+"""
+Local stand-in for the Anthropic and OpenAI-compatible chat APIs.
+
+Serves canned SwiftUI apps with injected latency so the full generate/modify/recover
+pipeline can run without network access or API keys:
+
+    POST /v1/messages           Anthropic Messages format
+    POST /v1/chat/completions   OpenAI / xAI chat completions format
+"""
+
+import json
+import random
+import threading
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+
+def build_app_payload(request_number: int, prompt: str) -> Dict:
+    """A small but complete app; the counter keeps every response's sources distinct"""
+    marker = f"// swiftgen-bench response {request_number}"
+    return {
+        "app_name": "BenchApp",
+        "bundle_id": "com.swiftgen.benchapp",
+        "features": ["Counter", "List of items"],
+        "unique_aspects": "Benchmark fixture",
+        "fixes_applied": ["Replaced undefined symbol"] if "error" in prompt.lower() else [],
+        "files": [
+            {
+                "path": "Sources/App.swift",
+                "content": (
+                    "import SwiftUI\n\n"
+                    "@main\n"
+                    "struct BenchApp: App {\n"
+                    "    var body: some Scene {\n"
+                    "        WindowGroup {\n"
+                    "            ContentView()\n"
+                    "        }\n"
+                    "    }\n"
+                    "}\n"
+                )
+            },
+            {
+                "path": "Sources/ContentView.swift",
+                "content": (
+                    f"{marker}\n"
+                    "import SwiftUI\n\n"
+                    "struct ContentView: View {\n"
+                    "    @State private var count = 0\n"
+                    "    @State private var items: [String] = [\"One\", \"Two\", \"Three\"]\n\n"
+                    "    var body: some View {\n"
+                    "        NavigationView {\n"
+                    "            List {\n"
+                    "                Section(header: Text(\"Count: \\(count)\")) {\n"
+                    "                    Button(\"Increment\") { count += 1 }\n"
+                    "                }\n"
+                    "                ForEach(items, id: \\.self) { item in\n"
+                    "                    Text(item)\n"
+                    "                }\n"
+                    "            }\n"
+                    "            .navigationTitle(\"BenchApp\")\n"
+                    "        }\n"
+                    "    }\n"
+                    "}\n"
+                )
+            }
+        ]
+    }
+
+
+class FakeLLMConfig:
+    def __init__(self, latency_ms: float = 1500, jitter_ms: float = 500, error_rate: float = 0.0,
+                 output_tokens: int = 1200, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.output_tokens = output_tokens
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    def next_request(self) -> Tuple[int, float, bool]:
+        """Request number, latency in seconds and whether to answer with an overload error"""
+        with self.lock:
+            self.request_count += 1
+            latency = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            return self.request_count, latency, self.random.random() < self.error_rate
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    config: FakeLLMConfig = None
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+
+        request_number, latency, overloaded = self.config.next_request()
+        time.sleep(latency)
+
+        if self.path.endswith("/messages"):
+            if overloaded:
+                self._send_json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+                return
+            prompt = self._prompt_text(body.get("messages", []))
+            content = json.dumps(build_app_payload(request_number, prompt))
+            self._send_json(200, {
+                "id": f"msg_bench_{request_number}",
+                "type": "message",
+                "role": "assistant",
+                "model": body.get("model", "fake"),
+                "content": [{"type": "text", "text": content}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": len(prompt) // 4, "output_tokens": self.config.output_tokens}
+            })
+        elif self.path.endswith("/chat/completions"):
+            if overloaded:
+                self._send_json(429, {"error": {"type": "rate_limit_exceeded", "message": "Rate limited"}},
+                                {"Retry-After": "1"})
+                return
+            prompt = self._prompt_text(body.get("messages", []))
+            content = json.dumps(build_app_payload(request_number, prompt))
+            self._send_json(200, {
+                "id": f"chatcmpl-bench-{request_number}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": len(prompt) // 4,
+                    "completion_tokens": self.config.output_tokens,
+                    "total_tokens": len(prompt) // 4 + self.config.output_tokens
+                }
+            })
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+    def log_message(self, format, *args):
+        pass
+
+    def _prompt_text(self, messages) -> str:
+        parts = []
+        for message in messages:
+            content = message.get("content", "")
+            if isinstance(content, list):
+                content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+            parts.append(content)
+        return "\n".join(parts)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(config: FakeLLMConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the server on a daemon thread; port 0 picks a free port"""
+    handler = type("BoundFakeLLMHandler", (FakeLLMHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Anthropic/OpenAI server for SwiftGen benchmarks")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=1500)
+    parser.add_argument("--jitter-ms", type=float, default=500)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = start_server(FakeLLMConfig(args.latency_ms, args.jitter_ms, args.error_rate), port=args.port)
+    print(f"Fake LLM server listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,267 @@
+"""
+Hermetic end-to-end benchmark for SwiftGen.
+
+Starts the fake LLM server, puts the fake Xcode toolchain in benchmarks/shims on
+PATH, launches the backend against a scratch workspaces directory and drives
+/api/generate and /api/modify at a fixed concurrency. Reports p50/p95 latency,
+throughput and a per-stage breakdown taken from each request's trace.
+
+Runs on Linux without network access:
+
+    python benchmarks/run_benchmark.py --apps 8 --modifications 2 --concurrency 4
+"""
+
+import os
+import sys
+import math
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional
+
+import httpx
+
+from fake_llm_server import FakeLLMConfig, start_server
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.abspath(os.path.join(BENCHMARKS_DIR, "..", "backend"))
+SHIMS_DIR = os.path.join(BENCHMARKS_DIR, "shims")
+
+# Span names reported as pipeline stages, in pipeline order
+STAGES = ["speculative.simulator", "speculative.workspace", "speculative.template", "generate_code", "modify_code",
+          "llm.request", "project.create", "project.update", "build", "xcodegen", "xcodebuild", "recovery", "recovery.strategy", "simulator.launch", "simulator.boot",
+          "simulator.install_and_launch"]
+
+DESCRIPTIONS = [
+    "A habit tracker with daily streaks",
+    "A tip calculator that splits the bill between friends",
+    "A simple notes app with search",
+    "A countdown timer for workouts",
+    "A shopping list grouped by aisle",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(port: int, env: Dict, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Backend exited during startup - see the backend log")
+        try:
+            response = await client.get("/api/projects")
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("Backend did not become ready in time")
+
+
+class BenchmarkRunner:
+    def __init__(self, client: httpx.AsyncClient, concurrency: int):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.results: List[Dict] = []
+
+    async def _timed_post(self, kind: str, path: str, payload: Dict) -> Optional[Dict]:
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                response = await self.client.post(path, json=payload)
+                elapsed = time.perf_counter() - start
+                body = response.json() if response.status_code == 200 else {}
+                result = {
+                    "kind": kind,
+                    "seconds": elapsed,
+                    "http_status": response.status_code,
+                    "status": body.get("status", "http_error"),
+                    "trace_id": response.headers.get("X-Trace-Id"),
+                    "project_id": body.get("project_id")
+                }
+            except httpx.HTTPError as e:
+                result = {"kind": kind, "seconds": time.perf_counter() - start, "http_status": None,
+                          "status": f"transport_error: {e}", "trace_id": None, "project_id": None}
+        self.results.append(result)
+        return result
+
+    async def run_project(self, index: int, modifications: int):
+        description = DESCRIPTIONS[index % len(DESCRIPTIONS)]
+        generated = await self._timed_post("generate", "/api/generate", {
+            "description": description, "app_name": f"BenchApp{index}"
+        })
+        if not generated or not generated["project_id"]:
+            return
+
+        # Modifications of one project are sequential, as a user would issue them
+        for step in range(modifications):
+            await self._timed_post("modify", "/api/modify", {
+                "project_id": generated["project_id"],
+                "modification": f"Add a settings screen variant {step + 1}"
+            })
+
+    async def collect_stages(self) -> Dict[str, List[float]]:
+        """Total time per stage for each request, read back from its trace"""
+        stages: Dict[str, List[float]] = {}
+        for result in self.results:
+            if not result["trace_id"]:
+                continue
+            response = await self.client.get(f"/api/traces/{result['trace_id']}")
+            if response.status_code != 200:
+                continue
+            per_request: Dict[str, float] = {}
+            for span in response.json().get("spans", []):
+                if span["name"] in STAGES:
+                    per_request[span["name"]] = per_request.get(span["name"], 0) + span["duration_ms"] / 1000
+            for name, seconds in per_request.items():
+                stages.setdefault(name, []).append(seconds)
+        return stages
+
+
+def build_report(results: List[Dict], stages: Dict[str, List[float]], wall_seconds: float, config: Dict) -> Dict:
+    report = {"config": config, "wall_seconds": round(wall_seconds, 3), "endpoints": {}, "stages": {}}
+    for kind in ("generate", "modify"):
+        runs = [r for r in results if r["kind"] == kind]
+        if not runs:
+            continue
+        latencies = [r["seconds"] for r in runs]
+        statuses: Dict[str, int] = {}
+        for r in runs:
+            statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+        report["endpoints"][kind] = {
+            "requests": len(runs),
+            "statuses": statuses,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "max": round(max(latencies), 3),
+            "throughput_per_min": round(len(runs) / wall_seconds * 60, 2) if wall_seconds else 0
+        }
+    for name in STAGES:
+        if name in stages:
+            values = stages[name]
+            report["stages"][name] = {
+                "count": len(values),
+                "mean": round(sum(values) / len(values), 3),
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3)
+            }
+    return report
+
+
+def print_report(report: Dict):
+    print(f"\nWall time: {report['wall_seconds']:.1f}s")
+    print(f"\n{'endpoint':<10} {'reqs':>5} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'per min':>8}  statuses")
+    for kind, row in report["endpoints"].items():
+        statuses = ", ".join(f"{k}={v}" for k, v in sorted(row["statuses"].items()))
+        print(f"{kind:<10} {row['requests']:>5} {row['p50']:>8.2f} {row['p95']:>8.2f} {row['max']:>8.2f} "
+              f"{row['throughput_per_min']:>8.2f}  {statuses}")
+
+    print(f"\n{'stage':<30} {'count':>5} {'mean s':>8} {'p50 s':>8} {'p95 s':>8}")
+    for name, row in report["stages"].items():
+        print(f"{name:<30} {row['count']:>5} {row['mean']:>8.2f} {row['p50']:>8.2f} {row['p95']:>8.2f}")
+
+
+async def run(args) -> Dict:
+    scratch = tempfile.mkdtemp(prefix="swiftgen_bench_")
+    llm_server = start_server(FakeLLMConfig(args.llm_latency_ms, args.llm_jitter_ms, args.llm_error_rate,
+                                            seed=args.seed))
+    llm_url = f"http://127.0.0.1:{llm_server.server_address[1]}"
+
+    env = os.environ.copy()
+    env.update({
+        "PATH": SHIMS_DIR + os.pathsep + env.get("PATH", ""),
+        "ANTHROPIC_BASE_URL": llm_url,
+        "OPENAI_BASE_URL": f"{llm_url}/v1",
+        "XAI_BASE_URL": f"{llm_url}/v1",
+        "CLAUDE_API_KEY": "bench-key",
+        "OPENAI_API_KEY": "bench-key",
+        "XAI_API_KEY": "bench-key",
+        "SWIFTGEN_WORKSPACES_DIR": os.path.join(scratch, "workspaces"),
+        "SWIFTGEN_FAKE_STATE_DIR": scratch,
+        "SWIFTGEN_FAKE_XCODEGEN_SECONDS": str(args.xcodegen_seconds),
+        "SWIFTGEN_FAKE_BUILD_SECONDS": str(args.build_seconds),
+        "SWIFTGEN_FAKE_BUILD_FAILURE_RATE": str(args.build_failure_rate),
+        "SWIFTGEN_FAKE_SIMCTL_SECONDS": str(args.simctl_seconds),
+    })
+
+    port = free_port()
+    backend_log = os.path.join(scratch, "backend.log")
+    backend = start_backend(port, env, backend_log)
+    print(f"Scratch dir: {scratch}")
+    print(f"Fake LLM at {llm_url}, backend on port {port} (log: {backend_log})")
+
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.request_timeout) as client:
+            await wait_until_ready(client, backend)
+
+            runner = BenchmarkRunner(client, args.concurrency)
+            start = time.perf_counter()
+            await asyncio.gather(*(runner.run_project(i, args.modifications) for i in range(args.apps)))
+            wall_seconds = time.perf_counter() - start
+
+            stages = await runner.collect_stages()
+            config = {k: v for k, v in vars(args).items() if k != "output"}
+            return build_report(runner.results, stages, wall_seconds, config)
+    finally:
+        backend.terminate()
+        try:
+            backend.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            backend.kill()
+        llm_server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hermetic SwiftGen generate/modify benchmark")
+    parser.add_argument("--apps", type=int, default=4, help="apps to generate")
+    parser.add_argument("--modifications", type=int, default=1, help="modifications per generated app")
+    parser.add_argument("--concurrency", type=int, default=2, help="requests in flight at once")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500)
+    parser.add_argument("--llm-jitter-ms", type=float, default=500)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="share of LLM calls answered 429/529")
+    parser.add_argument("--xcodegen-seconds", type=float, default=0.5)
+    parser.add_argument("--build-seconds", type=float, default=5)
+    parser.add_argument("--build-failure-rate", type=float, default=0.0,
+                        help="share of projects whose first build fails with compile errors")
+    parser.add_argument("--simctl-seconds", type=float, default=0.5)
+    parser.add_argument("--request-timeout", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
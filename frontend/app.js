@@ -2,6 +2,8 @@
 class SwiftGenChat {
     constructor() {
         this.ws = null;
+        this.wsProjectId = null;
+        this.lastEventSeq = 0;
         this.currentProjectId = null;
         this.generatedFiles = [];
         this.messageHistory = [];
@@ -218,9 +220,10 @@ class SwiftGenChat {
         this.addMessage('assistant', `Great! I'll create ${appName} for you. Let me generate the Swift code and build it...`, true);
 
         try {
-            // Generate project ID for WebSocket
-            const tempProjectId = `proj_${Date.now()}`;
-            this.connectWebSocket(tempProjectId);
+            // Listen on a job ID the server will bind to the real project ID
+            const jobId = `job_${Date.now()}_${Math.random().toString(36).slice(2, 8)}`;
+            // Replay from the start: events can be logged before the socket is accepted
+            this.connectWebSocket(jobId, 0);
 
             // Make API request
             const response = await fetch('/api/generate', {
@@ -230,7 +233,8 @@ class SwiftGenChat {
                 },
                 body: JSON.stringify({
                     app_name: appName,
-                    description: description
+                    description: description,
+                    job_id: jobId
                 })
             });
 
@@ -423,12 +427,19 @@ class SwiftGenChat {
         this.messageHistory.push({ sender, content, timestamp });
     }
 
-    connectWebSocket(projectId) {
+    connectWebSocket(projectId, since = null) {
         if (this.ws) {
+            this.ws.onclose = null;
             this.ws.close();
         }
 
-        const wsUrl = `ws://localhost:8000/ws/${projectId}`;
+        if (projectId !== this.wsProjectId) {
+            this.wsProjectId = projectId;
+            this.lastEventSeq = 0;
+        }
+
+        const query = since !== null ? `?since=${since}` : '';
+        const wsUrl = `ws://localhost:8000/ws/${projectId}${query}`;
         this.ws = new WebSocket(wsUrl);
 
         this.ws.onopen = () => {
@@ -438,6 +449,12 @@ class SwiftGenChat {
 
         this.ws.onmessage = (event) => {
             const message = JSON.parse(event.data);
+            if (message.seq) {
+                if (message.seq <= this.lastEventSeq) {
+                    return; // Already seen before a reconnect
+                }
+                this.lastEventSeq = message.seq;
+            }
             this.handleWebSocketMessage(message);
         };
 
@@ -449,6 +466,11 @@ class SwiftGenChat {
         this.ws.onclose = () => {
             console.log('WebSocket disconnected');
             this.updateStatus('disconnected', 'Disconnected from server');
+
+            // Resume where we left off while a request is still in flight
+            if (this.isProcessing) {
+                setTimeout(() => this.connectWebSocket(projectId, this.lastEventSeq), 1000);
+            }
         };
     }
 
@@ -462,6 +484,10 @@ class SwiftGenChat {
             case 'complete':
                 // Final completion is handled in main response
                 break;
+            case 'launch':
+                // Simulator launch finishes after the main response
+                this.handleStatusUpdate(message.message);
+                break;
             case 'error':
                 if (message.errors) {
                     this.buildLogs = message.errors;